@@ -15,6 +15,7 @@ from gensim.models.keyedvectors import KeyedVectors
 from pandas.core.frame import DataFrame
 from pandas.core.series import Series
 
+from course2vec.sentence_corpus import CourseSentenceCorpus, CorpusContent
 from course2vec.word2vec_model_creation import Word2VecModelCreator 
 from pathways.student_focus_analyst import StudentFocusAnalyst
 
@@ -483,7 +484,16 @@ class StudentFocusExplorer(object):
     # import_sentences 
     #------------------
     
-    def import_sentences(self, sentence_filename, hasHeader=True):
+    def import_sentences(self, sentence_filename, hasHeader=True, stream=False):
+        '''
+        Load training sentences. If stream is True, a re-iterable
+        CourseSentenceCorpus is returned that reads the file on 
+        each pass, rather than a list of all sentences.
+        '''
+        if stream:
+            return CourseSentenceCorpus(sentence_filename,
+                                        content=CorpusContent.SENTENCES,
+                                        hasHeader=hasHeader)
 
         res_arr_of_arr = []
         with open(sentence_filename, 'r') as sentence_fd:
@@ -0,0 +1,295 @@
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+
+Per-year course2vec models, rotated into one common space, so
+that a course's context can be compared across years. (In contrast,
+DimReducerByYear in experiments/pca_on_embeddings.py reduces each year
+separately, so its results are not comparable between years.)
+
+Each year's unit length vectors are aligned to the previous
+year's aligned vectors with orthogonal Procrustes over the
+courses the two years share. Rotations preserve similarities
+within a year, so neighbor queries within a year give the same
+answers as the year's own model.
+
+The store is a directory with:
+
+    aligned.npy   float32 (num_years, num_courses, vector_size), unit
+                  length rows; all zeros where a course is absent in a year
+    present.npy   bool (num_years, num_courses)
+    store.json    years, and the course names in row order
+
+The matrices are memory-mapped on load.
+
+Usage:
+    AlignedYearStore.build({2005 : 'model2005.model', 2006 : ...}, '/tmp/aligned')
+    store = AlignedYearStore('/tmp/aligned')
+    store.drift(['CS106A', 'CS107'])
+    store.neighbors_across_years('CS106A', topn=5)
+'''
+import argparse
+import json
+import os
+import sys
+
+from gensim.models import KeyedVectors
+from gensim.models import Word2Vec
+
+import numpy as np
+
+from course2vec.vector_bundle import VectorBundle, bundle_is_current
+
+
+class AlignedYearStore(object):
+    '''
+    Read access to an aligned year store. Use build()
+    to create one.
+    '''
+
+    ALIGNED_FILE = 'aligned.npy'
+    PRESENT_FILE = 'present.npy'
+    STORE_FILE   = 'store.json'
+
+    #--------------------------
+    # __init__
+    #----------------
+
+    def __init__(self, store_dir):
+        '''
+        @param store_dir: directory written by build()
+        @type store_dir: str
+        '''
+        try:
+            with open(os.path.join(store_dir, AlignedYearStore.STORE_FILE), 'r') as store_fd:
+                store_info = json.load(store_fd)
+            self.aligned = np.load(os.path.join(store_dir, AlignedYearStore.ALIGNED_FILE), mmap_mode='r')
+            self.present = np.load(os.path.join(store_dir, AlignedYearStore.PRESENT_FILE), mmap_mode='r')
+        except Exception as e:
+            raise ValueError("Could not open aligned year store '%s' (%s)" % (store_dir, repr(e)))
+        self.store_dir  = store_dir
+        self.years      = store_info['years']
+        self.index2word = store_info['index2word']
+        self.vocab      = {word : i for i, word in enumerate(self.index2word)}
+        self.year_idx   = {year : i for i, year in enumerate(self.years)}
+
+    #--------------------------
+    # build
+    #----------------
+
+    @classmethod
+    def build(cls, year_vector_files, store_dir):
+        '''
+        Align the given per-year models, and write the store.
+
+        @param year_vector_files: year to .model, .vectors, or bundle file of that year
+        @type year_vector_files: {int : str}
+        @param store_dir: where to write the store; created if needed
+        @type store_dir: str
+        @return: the new store
+        @rtype: AlignedYearStore
+        @raise ValueError: if the models differ in vector size
+        '''
+        years = sorted(year_vector_files.keys())
+        year_vectors = [load_word_vectors(year_vector_files[year]) for year in years]
+        vector_sizes = set(word_vectors.vectors.shape[1] for word_vectors in year_vectors)
+        if len(vector_sizes) != 1:
+            raise ValueError("Per-year models must have the same vector size; found %s." % sorted(vector_sizes))
+        vector_size = vector_sizes.pop()
+
+        index2word = sorted(set().union(*[word_vectors.index2word for word_vectors in year_vectors]))
+        vocab = {word : i for i, word in enumerate(index2word)}
+
+        os.makedirs(store_dir, exist_ok=True)
+        aligned = np.lib.format.open_memmap(os.path.join(store_dir, AlignedYearStore.ALIGNED_FILE),
+                                            mode='w+',
+                                            dtype=np.float32,
+                                            shape=(len(years), len(index2word), vector_size))
+        present = np.zeros((len(years), len(index2word)), dtype=bool)
+        for year_idx, word_vectors in enumerate(year_vectors):
+            rows = np.array([vocab[word] for word in word_vectors.index2word], dtype=int)
+            unit_vectors = np.asarray(word_vectors.vectors, dtype=np.float32)
+            norms = np.linalg.norm(unit_vectors, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            unit_vectors = unit_vectors / norms
+            if year_idx > 0:
+                # Rotate onto the previous year over the shared courses:
+                shared = present[year_idx - 1, rows]
+                if shared.sum() < vector_size:
+                    raise ValueError("Years %s and %s share only %s courses; need at least %s to align." %\
+                                     (years[year_idx - 1], years[year_idx], shared.sum(), vector_size))
+                rotation = procrustes_rotation(unit_vectors[shared], aligned[year_idx - 1, rows[shared]])
+                unit_vectors = unit_vectors @ rotation
+            aligned[year_idx, rows] = unit_vectors
+            present[year_idx, rows] = True
+        aligned.flush()
+        del aligned
+        np.save(os.path.join(store_dir, AlignedYearStore.PRESENT_FILE), present)
+        with open(os.path.join(store_dir, AlignedYearStore.STORE_FILE), 'w') as store_fd:
+            json.dump({'years' : years,
+                       'index2word' : index2word,
+                       'source_files' : {str(year) : year_vector_files[year] for year in years}
+                       },
+                      store_fd)
+        return AlignedYearStore(store_dir)
+
+    #--------------------------
+    # drift
+    #----------------
+
+    def drift(self, words, base_year=None):
+        '''
+        Cosine distance of each course's vector in each year
+        from its vector in the base year.
+
+        @param words: course names
+        @type words: [str]
+        @param base_year: year to compare with; default: for each course
+            the first year in which it is present
+        @type base_year: int
+        @return: years, and a (len(words), num_years) array of distances.
+            NaN where the course is absent in the year or in the base year.
+        @rtype: ([int], np.ndarray)
+        @raise KeyError: if a course is in none of the years
+        '''
+        rows = np.array([self.vocab[word] for word in words], dtype=int)
+        # (num_years, num_words, vector_size):
+        word_vectors = self.aligned[:, rows]
+        word_present = self.present[:, rows]
+        if base_year is None:
+            base_year_idxs = np.argmax(word_present, axis=0)
+        else:
+            base_year_idxs = np.full(len(rows), self.year_idx[base_year])
+        base_vectors = word_vectors[base_year_idxs, np.arange(len(rows))]
+        base_present = word_present[base_year_idxs, np.arange(len(rows))]
+
+        distances = 1.0 - np.einsum('ywd,wd->wy', word_vectors, base_vectors)
+        distances[~word_present.T] = np.nan
+        distances[~base_present] = np.nan
+        return (self.years, distances)
+
+    #--------------------------
+    # neighbors_across_years
+    #----------------
+
+    def neighbors_across_years(self, word, topn=10, query_year=None):
+        '''
+        Neighbors of a course in every year, with one matrix
+        product across all years.
+
+        @param word: course name
+        @type word: str
+        @param topn: neighbors per year
+        @type topn: int
+        @param query_year: if provided, the course's vector of this year is
+            the query in all years ('which courses of year Y are closest to
+            what X was in query_year'). Default: each year's own vector
+            of the course; years in which the course is absent are then skipped.
+        @type query_year: int
+        @return: year to (course name, similarity) tuples, most similar first
+        @rtype: {int : [(str, float)]}
+        @raise KeyError: if the course is in none of the years
+        '''
+        row = self.vocab[word]
+        if query_year is None:
+            queries = self.aligned[:, row]
+            query_years = np.where(self.present[:, row])[0]
+        else:
+            query_year_idx = self.year_idx[query_year]
+            if not self.present[query_year_idx, row]:
+                raise KeyError("Course '%s' not in year %s" % (word, query_year))
+            queries = np.repeat(self.aligned[query_year_idx, row][np.newaxis, :], len(self.years), axis=0)
+            query_years = np.arange(len(self.years))
+
+        # (num_query_years, num_courses):
+        similarities = np.einsum('ynd,yd->yn', self.aligned[query_years], queries[query_years])
+        similarities[~self.present[query_years]] = -np.inf
+        similarities[:, row] = -np.inf
+        topn = min(topn, similarities.shape[1] - 1)
+        best = np.argpartition(-similarities, topn - 1, axis=1)[:, :topn]
+        best_sims = np.take_along_axis(similarities, best, axis=1)
+        order = np.argsort(-best_sims, axis=1)
+        best = np.take_along_axis(best, order, axis=1)
+        best_sims = np.take_along_axis(best_sims, order, axis=1)
+
+        neighbors = {}
+        for i, year_idx in enumerate(query_years):
+            neighbors[self.years[year_idx]] = [(self.index2word[idx], float(similarity))
+                                               for idx, similarity in zip(best[i], best_sims[i])
+                                               if similarity > -np.inf]
+        return neighbors
+
+#--------------------------
+# procrustes_rotation
+#----------------
+
+def procrustes_rotation(source, target):
+    '''
+    Orthogonal matrix R that minimizes ||source @ R - target||.
+
+    @param source: rows to rotate
+    @type source: np.ndarray
+    @param target: rows to rotate onto; same shape as source
+    @type target: np.ndarray
+    @rtype: np.ndarray
+    '''
+    (u, _s, vt) = np.linalg.svd(source.T @ target)
+    return (u @ vt).astype(np.float32)
+
+#--------------------------
+# load_word_vectors
+#----------------
+
+def load_word_vectors(model_or_vectors_file):
+    if bundle_is_current(model_or_vectors_file):
+        return VectorBundle.load(model_or_vectors_file)
+    if model_or_vectors_file.endswith('.model'):
+        return Word2Vec.load(model_or_vectors_file).wv
+    return KeyedVectors.load(model_or_vectors_file, mmap='r')
+
+# -------------------------------------------- Main -------------------------
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog=os.path.basename(sys.argv[0]),
+                                     formatter_class=argparse.RawTextHelpFormatter,
+                                     description="Build an aligned year store, or query one."
+                                     )
+    parser.add_argument('-b', '--build',
+                        nargs='+',
+                        metavar='YEAR=FILE',
+                        help='per-year .model or .vectors files, such as 2005=/tmp/model2005.model',
+                        default=None
+                        )
+    parser.add_argument('-k', '--topn',
+                        type=int,
+                        help='neighbors per year; default: 10',
+                        default=10
+                        )
+    parser.add_argument('storedir',
+                        help='directory of the store'
+                        )
+    parser.add_argument('courses',
+                        nargs='*',
+                        help='courses whose drift and neighbors across years to print'
+                        )
+    args = parser.parse_args();
+
+    if args.build is not None:
+        year_vector_files = {}
+        for year_and_file in args.build:
+            (year, vectors_file) = year_and_file.split('=', 1)
+            year_vector_files[int(year)] = vectors_file
+        store = AlignedYearStore.build(year_vector_files, args.storedir)
+    else:
+        store = AlignedYearStore(args.storedir)
+
+    if len(args.courses) > 0:
+        (years, distances) = store.drift(args.courses)
+        print('course,' + ','.join(str(year) for year in years))
+        for course, course_distances in zip(args.courses, distances):
+            print(course + ',' + ','.join('' if np.isnan(distance) else '%.3f' % distance
+                                          for distance in course_distances))
+        for course in args.courses:
+            for year, neighbors in store.neighbors_across_years(course, topn=args.topn).items():
+                print('%s %s: %s' % (course, year, ', '.join(name for name, _similarity in neighbors)))
@@ -0,0 +1,393 @@
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+
+Approximate nearest neighbor index over course vectors: an
+inverted file (IVF) index with spherical k-means cells, in NumPy.
+
+The unit length vectors are clustered into about sqrt(N) cells.
+A query is compared with the cell centroids, and then only with
+the vectors of the nprobe closest cells. nprobe is the recall
+versus speed knob: nprobe == number of cells is an exact scan.
+
+The index is saved next to the .vectors file it was built
+from, as <root>.ivf.npz, and rebuilt when the vectors file
+is newer.
+
+Instances follow gensim's indexer protocol, so they can be
+passed to any KeyedVectors.most_similar():
+
+    index = IvfIndex.for_vectors_file(vectors_file, wv)
+    wv.most_similar('CS106A', topn=10, indexer=index)
+
+Note that, as with gensim's AnnoyIndexer, results obtained
+through the indexer include the query words themselves.
+Use most_similar_words() to have them excluded.
+
+Running this module prints recall@10 and query time for a range
+of nprobe values for a given vectors file.
+'''
+import argparse
+import os
+import sys
+import time
+
+from gensim.models import KeyedVectors
+
+import numpy as np
+
+
+class IvfIndex(object):
+    '''
+    Inverted file index over the unit length course vectors.
+    Vectors are stored sorted by cell, so the vectors of a
+    cell are a contiguous slice.
+    '''
+
+    # Default fraction of the cells that is searched:
+    DEFAULT_PROBE_FRACTION = 0.1
+
+    #--------------------------
+    # __init__
+    #----------------
+
+    def __init__(self, centroids, sorted_vectors, sorted_ids, cell_offsets, index2word, nprobe=None):
+        '''
+        Use build() or load() rather than this constructor.
+
+        @param centroids: unit length cell centroids, one row per cell
+        @type centroids: np.ndarray
+        @param sorted_vectors: unit length vectors, ordered by cell
+        @type sorted_vectors: np.ndarray
+        @param sorted_ids: row of each sorted vector in the original vectors
+        @type sorted_ids: np.ndarray
+        @param cell_offsets: start of each cell in sorted_vectors, plus the total
+        @type cell_offsets: np.ndarray
+        @param index2word: names in the order of the original vectors
+        @type index2word: [str]
+        @param nprobe: number of cells to search per query
+        @type nprobe: int
+        '''
+        self.centroids      = centroids
+        self.sorted_vectors = sorted_vectors
+        self.sorted_ids     = sorted_ids
+        self.cell_offsets   = cell_offsets
+        self.index2word     = list(index2word)
+        self.vocab          = {word : i for i, word in enumerate(self.index2word)}
+        self.num_cells      = centroids.shape[0]
+        if nprobe is None:
+            nprobe = int(np.ceil(self.num_cells * IvfIndex.DEFAULT_PROBE_FRACTION))
+        self.nprobe = nprobe
+
+    @property
+    def nprobe(self):
+        return self._nprobe
+
+    @nprobe.setter
+    def nprobe(self, nprobe):
+        self._nprobe = max(1, min(int(nprobe), self.num_cells))
+
+    #--------------------------
+    # build
+    #----------------
+
+    @classmethod
+    def build(cls, vectors, index2word, num_cells=None, iterations=10, nprobe=None, seed=1):
+        '''
+        Cluster the vectors with spherical k-means, and
+        create the index.
+
+        @param vectors: one vector per row
+        @type vectors: np.ndarray
+        @param index2word: name of each row
+        @type index2word: [str]
+        @param num_cells: number of cells; default: sqrt of the number of vectors
+        @type num_cells: int
+        @param iterations: k-means iterations
+        @type iterations: int
+        @param nprobe: cells searched per query
+        @type nprobe: int
+        @param seed: random seed of the centroid initialization
+        @type seed: int
+        @rtype: IvfIndex
+        '''
+        unit_vectors = unit_rows(vectors)
+        num_vectors  = unit_vectors.shape[0]
+        if num_vectors == 0:
+            raise ValueError("Cannot index an empty set of vectors.")
+        if num_cells is None:
+            num_cells = int(np.sqrt(num_vectors))
+        num_cells = max(1, min(num_cells, num_vectors))
+
+        rng = np.random.RandomState(seed)
+        centroids = unit_vectors[rng.choice(num_vectors, num_cells, replace=False)].copy()
+        for _i in range(iterations):
+            cells = nearest_centroids(unit_vectors, centroids)
+            sums  = np.zeros_like(centroids)
+            np.add.at(sums, cells, unit_vectors)
+            counts = np.bincount(cells, minlength=num_cells)
+            # Re-seed cells that lost all their vectors:
+            empty = np.where(counts == 0)[0]
+            sums[empty] = unit_vectors[rng.choice(num_vectors, len(empty), replace=False)]
+            centroids = unit_rows(sums)
+        cells = nearest_centroids(unit_vectors, centroids)
+
+        sorted_ids   = np.argsort(cells, kind='stable')
+        cell_offsets = np.concatenate(([0], np.cumsum(np.bincount(cells, minlength=num_cells))))
+        return IvfIndex(centroids,
+                        unit_vectors[sorted_ids],
+                        sorted_ids,
+                        cell_offsets,
+                        index2word,
+                        nprobe=nprobe)
+
+    #--------------------------
+    # index_file
+    #----------------
+
+    @classmethod
+    def index_file(cls, vectors_file):
+        return os.path.splitext(vectors_file)[0] + '.ivf.npz'
+
+    #--------------------------
+    # for_vectors_file
+    #----------------
+
+    @classmethod
+    def for_vectors_file(cls, vectors_file, vectors=None, nprobe=None):
+        '''
+        Return the index that belongs to a .vectors file. Loads
+        the saved index if it is at least as new as the vectors
+        file. Otherwise builds the index, and saves it.
+
+        @param vectors_file: KeyedVectors file
+        @type vectors_file: str
+        @param vectors: the loaded vectors, if available
+        @type vectors: KeyedVectors
+        @param nprobe: cells searched per query
+        @type nprobe: int
+        @rtype: IvfIndex
+        '''
+        index_file = IvfIndex.index_file(vectors_file)
+        if os.path.exists(index_file) and \
+           os.path.getmtime(index_file) >= os.path.getmtime(vectors_file):
+            return IvfIndex.load(index_file, nprobe=nprobe)
+        if vectors is None:
+            vectors = KeyedVectors.load(vectors_file, mmap='r')
+        index = IvfIndex.build(vectors.vectors, vectors.index2word, nprobe=nprobe)
+        try:
+            index.save(index_file)
+        except OSError:
+            # Read-only data directory: use the index unsaved.
+            pass
+        return index
+
+    #--------------------------
+    # save
+    #----------------
+
+    def save(self, index_file):
+        np.savez(index_file,
+                 centroids=self.centroids,
+                 sorted_vectors=self.sorted_vectors,
+                 sorted_ids=self.sorted_ids,
+                 cell_offsets=self.cell_offsets,
+                 index2word=np.array(self.index2word, dtype=str))
+
+    #--------------------------
+    # load
+    #----------------
+
+    @classmethod
+    def load(cls, index_file, nprobe=None):
+        try:
+            saved = np.load(index_file)
+        except Exception as e:
+            raise ValueError("Could not load ANN index '%s' (%s)" % (index_file, repr(e)))
+        with saved:
+            return IvfIndex(saved['centroids'],
+                            saved['sorted_vectors'],
+                            saved['sorted_ids'],
+                            saved['cell_offsets'],
+                            saved['index2word'].tolist(),
+                            nprobe=nprobe)
+
+    #--------------------------
+    # most_similar
+    #----------------
+
+    def most_similar(self, vector, num_neighbors):
+        '''
+        Gensim indexer protocol: the num_neighbors vectors
+        with the highest cosine similarity to vector, among
+        those in the nprobe closest cells.
+
+        @param vector: query vector
+        @type vector: np.ndarray
+        @param num_neighbors: number of results
+        @type num_neighbors: int
+        @return: (course name, similarity) tuples, most similar first
+        @rtype: [(str, float)]
+        '''
+        (ids, similarities) = self.search(vector, num_neighbors)
+        return [(self.index2word[word_id], float(similarity))
+                for word_id, similarity in zip(ids, similarities)]
+
+    #--------------------------
+    # most_similar_words
+    #----------------
+
+    def most_similar_words(self, positive=None, negative=None, topn=10):
+        '''
+        Like KeyedVectors.most_similar(): the query is the
+        normalized mean of the unit length positive vectors minus
+        the negative ones. The query words are excluded.
+
+        @param positive: course name(s) that contribute positively
+        @type positive: {str | [str]}
+        @param negative: course name(s) that contribute negatively
+        @type negative: {str | [str]}
+        @param topn: number of results
+        @type topn: int
+        @rtype: [(str, float)]
+        '''
+        if isinstance(positive, str):
+            positive = [positive]
+        if isinstance(negative, str):
+            negative = [negative]
+        positive = positive or []
+        negative = negative or []
+        if len(positive) + len(negative) == 0:
+            raise ValueError("Cannot compute similarity with no input.")
+        unit_vectors = self.unit_vectors_by_id()
+        query = np.zeros(self.centroids.shape[1], dtype=np.float32)
+        for word in positive:
+            query += unit_vectors[self.vocab[word]]
+        for word in negative:
+            query -= unit_vectors[self.vocab[word]]
+        query_words = set(positive + negative)
+        return [(word, similarity) for (word, similarity)
+                in self.most_similar(query, topn + len(query_words))
+                if word not in query_words][:topn]
+
+    def similar_by_word(self, word, topn=10):
+        return self.most_similar_words(positive=[word], topn=topn)
+
+    #--------------------------
+    # search
+    #----------------
+
+    def search(self, vector, num_neighbors, nprobe=None):
+        '''
+        @return: original row ids and similarities of the neighbors,
+            most similar first
+        @rtype: (np.ndarray, np.ndarray)
+        '''
+        nprobe = self.nprobe if nprobe is None else max(1, min(nprobe, self.num_cells))
+        query = np.asarray(vector, dtype=np.float32)
+        query = query / max(np.linalg.norm(query), 1e-12)
+
+        centroid_sims = self.centroids @ query
+        if nprobe < self.num_cells:
+            probed_cells = np.argpartition(-centroid_sims, nprobe - 1)[:nprobe]
+        else:
+            probed_cells = np.arange(self.num_cells)
+        candidates = np.concatenate([np.arange(self.cell_offsets[cell], self.cell_offsets[cell + 1])
+                                     for cell in probed_cells])
+        similarities = self.sorted_vectors[candidates] @ query
+
+        num_neighbors = min(num_neighbors, len(candidates))
+        if num_neighbors == 0:
+            return (np.array([], dtype=int), np.array([], dtype=np.float32))
+        best = np.argpartition(-similarities, num_neighbors - 1)[:num_neighbors]
+        best = best[np.argsort(-similarities[best])]
+        return (self.sorted_ids[candidates[best]], similarities[best])
+
+    #--------------------------
+    # unit_vectors_by_id
+    #----------------
+
+    def unit_vectors_by_id(self):
+        '''
+        Unit length vectors in their original order, computed
+        on first use from the cell ordered copy.
+        '''
+        try:
+            return self._unit_vectors_by_id
+        except AttributeError:
+            self._unit_vectors_by_id = np.empty_like(self.sorted_vectors)
+            self._unit_vectors_by_id[self.sorted_ids] = self.sorted_vectors
+            return self._unit_vectors_by_id
+
+    #--------------------------
+    # recall
+    #----------------
+
+    def recall(self, nprobe, topn=10, num_queries=200, seed=1):
+        '''
+        Fraction of the exact topn neighbors that the index
+        finds with the given nprobe, averaged over a random
+        sample of the indexed vectors as queries.
+
+        @return: recall and mean query time in milliseconds
+        @rtype: (float, float)
+        '''
+        unit_vectors = self.unit_vectors_by_id()
+        rng = np.random.RandomState(seed)
+        query_ids = rng.choice(unit_vectors.shape[0], min(num_queries, unit_vectors.shape[0]), replace=False)
+        hits = 0
+        secs = 0.0
+        for query_id in query_ids:
+            query = unit_vectors[query_id]
+            exact = set(np.argsort(-(unit_vectors @ query))[:topn])
+            start_time = time.time()
+            (ids, _similarities) = self.search(query, topn, nprobe=nprobe)
+            secs += time.time() - start_time
+            hits += len(exact.intersection(ids))
+        return (hits / (len(query_ids) * topn), 1000 * secs / len(query_ids))
+
+#--------------------------
+# unit_rows
+#----------------
+
+def unit_rows(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms  = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+#--------------------------
+# nearest_centroids
+#----------------
+
+def nearest_centroids(unit_vectors, centroids, batch_rows=4096):
+    cells = np.empty(unit_vectors.shape[0], dtype=int)
+    for start in range(0, unit_vectors.shape[0], batch_rows):
+        cells[start:start + batch_rows] = np.argmax(unit_vectors[start:start + batch_rows] @ centroids.T, axis=1)
+    return cells
+
+# -------------------------------------------- Main -------------------------
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog=os.path.basename(sys.argv[0]),
+                                     formatter_class=argparse.RawTextHelpFormatter,
+                                     description="Build the ANN index of a vectors file, and report recall vs. speed."
+                                     )
+    parser.add_argument('-p', '--nprobe',
+                        type=int,
+                        nargs='+',
+                        help='nprobe values to evaluate; default: 1 2 4 8 16 32',
+                        default=[1, 2, 4, 8, 16, 32]
+                        )
+    parser.add_argument('vectorsfile',
+                        help='KeyedVectors file as saved by word2vec_model_creation.py'
+                        )
+    args = parser.parse_args();
+
+    index = IvfIndex.for_vectors_file(args.vectorsfile)
+    print('cells: %s, vectors: %s' % (index.num_cells, len(index.index2word)))
+    print('nprobe,recall_at_10,ms_per_query')
+    for nprobe in args.nprobe:
+        (recall, ms_per_query) = index.recall(nprobe)
+        print('%s,%.3f,%.3f' % (nprobe, recall, ms_per_query))
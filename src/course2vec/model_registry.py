@@ -0,0 +1,286 @@
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+
+Registry of trained course2vec models in an Sqlite db.
+Each model is recorded with:
+
+    o content hash of its vectors (see ModelRegistry.fingerprint())
+    o hash of the training data
+    o hyperparameters, and the seed
+    o model and vector file paths, creation time
+    o any number of named metrics, such as mean_rank
+      or isomap_reconstruction_error
+
+Usage:
+    registry = ModelRegistry()
+    vectors_file = registry.best_model('mean_rank')['vectors_file']
+'''
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+class ModelRegistry(object):
+    '''
+    Thin layer over two tables:
+
+        Models(model_id, model_hash, training_data_hash, vec_size, win_size,
+               epochs, min_count, seed, hyperparams, model_file, vectors_file, created)
+        ModelMetrics(model_id, metric, value)
+
+    Metrics live in their own, indexed table, so that the
+    best model by any metric is a single indexed query.
+    '''
+
+    DEFAULT_DB_FILE = os.path.join(os.path.dirname(__file__), '../data/Word2vec/model_registry.sqlite')
+
+    # Metrics for which smaller values are better. For
+    # all others, larger is better:
+    LOWER_IS_BETTER = frozenset(['mean_rank', 'median_rank', 'sd_rank', 'isomap_reconstruction_error'])
+
+    #--------------------------
+    # __init__
+    #----------------
+
+    def __init__(self, db_file=None):
+        '''
+        @param db_file: Sqlite file of the registry; created if needed.
+            Default: data/Word2vec/model_registry.sqlite
+        @type db_file: str
+        '''
+        self.db_file = ModelRegistry.DEFAULT_DB_FILE if db_file is None else db_file
+        try:
+            # Grid search workers may register concurrently;
+            # wait for the lock rather than fail:
+            self.conn = sqlite3.connect(self.db_file, timeout=30)
+        except Exception as e:
+            raise ValueError("Could not open model registry '%s' (%s)" % (self.db_file, repr(e)))
+        self.conn.row_factory = sqlite3.Row
+        self.create_tables()
+
+    #--------------------------
+    # create_tables
+    #----------------
+
+    def create_tables(self):
+        with self.conn:
+            self.conn.executescript('''
+                CREATE TABLE IF NOT EXISTS Models (
+                    model_id INTEGER PRIMARY KEY,
+                    model_hash TEXT,
+                    training_data_hash TEXT,
+                    vec_size INTEGER,
+                    win_size INTEGER,
+                    epochs INTEGER,
+                    min_count INTEGER,
+                    seed INTEGER,
+                    hyperparams TEXT,
+                    model_file TEXT,
+                    vectors_file TEXT,
+                    created TEXT
+                    );
+                CREATE TABLE IF NOT EXISTS ModelMetrics (
+                    model_id INTEGER REFERENCES Models(model_id),
+                    metric TEXT,
+                    value REAL,
+                    PRIMARY KEY (model_id, metric)
+                    );
+                CREATE INDEX IF NOT EXISTS ModelHashIdx ON Models(model_hash);
+                CREATE INDEX IF NOT EXISTS ModelConfigIdx ON Models(training_data_hash, vec_size, win_size, epochs);
+                CREATE INDEX IF NOT EXISTS MetricValueIdx ON ModelMetrics(metric, value);
+                ''')
+
+    #--------------------------
+    # register
+    #----------------
+
+    def register(self,
+                 model_file,
+                 model_hash,
+                 training_data_hash,
+                 vec_size,
+                 win_size,
+                 epochs=10,
+                 min_count=2,
+                 seed=1,
+                 vectors_file=None,
+                 hyperparams=None,
+                 metrics=None):
+        '''
+        Record one trained model.
+
+        @param model_file: where the model was saved
+        @type model_file: str
+        @param model_hash: content hash of the model's vectors
+        @type model_hash: str
+        @param training_data_hash: hash of the training sentences; see sentences_hash()
+        @type training_data_hash: str
+        @param vec_size: vector size
+        @type vec_size: int
+        @param win_size: window size
+        @type win_size: int
+        @param epochs: training epochs
+        @type epochs: int
+        @param min_count: minimum course frequency
+        @type min_count: int
+        @param seed: random seed of the training
+        @type seed: int
+        @param vectors_file: where the KeyedVectors were saved; default:
+            model_file with extension .vectors
+        @type vectors_file: str
+        @param hyperparams: any further training parameters
+        @type hyperparams: {str : any}
+        @param metrics: metric name to value
+        @type metrics: {str : float}
+        @return: id of the new registry entry
+        @rtype: int
+        '''
+        if vectors_file is None:
+            vectors_file = os.path.splitext(model_file)[0] + '.vectors'
+        with self.conn:
+            cursor = self.conn.execute('''INSERT INTO Models (model_hash, training_data_hash, vec_size, win_size,
+                                                              epochs, min_count, seed, hyperparams,
+                                                              model_file, vectors_file, created)
+                                          VALUES (?,?,?,?,?,?,?,?,?,?,?)''',
+                                       (model_hash, training_data_hash, vec_size, win_size,
+                                        epochs, min_count, seed, json.dumps(hyperparams or {}),
+                                        os.path.abspath(model_file), os.path.abspath(vectors_file),
+                                        time.strftime("%Y-%m-%d_%H_%M_%S")))
+            model_id = cursor.lastrowid
+        if metrics is not None:
+            self.add_metrics(model_id, metrics)
+        return model_id
+
+    #--------------------------
+    # add_metrics
+    #----------------
+
+    def add_metrics(self, model_id, metrics):
+        '''
+        Add or replace metrics of a registered model.
+
+        @param model_id: registry id of the model
+        @type model_id: int
+        @param metrics: metric name to value
+        @type metrics: {str : float}
+        '''
+        with self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO ModelMetrics (model_id, metric, value) VALUES (?,?,?)',
+                                  [(model_id, metric, float(value)) for metric, value in metrics.items()])
+
+    #--------------------------
+    # find
+    #----------------
+
+    def find(self, training_data_hash, vec_size, win_size, epochs=10):
+        '''
+        Return the entries of models that were trained on the
+        given data with the given configuration. Used to skip
+        training configurations that already exist.
+
+        @return: matching entries, newest first
+        @rtype: [{str : any}]
+        '''
+        rows = self.conn.execute('''SELECT * FROM Models
+                                     WHERE training_data_hash = ? AND vec_size = ? AND win_size = ? AND epochs = ?
+                                     ORDER BY model_id DESC''',
+                                 (training_data_hash, vec_size, win_size, epochs))
+        return [self.entry_with_metrics(row) for row in rows]
+
+    #--------------------------
+    # best_model
+    #----------------
+
+    def best_model(self, metric, training_data_hash=None):
+        '''
+        Return the entry of the best model by the given metric,
+        optionally among models trained on the given data.
+        Whether smaller or larger is better is determined by
+        ModelRegistry.LOWER_IS_BETTER.
+
+        @param metric: name of the metric, such as 'mean_rank'
+        @type metric: str
+        @param training_data_hash: if given, only consider models trained on this data
+        @type training_data_hash: str
+        @return: the model's entry, including its metrics
+        @rtype: {str : any}
+        @raise ValueError: if no model has the metric
+        '''
+        order = 'ASC' if metric in ModelRegistry.LOWER_IS_BETTER else 'DESC'
+        query = '''SELECT Models.* FROM Models JOIN ModelMetrics USING (model_id)
+                    WHERE ModelMetrics.metric = ?'''
+        params = [metric]
+        if training_data_hash is not None:
+            query += ' AND Models.training_data_hash = ?'
+            params.append(training_data_hash)
+        query += ' ORDER BY ModelMetrics.value %s LIMIT 1' % order
+        row = self.conn.execute(query, params).fetchone()
+        if row is None:
+            raise ValueError("No registered model has metric '%s'." % metric)
+        return self.entry_with_metrics(row)
+
+    #--------------------------
+    # entry_with_metrics
+    #----------------
+
+    def entry_with_metrics(self, row):
+        entry = dict(row)
+        entry['hyperparams'] = json.loads(entry['hyperparams'])
+        entry['metrics'] = {metric : value for (metric, value) in
+                            self.conn.execute('SELECT metric, value FROM ModelMetrics WHERE model_id = ?',
+                                              (entry['model_id'],))}
+        return entry
+
+    #--------------------------
+    # sentences_hash
+    #----------------
+
+    @classmethod
+    def sentences_hash(cls, sentences):
+        '''
+        Hash of training sentences, independent of whether
+        they come from a list or a streaming corpus.
+
+        @param sentences: training sentences
+        @type sentences: {[[str]] | CourseSentenceCorpus}
+        @return: hex digest
+        @rtype: str
+        '''
+        digest = hashlib.sha1()
+        for sentence in sentences:
+            digest.update((' '.join(sentence) + '\n').encode('utf-8'))
+        return digest.hexdigest()
+
+    #--------------------------
+    # fingerprint
+    #----------------
+
+    @classmethod
+    def fingerprint(cls, model):
+        '''
+        Content hash of a model's word vectors and vocabulary order.
+        Identical vectors give identical fingerprints, regardless
+        of the file the model came from.
+
+        @param model: trained model, KeyedVectors, or VectorBundle
+        @type model: {gensim.models.Word2Vec | KeyedVectors | VectorBundle}
+        @return: hex digest
+        @rtype: str
+        '''
+        word_vectors = model.wv if hasattr(model, 'wv') else model
+        digest = hashlib.sha1()
+        digest.update(np.ascontiguousarray(word_vectors.vectors).tobytes())
+        digest.update('\n'.join(word_vectors.index2word).encode('utf-8'))
+        return digest.hexdigest()
+
+    #--------------------------
+    # close
+    #----------------
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,224 @@
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+
+Precomputed top-k neighbors of every course/major in a model.
+Most similarity questions are the same 'top-k for course X'
+lookups; with the table they are a row read instead of a
+scan over all vectors.
+
+The table is computed by blocked matrix multiplication over the
+unit length vectors, and stored as two .npy arrays, keyed by
+the model fingerprint (see ModelRegistry.fingerprint()):
+
+    <table_dir>/<fingerprint>_top<k>.ids.npy     int32 neighbor rows
+    <table_dir>/<fingerprint>_top<k>.scores.npy  float32 cosine similarities
+
+Row i holds the neighbors of index2word[i], most similar first;
+a course is not its own neighbor.
+
+Batch job usage:
+    neighbor_table.py [-k 50] <vectors or model file> [...]
+'''
+import argparse
+import glob
+import os
+import sys
+
+from gensim.models import KeyedVectors
+from gensim.models import Word2Vec
+
+import numpy as np
+
+from course2vec.model_registry import ModelRegistry
+from course2vec.vector_bundle import VectorBundle, bundle_is_current
+
+
+class NeighborTable(object):
+    '''
+    Memory-mapped top-k neighbor ids and scores of one model.
+    '''
+
+    DEFAULT_TABLE_DIR = os.path.join(os.path.dirname(__file__), '../data/Word2vec/neighbor_tables')
+
+    # Rows of the vectors multiplied with all vectors at a time:
+    BLOCK_ROWS = 1024
+
+    #--------------------------
+    # __init__
+    #----------------
+
+    def __init__(self, neighbor_ids, scores, index2word):
+        '''
+        Use compute(), load(), or for_vectors() rather than
+        this constructor.
+
+        @param neighbor_ids: row i holds the rows of index2word[i]'s neighbors
+        @type neighbor_ids: np.ndarray
+        @param scores: cosine similarities that go with neighbor_ids
+        @type scores: np.ndarray
+        @param index2word: names in row order
+        @type index2word: [str]
+        '''
+        self.neighbor_ids = neighbor_ids
+        self.scores       = scores
+        self.index2word   = index2word
+        self.vocab        = {word : i for i, word in enumerate(index2word)}
+        self.k            = neighbor_ids.shape[1]
+
+    #--------------------------
+    # compute
+    #----------------
+
+    @classmethod
+    def compute(cls, vectors, index2word, k=50, block_rows=None):
+        '''
+        Top-k neighbors of every vector by cosine similarity.
+
+        @param vectors: one vector per row
+        @type vectors: np.ndarray
+        @param index2word: name of each row
+        @type index2word: [str]
+        @param k: number of neighbors per row
+        @type k: int
+        @param block_rows: rows multiplied at a time; bounds memory to
+            block_rows * number of vectors similarities
+        @type block_rows: int
+        @rtype: NeighborTable
+        '''
+        block_rows = NeighborTable.BLOCK_ROWS if block_rows is None else block_rows
+        unit_vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(unit_vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        unit_vectors = unit_vectors / norms
+
+        num_vectors = unit_vectors.shape[0]
+        k = min(k, num_vectors - 1)
+        if k < 1:
+            raise ValueError("Need at least two vectors to compute neighbors.")
+        neighbor_ids = np.empty((num_vectors, k), dtype=np.int32)
+        scores       = np.empty((num_vectors, k), dtype=np.float32)
+        for start in range(0, num_vectors, block_rows):
+            end = min(start + block_rows, num_vectors)
+            similarities = unit_vectors[start:end] @ unit_vectors.T
+            # No course is its own neighbor:
+            similarities[np.arange(end - start), np.arange(start, end)] = -np.inf
+            best = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+            best_sims = np.take_along_axis(similarities, best, axis=1)
+            order = np.argsort(-best_sims, axis=1)
+            neighbor_ids[start:end] = np.take_along_axis(best, order, axis=1)
+            scores[start:end]       = np.take_along_axis(best_sims, order, axis=1)
+        return NeighborTable(neighbor_ids, scores, list(index2word))
+
+    #--------------------------
+    # table_files
+    #----------------
+
+    @classmethod
+    def table_files(cls, fingerprint, k, table_dir=None):
+        table_dir = NeighborTable.DEFAULT_TABLE_DIR if table_dir is None else table_dir
+        file_root = os.path.join(table_dir, '%s_top%s' % (fingerprint, k))
+        return (file_root + '.ids.npy', file_root + '.scores.npy')
+
+    #--------------------------
+    # save
+    #----------------
+
+    def save(self, fingerprint, table_dir=None):
+        (ids_file, scores_file) = NeighborTable.table_files(fingerprint, self.k, table_dir)
+        os.makedirs(os.path.dirname(ids_file), exist_ok=True)
+        np.save(ids_file, self.neighbor_ids)
+        np.save(scores_file, self.scores)
+        return (ids_file, scores_file)
+
+    #--------------------------
+    # for_vectors
+    #----------------
+
+    @classmethod
+    def for_vectors(cls, word_vectors, table_dir=None, min_k=10):
+        '''
+        Return the table of the given vectors with the largest
+        k, or None if no table with at least min_k neighbors has
+        been computed for them.
+
+        @param word_vectors: model, KeyedVectors, or VectorBundle
+        @type word_vectors: {Word2Vec | KeyedVectors | VectorBundle}
+        @param table_dir: directory of the tables
+        @type table_dir: str
+        @param min_k: smallest acceptable number of neighbors per row
+        @type min_k: int
+        @rtype: {NeighborTable | None}
+        '''
+        word_vectors = word_vectors.wv if hasattr(word_vectors, 'wv') else word_vectors
+        table_dir = NeighborTable.DEFAULT_TABLE_DIR if table_dir is None else table_dir
+        fingerprint = ModelRegistry.fingerprint(word_vectors)
+        available_ks = []
+        for ids_file in glob.glob(os.path.join(table_dir, '%s_top*.ids.npy' % fingerprint)):
+            k_str = os.path.basename(ids_file)[len(fingerprint) + len('_top'):-len('.ids.npy')]
+            if k_str.isdigit() and int(k_str) >= min_k:
+                available_ks.append(int(k_str))
+        if len(available_ks) == 0:
+            return None
+        (ids_file, scores_file) = NeighborTable.table_files(fingerprint, max(available_ks), table_dir)
+        return NeighborTable(np.load(ids_file, mmap_mode='r'),
+                             np.load(scores_file, mmap_mode='r'),
+                             list(word_vectors.index2word))
+
+    #--------------------------
+    # similar_by_word
+    #----------------
+
+    def similar_by_word(self, word, topn=10):
+        '''
+        Same result as KeyedVectors.similar_by_word(), up to ties.
+
+        @param word: course or major
+        @type word: str
+        @param topn: number of neighbors; at most self.k
+        @type topn: int
+        @return: (course name, similarity) tuples, most similar first
+        @rtype: [(str, float)]
+        @raise KeyError: if word is not in the vocabulary
+        @raise ValueError: if topn exceeds the number of precomputed neighbors
+        '''
+        if topn > self.k:
+            raise ValueError("Table holds %s neighbors per course; %s requested." % (self.k, topn))
+        row = self.vocab[word]
+        return [(self.index2word[neighbor_id], float(score))
+                for neighbor_id, score in zip(self.neighbor_ids[row, :topn], self.scores[row, :topn])]
+
+# -------------------------------------------- Main -------------------------
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog=os.path.basename(sys.argv[0]),
+                                     formatter_class=argparse.RawTextHelpFormatter,
+                                     description="Precompute top-k neighbor tables of course vector models."
+                                     )
+    parser.add_argument('-k', '--topk',
+                        type=int,
+                        help='neighbors per course; default: 50',
+                        default=50
+                        )
+    parser.add_argument('-d', '--tabledir',
+                        help='where to store the tables; default: data/Word2vec/neighbor_tables',
+                        default=None
+                        )
+    parser.add_argument('files',
+                        nargs='+',
+                        help='.model or .vectors files'
+                        )
+    args = parser.parse_args();
+
+    for model_or_vectors_file in args.files:
+        if bundle_is_current(model_or_vectors_file):
+            word_vectors = VectorBundle.load(model_or_vectors_file)
+        elif model_or_vectors_file.endswith('.model'):
+            word_vectors = Word2Vec.load(model_or_vectors_file).wv
+        else:
+            word_vectors = KeyedVectors.load(model_or_vectors_file, mmap='r')
+        table = NeighborTable.compute(word_vectors.vectors, word_vectors.index2word, k=args.topk)
+        (ids_file, _scores_file) = table.save(ModelRegistry.fingerprint(word_vectors), args.tabledir)
+        print("%s: top-%s neighbors of %s courses in %s" % (model_or_vectors_file, table.k,
+                                                            len(table.index2word), ids_file))
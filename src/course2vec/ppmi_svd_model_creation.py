@@ -0,0 +1,347 @@
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+
+Course vectors without neural training: an alternative to
+Word2VecModelCreator that is deterministic, and much faster.
+
+   1. One streaming pass over the training sentences counts how
+      often each pair of courses is taken together, either by the
+      same student (window=None), or within window positions of
+      each other in a student's sentence. Chunks of sentences are
+      counted in parallel worker processes, and the sparse counts
+      are summed.
+   2. Counts are turned into positive pointwise mutual information
+      (PPMI), with the context distribution smoothing that makes
+      PPMI behave like skip-gram with negative sampling.
+   3. A truncated randomized SVD of the PPMI matrix, with a fixed
+      seed, gives the course vectors.
+
+The result is a KeyedVectors instance, saved like the vectors of
+Word2VecModelCreator (.vectors file plus vector bundle), so all
+downstream tools can use it unchanged.
+
+Usage:
+    creator = PpmiSvdModelCreator(vec_size=150, window=None, num_workers=8)
+    wv = creator.create_vectors(CourseSentenceCorpus('enrollment_tally.sqlite'))
+    creator.save('/tmp/ppmi_svd.vectors')
+'''
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+
+from gensim.models import KeyedVectors
+from scipy import sparse
+from sklearn.utils.extmath import randomized_svd
+
+import numpy as np
+
+from course2vec.sentence_corpus import CourseSentenceCorpus
+from course2vec.vector_bundle import export_vector_bundle
+
+
+class PpmiSvdModelCreator(object):
+    '''
+    Builds course vectors from the co-enrollment PPMI matrix.
+    '''
+
+    # Sentences per chunk handed to a counting worker:
+    CHUNK_SENTENCES = 20000
+
+    #--------------------------
+    # __init__
+    #----------------
+
+    def __init__(self,
+                 vec_size=150,
+                 window=None,
+                 min_count=2,
+                 context_smoothing=0.75,
+                 eigen_weight=0.5,
+                 num_workers=1,
+                 seed=1):
+        '''
+        @param vec_size: dimensionality of the course vectors
+        @type vec_size: int
+        @param window: courses at most this many positions apart in a sentence
+            count as co-enrolled. None: all courses of a student.
+        @type window: {int | None}
+        @param min_count: courses that occur fewer times are dropped, as in Word2Vec
+        @type min_count: int
+        @param context_smoothing: exponent applied to context counts in PMI
+        @type context_smoothing: float
+        @param eigen_weight: vectors are U * S^eigen_weight of the SVD
+        @type eigen_weight: float
+        @param num_workers: processes that count chunks of sentences
+        @type num_workers: int
+        @param seed: random seed of the randomized SVD
+        @type seed: int
+        '''
+        logging.basicConfig(format='%(asctime)s : %(levelname)s : %(message)s', level=logging.INFO)
+        self.vec_size = vec_size
+        self.window   = window
+        self.min_count = min_count
+        self.context_smoothing = context_smoothing
+        self.eigen_weight = eigen_weight
+        self.num_workers  = num_workers
+        self.seed = seed
+        self.wv   = None
+
+    #--------------------------
+    # create_vectors
+    #----------------
+
+    def create_vectors(self, sentences):
+        '''
+        Count, weigh, and factor. Also sets self.wv.
+
+        @param sentences: training sentences, such as a CourseSentenceCorpus
+        @type sentences: {[[str]] | CourseSentenceCorpus}
+        @return: the course vectors
+        @rtype: KeyedVectors
+        '''
+        self.logInfo("Counting co-enrollments...")
+        (index2word, word_counts, cooccurrences) = self.count_cooccurrences(sentences)
+        self.logInfo("Done counting co-enrollments of %s courses (%s non-zero pairs)." %\
+                     (len(index2word), cooccurrences.nnz))
+
+        # Drop rare courses, as Word2Vec does with min_count:
+        keep = np.where(word_counts >= self.min_count)[0]
+        # Most frequent first, as in gensim's index2word:
+        keep = keep[np.argsort(-word_counts[keep], kind='stable')]
+        index2word    = [index2word[i] for i in keep]
+        cooccurrences = cooccurrences[keep][:, keep]
+
+        self.logInfo("Computing PPMI and SVD...")
+        ppmi = self.ppmi(cooccurrences)
+        vec_size = min(self.vec_size, min(ppmi.shape) - 1)
+        (u, s, _vt) = randomized_svd(ppmi, n_components=vec_size, random_state=self.seed)
+        vectors = (u * s ** self.eigen_weight).astype(np.float32)
+        self.logInfo("Done computing PPMI and SVD.")
+
+        self.wv = KeyedVectors(vec_size)
+        self.wv.add(index2word, vectors)
+        return self.wv
+
+    #--------------------------
+    # count_cooccurrences
+    #----------------
+
+    def count_cooccurrences(self, sentences):
+        '''
+        One pass over the sentences. Chunks are counted by
+        worker processes if num_workers > 1.
+
+        @return: vocabulary in first-seen order, the number of occurrences
+            of each course, and the symmetric sparse co-occurrence counts
+        @rtype: ([str], np.ndarray, scipy.sparse.csr_matrix)
+        '''
+        word_idx    = {}
+        index2word  = []
+        word_counts = []
+        cooccurrences = None
+
+        if self.num_workers > 1:
+            pool = multiprocessing.get_context('spawn').Pool(self.num_workers)
+            chunk_counts = pool.imap(count_chunk,
+                                     ((chunk, self.window) for chunk in sentence_chunks(sentences)))
+        else:
+            pool = None
+            chunk_counts = (count_chunk((chunk, self.window)) for chunk in sentence_chunks(sentences))
+        try:
+            for (chunk_words, chunk_word_counts, chunk_cooccurrences) in chunk_counts:
+                # Map the chunk's own vocabulary into the global one:
+                chunk_to_global = np.empty(len(chunk_words), dtype=int)
+                for i, word in enumerate(chunk_words):
+                    try:
+                        chunk_to_global[i] = word_idx[word]
+                    except KeyError:
+                        word_idx[word] = chunk_to_global[i] = len(index2word)
+                        index2word.append(word)
+                        word_counts.append(0)
+                for i, count in zip(chunk_to_global, chunk_word_counts):
+                    word_counts[i] += count
+                chunk_cooccurrences = chunk_cooccurrences.tocoo()
+                chunk_matrix = sparse.csr_matrix((chunk_cooccurrences.data,
+                                                  (chunk_to_global[chunk_cooccurrences.row],
+                                                   chunk_to_global[chunk_cooccurrences.col])),
+                                                 shape=(len(index2word), len(index2word)))
+                if cooccurrences is None:
+                    cooccurrences = chunk_matrix
+                else:
+                    cooccurrences.resize((len(index2word), len(index2word)))
+                    cooccurrences = cooccurrences + chunk_matrix
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        if cooccurrences is None:
+            raise ValueError("No sentences to count.")
+        return (index2word, np.array(word_counts), cooccurrences.tocsr())
+
+    #--------------------------
+    # ppmi
+    #----------------
+
+    def ppmi(self, cooccurrences):
+        '''
+        Positive PMI of a co-occurrence count matrix:
+
+            max(0, log(c(w,c) * sum(c^a) / (c(w) * c(c)^a)))
+
+        where a is the context smoothing exponent.
+
+        @param cooccurrences: symmetric count matrix
+        @type cooccurrences: scipy.sparse.csr_matrix
+        @rtype: scipy.sparse.csr_matrix
+        '''
+        cooccurrences = sparse.csr_matrix(cooccurrences, dtype=np.float64)
+        word_sums    = np.asarray(cooccurrences.sum(axis=1)).ravel()
+        context_sums = np.asarray(cooccurrences.sum(axis=0)).ravel() ** self.context_smoothing
+        total = context_sums.sum()
+
+        coo = cooccurrences.tocoo()
+        pmi = np.log(coo.data * total / (word_sums[coo.row] * context_sums[coo.col]))
+        positive = pmi > 0
+        return sparse.csr_matrix((pmi[positive].astype(np.float32),
+                                  (coo.row[positive], coo.col[positive])),
+                                 shape=cooccurrences.shape)
+
+    #--------------------------
+    # save
+    #----------------
+
+    def save(self, vectors_file):
+        '''
+        Save the vectors as KeyedVectors, plus their vector bundle.
+
+        @param vectors_file: destination, such as /tmp/ppmi_svd.vectors
+        @type vectors_file: str
+        '''
+        if self.wv is None:
+            raise ValueError("No vectors to save; call create_vectors() first.")
+        self.wv.save(vectors_file)
+        export_vector_bundle(self.wv, vectors_file)
+        self.logInfo("Vectors saved in %s" % vectors_file)
+
+    #--------------------------
+    # logInfo
+    #----------------
+
+    def logInfo(self, msg):
+        logging.info(msg)
+
+#--------------------------
+# sentence_chunks
+#----------------
+
+def sentence_chunks(sentences, chunk_sentences=None):
+    chunk_sentences = PpmiSvdModelCreator.CHUNK_SENTENCES if chunk_sentences is None else chunk_sentences
+    chunk = []
+    for sentence in sentences:
+        chunk.append(list(sentence))
+        if len(chunk) >= chunk_sentences:
+            yield chunk
+            chunk = []
+    if len(chunk) > 0:
+        yield chunk
+
+#--------------------------
+# count_chunk
+#----------------
+
+def count_chunk(chunk_and_window):
+    '''
+    Co-occurrence counts of one chunk of sentences, with
+    the chunk's own vocabulary. Runs in worker processes.
+
+    @param chunk_and_window: sentences, and the window (None: whole sentence)
+    @type chunk_and_window: ([[str]], {int | None})
+    @return: chunk vocabulary, occurrences of each of its words,
+        and symmetric co-occurrence counts
+    @rtype: ([str], np.ndarray, scipy.sparse.csr_matrix)
+    '''
+    (chunk, window) = chunk_and_window
+    word_idx = {}
+    rows = []
+    cols = []
+    for sentence in chunk:
+        ids = np.array([word_idx.setdefault(word, len(word_idx)) for word in sentence], dtype=int)
+        num_ids = len(ids)
+        if num_ids < 2:
+            continue
+        if window is None or window >= num_ids - 1:
+            # All ordered pairs of different positions:
+            (left, right) = np.nonzero(~np.eye(num_ids, dtype=bool))
+            rows.append(ids[left])
+            cols.append(ids[right])
+        else:
+            for offset in range(1, window + 1):
+                rows.append(ids[:-offset])
+                cols.append(ids[offset:])
+                rows.append(ids[offset:])
+                cols.append(ids[:-offset])
+    index2word = [None] * len(word_idx)
+    for word, idx in word_idx.items():
+        index2word[idx] = word
+    word_counts = np.zeros(len(word_idx), dtype=np.int64)
+    for sentence in chunk:
+        for word in sentence:
+            word_counts[word_idx[word]] += 1
+    if len(rows) == 0:
+        return (index2word, word_counts, sparse.csr_matrix((len(word_idx), len(word_idx))))
+    rows = np.concatenate(rows)
+    cols = np.concatenate(cols)
+    # Duplicate entries are summed by the conversion:
+    cooccurrences = sparse.coo_matrix((np.ones(len(rows), dtype=np.float64), (rows, cols)),
+                                      shape=(len(word_idx), len(word_idx))).tocsr()
+    return (index2word, word_counts, cooccurrences)
+
+# -------------------------------------------- Main -------------------------
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog=os.path.basename(sys.argv[0]),
+                                     formatter_class=argparse.RawTextHelpFormatter,
+                                     description="Create course vectors from PPMI-weighted co-enrollments and SVD."
+                                     )
+    parser.add_argument('-v', '--vecsize',
+                        type=int,
+                        help='vector size; default: 150',
+                        default=150
+                        )
+    parser.add_argument('-w', '--window',
+                        type=int,
+                        help='co-enrollment window within sentences; default: all courses of a student',
+                        default=None
+                        )
+    parser.add_argument('-m', '--min_count',
+                        type=int,
+                        help='drop courses with fewer occurrences; default: 2',
+                        default=2
+                        )
+    parser.add_argument('--workers',
+                        type=int,
+                        help='counting processes; default: 1',
+                        default=1
+                        )
+    parser.add_argument('--separator',
+                        help="course separator in sentence files; use ' ' for LineSentence files. Default: ','",
+                        default=','
+                        )
+    parser.add_argument('sentencesfile',
+                        help='enrollment .sqlite db, or sentences file as written by create_sentences_file'
+                        )
+    parser.add_argument('savefile',
+                        help='destination .vectors file'
+                        )
+    args = parser.parse_args();
+
+    creator = PpmiSvdModelCreator(vec_size=args.vecsize,
+                                  window=args.window,
+                                  min_count=args.min_count,
+                                  num_workers=args.workers)
+    creator.create_vectors(CourseSentenceCorpus(args.sentencesfile, separator=args.separator))
+    creator.save(args.savefile)
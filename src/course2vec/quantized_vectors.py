@@ -0,0 +1,348 @@
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+
+Compressed course vectors for similarity search:
+
+   o Int8Vectors: scalar quantization. Each dimension of the
+                  unit length vectors is scaled into [-127, 127].
+                  4x smaller than float32.
+   o PqVectors:   product quantization. The dimensions are split
+                  into num_subspaces groups; each group of a vector
+                  is replaced by the one byte id of the nearest of
+                  256 k-means centroids of that group. A 150 dimensional
+                  vector with 15 subspaces takes 15 bytes instead of 600.
+
+Both compare an uncompressed query against the compressed
+vectors (asymmetric distance computation), so only the stored
+side loses precision. Both provide the read-only part of the
+KeyedVectors interface: vocab, index2word, vector_size, [],
+in, most_similar(), and similar_by_word(). Similarities are
+cosine similarities of the unit length vectors, approximated.
+
+An encoding is saved as three files next to a given file root:
+
+    <root>.codes.npy     the codes; memory-mapped on load
+    <root>.params.npz    scales, or subspace bounds and codebooks
+    <root>.quant.json    encoding type, and names in row order
+
+See experiments/quantization_benchmark.py for memory savings
+and recall.
+
+Usage:
+    Int8Vectors(wv.vectors, wv.index2word).save('/tmp/my_model')
+    vectors = QuantizedVectors.load('/tmp/my_model')
+    vectors.most_similar('CS106A', topn=10)
+'''
+import json
+
+import numpy as np
+
+
+class QuantizedVectors(object):
+    '''
+    Vocabulary handling, saving and loading, and the KeyedVectors
+    style queries for the subclasses. Subclasses implement decode(),
+    similarities(), nbytes(), and params()/set_params() for
+    the arrays other than the codes.
+    '''
+
+    def __init__(self, index2word):
+        self.index2word = list(index2word)
+        self.vocab = {word : i for i, word in enumerate(self.index2word)}
+
+    @property
+    def wv(self):
+        return self
+
+    def __len__(self):
+        return len(self.index2word)
+
+    def __contains__(self, word):
+        return word in self.vocab
+
+    def __getitem__(self, word):
+        try:
+            return self.decode(np.array([self.vocab[word]]))[0]
+        except KeyError:
+            raise KeyError("Course '%s' not in vocabulary" % word)
+
+    #--------------------------
+    # most_similar
+    #----------------
+
+    def most_similar(self, positive=None, negative=None, topn=10):
+        '''
+        Like KeyedVectors.most_similar(). The query is built from
+        the decoded vectors of the given words; the query words
+        are excluded from the result.
+
+        @param positive: course name(s) that contribute positively
+        @type positive: {str | [str]}
+        @param negative: course name(s) that contribute negatively
+        @type negative: {str | [str]}
+        @param topn: number of results
+        @type topn: int
+        @return: (course name, approximate similarity) tuples, most similar first
+        @rtype: [(str, float)]
+        '''
+        if isinstance(positive, str):
+            positive = [positive]
+        if isinstance(negative, str):
+            negative = [negative]
+        positive = positive or []
+        negative = negative or []
+        if len(positive) + len(negative) == 0:
+            raise ValueError("Cannot compute similarity with no input.")
+        query = np.zeros(self.vector_size, dtype=np.float32)
+        for word in positive:
+            query += unit_rows(self[word][np.newaxis, :])[0]
+        for word in negative:
+            query -= unit_rows(self[word][np.newaxis, :])[0]
+        query_idxs = set(self.vocab[word] for word in positive + negative)
+        (ids, similarities) = self.search(query, topn + len(query_idxs))
+        return [(self.index2word[idx], float(similarity))
+                for idx, similarity in zip(ids, similarities) if idx not in query_idxs][:topn]
+
+    def similar_by_word(self, word, topn=10):
+        return self.most_similar(positive=[word], topn=topn)
+
+    #--------------------------
+    # save
+    #----------------
+
+    def save(self, file_root):
+        '''
+        Save the encoding; see the module docstring for the files.
+
+        @param file_root: path without extension, such as /tmp/my_model
+        @type file_root: str
+        @return: names of the files written
+        @rtype: (str, str, str)
+        '''
+        (codes_file, params_file, info_file) = quantized_files(file_root)
+        np.save(codes_file, np.asarray(self.codes))
+        np.savez(params_file, **self.params())
+        with open(info_file, 'w') as info_fd:
+            json.dump({'encoding' : type(self).__name__,
+                       'vector_size' : self.vector_size,
+                       'index2word' : self.index2word
+                       },
+                      info_fd)
+        return (codes_file, params_file, info_file)
+
+    #--------------------------
+    # load
+    #----------------
+
+    @classmethod
+    def load(cls, file_root):
+        '''
+        Load an encoding written by save(). The codes are
+        memory-mapped.
+
+        @param file_root: path passed to save()
+        @type file_root: str
+        @return: Int8Vectors or PqVectors instance
+        @rtype: QuantizedVectors
+        '''
+        (codes_file, params_file, info_file) = quantized_files(file_root)
+        try:
+            with open(info_file, 'r') as info_fd:
+                info = json.load(info_fd)
+            encoding_cls = {subclass.__name__ : subclass for subclass in QuantizedVectors.__subclasses__()}[info['encoding']]
+            codes = np.load(codes_file, mmap_mode='r')
+            with np.load(params_file) as params:
+                params = dict(params)
+        except Exception as e:
+            raise ValueError("Could not load quantized vectors '%s' (%s)" % (file_root, repr(e)))
+        encoding = encoding_cls.__new__(encoding_cls)
+        QuantizedVectors.__init__(encoding, info['index2word'])
+        encoding.vector_size = info['vector_size']
+        encoding.codes = codes
+        encoding.set_params(params)
+        return encoding
+
+    #--------------------------
+    # search
+    #----------------
+
+    def search(self, query, topn):
+        '''
+        @return: rows and approximate similarities of the topn
+            vectors most similar to query, most similar first
+        @rtype: (np.ndarray, np.ndarray)
+        '''
+        query = np.asarray(query, dtype=np.float32)
+        query = query / max(np.linalg.norm(query), 1e-12)
+        similarities = self.similarities(query)
+        topn = min(topn, len(similarities))
+        best = np.argpartition(-similarities, topn - 1)[:topn]
+        best = best[np.argsort(-similarities[best])]
+        return (best, similarities[best])
+
+class Int8Vectors(QuantizedVectors):
+    '''
+    Scalar quantized unit length vectors with one
+    scale factor per dimension.
+    '''
+
+    # Codes converted to float32 at a time by similarities(),
+    # so a query never copies the whole matrix:
+    BLOCK_ROWS = 16384
+
+    def __init__(self, vectors, index2word):
+        '''
+        @param vectors: float vectors, one per row; need not be normalized
+        @type vectors: np.ndarray
+        @param index2word: name of each row
+        @type index2word: [str]
+        '''
+        super().__init__(index2word)
+        unit_vectors = unit_rows(vectors)
+        max_abs = np.abs(unit_vectors).max(axis=0)
+        max_abs[max_abs == 0] = 1.0
+        self.scales = (max_abs / 127.0).astype(np.float32)
+        self.codes  = np.round(unit_vectors / self.scales).astype(np.int8)
+        self.vector_size = unit_vectors.shape[1]
+
+    def decode(self, rows):
+        return self.codes[rows].astype(np.float32) * self.scales
+
+    def similarities(self, query):
+        # Fold the scales into the query, rather than
+        # decoding all vectors:
+        scaled_query = (query * self.scales).astype(np.float32)
+        similarities = np.empty(self.codes.shape[0], dtype=np.float32)
+        for start in range(0, self.codes.shape[0], Int8Vectors.BLOCK_ROWS):
+            block = self.codes[start:start + Int8Vectors.BLOCK_ROWS]
+            similarities[start:start + len(block)] = block.astype(np.float32) @ scaled_query
+        return similarities
+
+    def nbytes(self):
+        return self.codes.nbytes + self.scales.nbytes
+
+    def params(self):
+        return {'scales' : self.scales}
+
+    def set_params(self, params):
+        self.scales = params['scales']
+
+class PqVectors(QuantizedVectors):
+    '''
+    Product quantized unit length vectors with 256
+    centroids per subspace, i.e. one byte per subspace.
+    '''
+
+    NUM_CENTROIDS = 256
+
+    def __init__(self, vectors, index2word, num_subspaces=None, iterations=15, seed=1):
+        '''
+        @param vectors: float vectors, one per row; need not be normalized
+        @type vectors: np.ndarray
+        @param index2word: name of each row
+        @type index2word: [str]
+        @param num_subspaces: number of dimension groups, i.e. bytes per
+            vector. Default: one per 10 dimensions.
+        @type num_subspaces: int
+        @param iterations: k-means iterations per subspace
+        @type iterations: int
+        @param seed: random seed of the centroid initialization
+        @type seed: int
+        '''
+        super().__init__(index2word)
+        unit_vectors = unit_rows(vectors)
+        (num_vectors, self.vector_size) = unit_vectors.shape
+        if num_subspaces is None:
+            num_subspaces = max(1, self.vector_size // 10)
+        if num_subspaces > self.vector_size:
+            raise ValueError("Cannot split %s dimensions into %s subspaces." % (self.vector_size, num_subspaces))
+        # Subspace boundaries; the first subspaces take
+        # one extra dimension if the split is uneven:
+        self.bounds = np.linspace(0, self.vector_size, num_subspaces + 1).astype(int)
+        num_centroids = min(PqVectors.NUM_CENTROIDS, num_vectors)
+
+        rng = np.random.RandomState(seed)
+        self.codebooks = []
+        self.codes = np.empty((num_vectors, num_subspaces), dtype=np.uint8)
+        for subspace in range(num_subspaces):
+            sub_vectors = unit_vectors[:, self.bounds[subspace]:self.bounds[subspace + 1]]
+            (codebook, assignments) = kmeans(sub_vectors, num_centroids, iterations, rng)
+            self.codebooks.append(codebook)
+            self.codes[:, subspace] = assignments
+
+    def decode(self, rows):
+        return np.hstack([codebook[self.codes[rows, subspace]]
+                          for subspace, codebook in enumerate(self.codebooks)])
+
+    def similarities(self, query):
+        # Asymmetric distance computation: dot products of the
+        # query's subvectors with all centroids, then one
+        # table lookup per subspace and vector:
+        similarities = np.zeros(self.codes.shape[0], dtype=np.float32)
+        for subspace, codebook in enumerate(self.codebooks):
+            lookup = codebook @ query[self.bounds[subspace]:self.bounds[subspace + 1]]
+            similarities += lookup[self.codes[:, subspace]]
+        return similarities
+
+    def nbytes(self):
+        return self.codes.nbytes + sum(codebook.nbytes for codebook in self.codebooks)
+
+    def params(self):
+        params = {'codebook%s' % subspace : codebook for subspace, codebook in enumerate(self.codebooks)}
+        params['bounds'] = self.bounds
+        return params
+
+    def set_params(self, params):
+        self.bounds = params['bounds']
+        self.codebooks = [params['codebook%s' % subspace] for subspace in range(len(self.bounds) - 1)]
+
+#--------------------------
+# quantized_files
+#----------------
+
+def quantized_files(file_root):
+    return (file_root + '.codes.npy', file_root + '.params.npz', file_root + '.quant.json')
+
+#--------------------------
+# unit_rows
+#----------------
+
+def unit_rows(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms  = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+#--------------------------
+# kmeans
+#----------------
+
+def kmeans(points, num_centroids, iterations, rng):
+    '''
+    Plain Euclidean k-means.
+
+    @return: centroids, and the centroid index of each point
+    @rtype: (np.ndarray, np.ndarray)
+    '''
+    centroids = points[rng.choice(points.shape[0], num_centroids, replace=False)].copy()
+    for _i in range(iterations):
+        assignments = nearest(points, centroids)
+        sums   = np.zeros_like(centroids)
+        np.add.at(sums, assignments, points)
+        counts = np.bincount(assignments, minlength=num_centroids)
+        empty  = counts == 0
+        centroids[~empty] = sums[~empty] / counts[~empty, np.newaxis]
+        # Re-seed centroids that lost all their points:
+        centroids[empty] = points[rng.choice(points.shape[0], empty.sum(), replace=False)]
+    return (centroids, nearest(points, centroids))
+
+def nearest(points, centroids, batch_rows=4096):
+    assignments = np.empty(points.shape[0], dtype=int)
+    centroid_norms = (centroids ** 2).sum(axis=1)
+    for start in range(0, points.shape[0], batch_rows):
+        batch = points[start:start + batch_rows]
+        # |p - c|^2 up to the constant |p|^2:
+        assignments[start:start + batch_rows] = np.argmin(centroid_norms - 2 * batch @ centroids.T, axis=1)
+    return assignments
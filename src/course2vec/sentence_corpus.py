@@ -0,0 +1,241 @@
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+
+Re-iterable training sentences that are streamed from their
+source on every pass, rather than being held in memory as a
+list of lists. Word2Vec iterates over its sentences once to
+build the vocabulary, and then once per epoch. Each of those
+passes re-opens the source, so memory use does not depend on
+how many years of enrollments are included.
+'''
+import csv
+from enum import Enum
+import gzip
+import logging
+import sqlite3
+
+
+class CorpusContent(Enum):
+    # Rows of emplid,coursename,major,acad_career,strm; one
+    # sentence per student is assembled from them:
+    ENROLLMENTS = 0
+    # One finished sentence per line:
+    SENTENCES   = 1
+
+class CourseSentenceCorpus(object):
+    '''
+    Sentences of course names from one of:
+
+       o an Sqlite db with table emplid_crs_major_strm_gt10_2000plus
+       o a .csv or .csv.gz file with the same columns, ordered by emplid
+       o a sentences file (.gz allowed), such as the ones written
+         by create_sentences.py, or by the create_sentences_file action
+         of word2vec_model_creation.py
+
+    For enrollments, each sentence is one student's major, followed
+    by the student's courses, as in Word2VecModelCreator.create_course_sentences().
+
+    Instances can be passed anywhere gensim expects a list of sentences.
+    '''
+
+    ENROLLMENT_TABLE = 'emplid_crs_major_strm_gt10_2000plus'
+
+    #--------------------------
+    # __init__
+    #----------------
+
+    def __init__(self,
+                 filename,
+                 content=None,
+                 hasHeader=False,
+                 separator=',',
+                 low_strm=None,
+                 high_strm=None,
+                 acad_careers=None,
+                 changed_since_strm=None):
+        '''
+        @param filename: .sqlite, .csv, or sentence file; any of the files may be gzipped
+        @type filename: str
+        @param content: whether rows are enrollments or finished sentences.
+            Default: ENROLLMENTS for .sqlite files, else SENTENCES.
+        @type content: CorpusContent
+        @param hasHeader: whether a csv or sentence file starts with a column header row
+        @type hasHeader: bool
+        @param separator: separator of course names in sentence files. Use ' '
+            for LineSentence format files.
+        @type separator: str
+        @param low_strm: lower inclusive bound of strm included. Only used with Sqlite.
+        @type low_strm: int
+        @param high_strm: upper exclusive bound of strm included. Only used with Sqlite.
+        @type high_strm: int
+        @param acad_careers: academic careers to include. Only used with Sqlite.
+            Default: include all.
+        @type acad_careers: {None | (str)}
+        @param changed_since_strm: if provided, only students with at least one
+            enrollment in this strm or later are included, with all their
+            enrollments. Used for incremental model updates. Only used with Sqlite.
+        @type changed_since_strm: int
+        '''
+        self.filename     = filename
+        self.is_sqlite    = filename.endswith('.sqlite')
+        if content is None:
+            content = CorpusContent.ENROLLMENTS if self.is_sqlite else CorpusContent.SENTENCES
+        if self.is_sqlite and content != CorpusContent.ENROLLMENTS:
+            raise ValueError("Sqlite db '%s' can only provide enrollments." % filename)
+        self.content      = content
+        self.hasHeader    = hasHeader
+        self.separator    = separator
+        self.low_strm     = low_strm
+        self.high_strm    = high_strm
+        self.acad_careers = acad_careers
+        self.changed_since_strm = changed_since_strm
+        # Computed on first call to __len__():
+        self.num_sentences = None
+
+    #--------------------------
+    # __iter__
+    #----------------
+
+    def __iter__(self):
+        '''
+        Sentences, one per line of a sentences file, or one per
+        student of an enrollment source.
+        
+        @raise ValueError: if the enrollment rows are not ordered
+            by emplid, i.e. a student's rows are not contiguous
+        '''
+        if self.content == CorpusContent.SENTENCES:
+            for row in self.rows():
+                if len(row) > 0:
+                    yield row
+            return
+
+        curr_emplid   = None
+        curr_sentence = None
+        # Safety against unordered emplids: a student whose
+        # group of rows ended must not come back:
+        done_emplids  = set()
+        for emplid, coursename, major, _career, _strm in self.rows():
+            # Depending on how the underlying data was constructed,
+            # undeclares may end up showing as having major '\N':
+            if major == '\\N':
+                major = 'UNDECL'
+            if emplid != curr_emplid:
+                # Starting a new student:
+                if curr_sentence is not None:
+                    done_emplids.add(curr_emplid)
+                    yield curr_sentence
+                if emplid in done_emplids:
+                    raise ValueError("Enrollments in '%s' are not ordered by emplid; student %s occurs in separate groups of rows." %\
+                                     (self.filename, emplid))
+                curr_sentence = [major, coursename]
+                curr_emplid   = emplid
+            else:
+                # More courses for current student:
+                curr_sentence.append(coursename)
+        if curr_sentence is not None:
+            yield curr_sentence
+
+    #--------------------------
+    # __len__
+    #----------------
+
+    def __len__(self):
+        '''
+        Number of sentences. The first call costs a pass
+        over the source. Where possible use the model's
+        corpus_count after build_vocab() instead.
+        '''
+        if self.num_sentences is None:
+            self.num_sentences = sum(1 for _sentence in self)
+        return self.num_sentences
+
+    #--------------------------
+    # rows
+    #----------------
+
+    def rows(self):
+        '''
+        Generator over the raw rows of the source. Opens
+        the source anew, and closes it when exhausted.
+        '''
+        if self.is_sqlite:
+            yield from self.sqlite_rows()
+            return
+        try:
+            if self.filename.endswith('.gz'):
+                fd = gzip.open(self.filename, 'rt')
+            else:
+                fd = open(self.filename, 'r')
+        except Exception as e:
+            raise ValueError("Could not open sentence source '%s' (%s)" % (self.filename, repr(e)))
+        with fd:
+            reader = csv.reader(fd, delimiter=self.separator)
+            if self.hasHeader:
+                next(reader, None)
+            yield from reader
+
+    #--------------------------
+    # sqlite_rows
+    #----------------
+
+    def sqlite_rows(self):
+        try:
+            conn = sqlite3.connect(self.filename)
+        except Exception as e:
+            raise ValueError("Could not open Sqlite3 db '%s' (%s)" % (self.filename, repr(e)))
+        conditions = []
+        if self.low_strm is not None:
+            conditions.append('strm >= %s' % self.low_strm)
+        if self.high_strm is not None:
+            conditions.append('strm < %s' % self.high_strm)
+        if self.acad_careers is not None:
+            conditions.append('acad_career in (%s)' % \
+                ','.join(["'" + acad_career + "'" for acad_career in self.acad_careers]))
+        if self.changed_since_strm is not None:
+            conditions.append('emplid in (SELECT emplid FROM %s WHERE strm >= %s)' % \
+                              (CourseSentenceCorpus.ENROLLMENT_TABLE, self.changed_since_strm))
+        where_clause = '' if len(conditions) == 0 else ' WHERE ' + ' and '.join(conditions)
+        try:
+            cursor = conn.cursor()
+            try:
+                cursor.execute('SELECT * FROM %s%s ORDER BY emplid;' % (CourseSentenceCorpus.ENROLLMENT_TABLE, where_clause))
+            except Exception as e:
+                raise ValueError("Could not query Sqlite3 db '%s' (%s)" % (self.filename, repr(e)))
+            # The cursor fetches rows in batches as we go:
+            yield from cursor
+        finally:
+            conn.close()
+            logging.debug('Closed sentence source %s.' % self.filename)
+
+#--------------------------
+# is_line_sentence_file
+#----------------
+
+def is_line_sentence_file(filename, separator=','):
+    '''
+    Whether a sentences file is in LineSentence format, as
+    written by create_sentences.py: course names separated by
+    spaces, no quotes, and no header. Decided from the first
+    line, the same way Word2VecModelCreator.load_sentences()
+    does for its list result: a single column when split by
+    separator, without quotes.
+
+    @param filename: sentences file; may be gzipped
+    @type filename: str
+    @param separator: separator the file would otherwise use
+    @type separator: str
+    @rtype: bool
+    '''
+    try:
+        if filename.endswith('.gz'):
+            fd = gzip.open(filename, 'rt')
+        else:
+            fd = open(filename, 'r')
+    except Exception as e:
+        raise ValueError("Could not open sentence source '%s' (%s)" % (filename, repr(e)))
+    with fd:
+        first_line = fd.readline().rstrip('\r\n')
+    return len(first_line) > 0 and separator not in first_line and first_line.find('"') == -1
@@ -0,0 +1,305 @@
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+
+One vector per student, computed from the enrollment table
+and the course vectors of a model: the mean, or the TF-IDF
+weighted mean of the unit length vectors of the student's
+courses. Courses that nearly everyone takes thus weigh less
+than a student's distinctive courses.
+
+The store is a directory with:
+
+    student_vectors.npy   float32 (num_students, vector_size), unit length rows
+    emplids.json          emplid of each row, plus build parameters
+
+The matrix is memory-mapped on load, so hundreds of thousands
+of students cost no load time, and processes share the pages.
+
+Usage:
+    StudentEmbeddings.build('enrollment_tally.sqlite', word_vectors, '/tmp/students')
+    students = StudentEmbeddings('/tmp/students')
+    students.similar_students(['$2b$10$...'], topn=10)
+'''
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+from course2vec.aligned_year_store import load_word_vectors
+from course2vec.ann_index import IvfIndex
+from course2vec.sentence_corpus import CourseSentenceCorpus, CorpusContent
+
+
+class StudentEmbeddings(object):
+    '''
+    Read access and similar-student search over a
+    student vector store. Use build() to create one.
+    '''
+
+    VECTORS_FILE = 'student_vectors.npy'
+    EMPLIDS_FILE = 'emplids.json'
+
+    # Query students compared with all students at a time;
+    # bounds memory to QUERY_BATCH_ROWS * number of students
+    # similarities:
+    QUERY_BATCH_ROWS = 64
+
+    #--------------------------
+    # __init__
+    #----------------
+
+    def __init__(self, store_dir, use_ann_index=False, nprobe=None):
+        '''
+        @param store_dir: directory written by build()
+        @type store_dir: str
+        @param use_ann_index: whether to answer queries from an approximate
+            index. It is built on first use, and saved in store_dir.
+        @type use_ann_index: bool
+        @param nprobe: index cells searched per query; see IvfIndex
+        @type nprobe: int
+        '''
+        vectors_file = os.path.join(store_dir, StudentEmbeddings.VECTORS_FILE)
+        try:
+            self.vectors = np.load(vectors_file, mmap_mode='r')
+            with open(os.path.join(store_dir, StudentEmbeddings.EMPLIDS_FILE), 'r') as emplids_fd:
+                store_info = json.load(emplids_fd)
+        except Exception as e:
+            raise ValueError("Could not open student vector store '%s' (%s)" % (store_dir, repr(e)))
+        self.store_dir   = store_dir
+        self.emplids     = store_info['emplids']
+        self.build_parms = store_info['build_parms']
+        self.emplid_idx  = {emplid : i for i, emplid in enumerate(self.emplids)}
+
+        self.ann_index = None
+        if use_ann_index:
+            index_file = IvfIndex.index_file(vectors_file)
+            if os.path.exists(index_file) and os.path.getmtime(index_file) >= os.path.getmtime(vectors_file):
+                self.ann_index = IvfIndex.load(index_file, nprobe=nprobe)
+            else:
+                self.ann_index = IvfIndex.build(self.vectors, self.emplids, nprobe=nprobe)
+                self.ann_index.save(index_file)
+
+    def __len__(self):
+        return len(self.emplids)
+
+    def __getitem__(self, emplid):
+        return self.vectors[self.emplid_idx[emplid]]
+
+    #--------------------------
+    # build
+    #----------------
+
+    @classmethod
+    def build(cls,
+              enrollment_source,
+              word_vectors,
+              store_dir,
+              tfidf=True,
+              low_strm=None,
+              high_strm=None,
+              acad_careers=None):
+        '''
+        Compute and save the vectors of all students in
+        the enrollment source. Two passes over the source:
+        one to count students and course document frequencies,
+        one to compute the vectors. Students none of whose
+        courses are in the model are skipped.
+
+        @param enrollment_source: Sqlite db with the enrollment table; see 
+            CourseSentenceCorpus. Only Sqlite sources deliver the rows ordered
+            by student, and apply the strm and career filters.
+        @type enrollment_source: str
+        @param word_vectors: course vectors
+        @type word_vectors: {KeyedVectors | VectorBundle}
+        @param store_dir: where to write the store; created if needed
+        @type store_dir: str
+        @param tfidf: if True, weigh courses by tf * log(num_students / num_students_with_course);
+            else plain mean
+        @type tfidf: bool
+        @param low_strm: lower inclusive bound of strm included
+        @type low_strm: int
+        @param high_strm: upper exclusive bound of strm included
+        @type high_strm: int
+        @param acad_careers: academic careers to include; default: all
+        @type acad_careers: {None | (str)}
+        @return: the new store
+        @rtype: StudentEmbeddings
+        @raise ValueError: if enrollment_source is not a Sqlite db
+        '''
+        if not enrollment_source.endswith('.sqlite'):
+            raise ValueError("Student vectors need an enrollment .sqlite db; got '%s'." % enrollment_source)
+        corpus = CourseSentenceCorpus(enrollment_source,
+                                      content=CorpusContent.ENROLLMENTS,
+                                      low_strm=low_strm,
+                                      high_strm=high_strm,
+                                      acad_careers=acad_careers)
+        vocab = {word : i for i, word in enumerate(word_vectors.index2word)}
+        unit_vectors = np.asarray(word_vectors.vectors, dtype=np.float32)
+        norms = np.linalg.norm(unit_vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        unit_vectors = unit_vectors / norms
+
+        # Pass 1: students, and per course the number of students who took it:
+        num_students = 0
+        doc_freqs = np.zeros(len(vocab), dtype=np.int64)
+        for _emplid, course_idxs in student_course_idxs(corpus, vocab):
+            num_students += 1
+            doc_freqs[np.unique(course_idxs)] += 1
+        if num_students == 0:
+            raise ValueError("No student in '%s' has a course that is in the model." % enrollment_source)
+        if tfidf:
+            idfs = np.log(num_students / np.maximum(doc_freqs, 1)).astype(np.float32)
+        else:
+            idfs = np.ones(len(vocab), dtype=np.float32)
+
+        # Pass 2: the vectors:
+        os.makedirs(store_dir, exist_ok=True)
+        student_vectors = np.lib.format.open_memmap(os.path.join(store_dir, StudentEmbeddings.VECTORS_FILE),
+                                                    mode='w+',
+                                                    dtype=np.float32,
+                                                    shape=(num_students, unit_vectors.shape[1]))
+        emplids = []
+        for row, (emplid, course_idxs) in enumerate(student_course_idxs(corpus, vocab)):
+            # Repeated courses add up, i.e. the tf part:
+            weights = idfs[course_idxs]
+            if weights.sum() == 0:
+                # Only courses that everyone takes:
+                weights = np.ones(len(course_idxs), dtype=np.float32)
+            student_vector = weights @ unit_vectors[course_idxs]
+            student_vectors[row] = student_vector / max(np.linalg.norm(student_vector), 1e-12)
+            emplids.append(emplid)
+        student_vectors.flush()
+        del student_vectors
+
+        with open(os.path.join(store_dir, StudentEmbeddings.EMPLIDS_FILE), 'w') as emplids_fd:
+            json.dump({'emplids' : emplids,
+                       'build_parms' : {'enrollment_source' : enrollment_source,
+                                        'tfidf' : tfidf,
+                                        'low_strm' : low_strm,
+                                        'high_strm' : high_strm,
+                                        'acad_careers' : acad_careers}
+                       },
+                      emplids_fd)
+        return StudentEmbeddings(store_dir)
+
+    #--------------------------
+    # similar_students
+    #----------------
+
+    def similar_students(self, emplids, topn=10):
+        '''
+        Students whose pathways are most similar to each of
+        the given students, by cosine similarity of their
+        vectors. A student is not their own neighbor.
+
+        @param emplids: one or more students
+        @type emplids: {str | [str]}
+        @param topn: number of similar students per query
+        @type topn: int
+        @return: for each query student, (emplid, similarity) tuples,
+            most similar first
+        @rtype: {str : [(str, float)]}
+        @raise KeyError: if a student is not in the store
+        '''
+        if isinstance(emplids, str):
+            emplids = [emplids]
+        query_rows = np.array([self.emplid_idx[emplid] for emplid in emplids], dtype=int)
+
+        if self.ann_index is not None:
+            result = {}
+            for emplid, query_row in zip(emplids, query_rows):
+                (rows, similarities) = self.ann_index.search(self.vectors[query_row], topn + 1)
+                result[emplid] = [(self.emplids[row], float(similarity))
+                                  for row, similarity in zip(rows, similarities) if row != query_row][:topn]
+            return result
+
+        topn = min(topn, len(self.emplids) - 1)
+        result = {}
+        for start in range(0, len(query_rows), StudentEmbeddings.QUERY_BATCH_ROWS):
+            batch_rows = query_rows[start:start + StudentEmbeddings.QUERY_BATCH_ROWS]
+            similarities = self.vectors[batch_rows] @ self.vectors.T
+            similarities[np.arange(len(batch_rows)), batch_rows] = -np.inf
+            best = np.argpartition(-similarities, topn - 1, axis=1)[:, :topn]
+            best_sims = np.take_along_axis(similarities, best, axis=1)
+            order = np.argsort(-best_sims, axis=1)
+            best = np.take_along_axis(best, order, axis=1)
+            best_sims = np.take_along_axis(best_sims, order, axis=1)
+            for i, emplid in enumerate(emplids[start:start + StudentEmbeddings.QUERY_BATCH_ROWS]):
+                result[emplid] = [(self.emplids[row], float(similarity))
+                                  for row, similarity in zip(best[i], best_sims[i])]
+        return result
+
+#--------------------------
+# student_course_idxs
+#----------------
+
+def student_course_idxs(corpus, vocab):
+    '''
+    Generator of (emplid, course vector rows) for each student
+    in the enrollment corpus with at least one course in vocab.
+    Rows must be ordered by emplid, as CourseSentenceCorpus
+    guarantees for Sqlite sources only.
+    '''
+    curr_emplid = None
+    course_idxs = []
+    for emplid, coursename, _major, _career, _strm in corpus.rows():
+        if emplid != curr_emplid:
+            if len(course_idxs) > 0:
+                yield (curr_emplid, np.array(course_idxs, dtype=int))
+            curr_emplid = emplid
+            course_idxs = []
+        course_idx = vocab.get(coursename, None)
+        if course_idx is not None:
+            course_idxs.append(course_idx)
+    if len(course_idxs) > 0:
+        yield (curr_emplid, np.array(course_idxs, dtype=int))
+
+# -------------------------------------------- Main -------------------------
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog=os.path.basename(sys.argv[0]),
+                                     formatter_class=argparse.RawTextHelpFormatter,
+                                     description="Build a student vector store, or find students with similar pathways."
+                                     )
+    parser.add_argument('-b', '--build',
+                        nargs=2,
+                        metavar=('ENROLLMENTS', 'VECTORS'),
+                        help='build the store from an enrollment .sqlite db and a .model or .vectors file',
+                        default=None
+                        )
+    parser.add_argument('--mean',
+                        action='store_true',
+                        help='with --build: plain mean of course vectors, instead of TF-IDF weighted mean',
+                        default=False
+                        )
+    parser.add_argument('--ann',
+                        action='store_true',
+                        help='answer queries from an approximate nearest neighbor index',
+                        default=False
+                        )
+    parser.add_argument('-k', '--topn',
+                        type=int,
+                        help='similar students per query; default: 10',
+                        default=10
+                        )
+    parser.add_argument('storedir',
+                        help='directory of the store'
+                        )
+    parser.add_argument('emplids',
+                        nargs='*',
+                        help='students for whom to list similar students'
+                        )
+    args = parser.parse_args();
+
+    if args.build is not None:
+        (enrollment_source, vectors_file) = args.build
+        StudentEmbeddings.build(enrollment_source, load_word_vectors(vectors_file), args.storedir, tfidf=not args.mean)
+
+    students = StudentEmbeddings(args.storedir, use_ann_index=args.ann)
+    print('%s students' % len(students))
+    for emplid, neighbors in students.similar_students(args.emplids, topn=args.topn).items():
+        print('%s: %s' % (emplid, ', '.join('%s (%.3f)' % neighbor for neighbor in neighbors)))
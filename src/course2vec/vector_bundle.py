@@ -0,0 +1,299 @@
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+
+Compact, read-only export of course vectors for consumers
+that never train: the Tsne explorer and visualizer, the
+PCA experiments, and the analytics. A bundle is two files
+next to the model:
+
+    <model root>.npy         float32 matrix, one row per course/major
+    <model root>.vocab.json  course/major names in row order, plus counts
+
+Loading a full .model unpickles the training state as well
+(syn1neg, vocab objects, ...), which takes seconds. A bundle
+is memory-mapped instead, so loading takes milliseconds, and
+all processes that open the same bundle share its pages.
+
+A bundle that is older than the model or vectors file it
+belongs to is stale: the model was saved again without 
+re-exporting. Consumers check bundle_is_current(), and
+fall back to the model or vectors file for stale bundles.
+
+Usage:
+    export_vector_bundle(model, '/tmp/my_model.model')
+    vectors = VectorBundle.load('/tmp/my_model.model')
+    vectors['CS106A']
+    vectors.most_similar('CS106A', topn=10)
+
+Bundles for existing models, such as data/best_modelvec250_win15.model:
+
+    python vector_bundle.py ../data/best_modelvec250_win15.model
+'''
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+
+#--------------------------
+# bundle_files
+#----------------
+
+def bundle_files(model_or_vectors_file):
+    '''
+    Names of the matrix and vocabulary files of the bundle
+    that belongs to a .model or .vectors file. A bundle's own
+    .npy file may also be passed.
+
+    @param model_or_vectors_file: path of a model, vectors, or bundle file
+    @type model_or_vectors_file: str
+    @return: matrix file name and vocabulary file name
+    @rtype: (str, str)
+    '''
+    file_root = os.path.splitext(model_or_vectors_file)[0]
+    return (file_root + '.npy', file_root + '.vocab.json')
+
+#--------------------------
+# bundle_exists
+#----------------
+
+def bundle_exists(model_or_vectors_file):
+    (matrix_file, vocab_file) = bundle_files(model_or_vectors_file)
+    return os.path.exists(matrix_file) and os.path.exists(vocab_file)
+
+#--------------------------
+# bundle_is_current
+#----------------
+
+def bundle_is_current(model_or_vectors_file):
+    '''
+    Whether the bundle of a .model or .vectors file exists,
+    and was written no earlier than that file.
+
+    @param model_or_vectors_file: path of a model, vectors, or bundle file
+    @type model_or_vectors_file: str
+    @rtype: bool
+    '''
+    if not bundle_exists(model_or_vectors_file):
+        return False
+    if not os.path.exists(model_or_vectors_file):
+        # Only the bundle is left:
+        return True
+    source_mtime = os.path.getmtime(model_or_vectors_file)
+    return all(os.path.getmtime(bundle_file) >= source_mtime
+               for bundle_file in bundle_files(model_or_vectors_file))
+
+#--------------------------
+# export_vector_bundle
+#----------------
+
+def export_vector_bundle(model_or_wv, model_or_vectors_file):
+    '''
+    Write the bundle of a model or of its KeyedVectors
+    next to the given model or vectors file.
+
+    @param model_or_wv: Word2Vec model, or its wv
+    @type model_or_wv: {Word2Vec | KeyedVectors}
+    @param model_or_vectors_file: file the model or vectors were saved to
+    @type model_or_vectors_file: str
+    @return: matrix file name and vocabulary file name
+    @rtype: (str, str)
+    '''
+    wv = model_or_wv.wv if hasattr(model_or_wv, 'wv') else model_or_wv
+    (matrix_file, vocab_file) = bundle_files(model_or_vectors_file)
+    np.save(matrix_file, np.asarray(wv.vectors, dtype=np.float32))
+    with open(vocab_file, 'w') as vocab_fd:
+        json.dump({'index2word' : list(wv.index2word),
+                   'counts'     : [wv.vocab[word].count for word in wv.index2word]
+                   },
+                  vocab_fd)
+    return (matrix_file, vocab_file)
+
+class VectorBundle(object):
+    '''
+    Memory-mapped course vectors with the read-only part of
+    the KeyedVectors interface that the repo's consumers use:
+    vocab, index2word, vectors, vector_size, [], in, most_similar(),
+    and similar_by_word(). The wv attribute is the instance itself,
+    so a bundle also stands in for a model.
+
+    Instances pickle as their file names, so passing one to a
+    spawned process costs nothing, and the child maps the same
+    pages as the parent.
+    '''
+
+    #--------------------------
+    # load
+    #----------------
+
+    @classmethod
+    def load(cls, model_or_vectors_file):
+        '''
+        @param model_or_vectors_file: .model, .vectors, or .npy file
+            whose bundle is to be loaded
+        @type model_or_vectors_file: str
+        @rtype: VectorBundle
+        @raise ValueError: if there is no bundle for the file
+        '''
+        if not bundle_exists(model_or_vectors_file):
+            raise ValueError("No vector bundle for '%s'; export one with export_vector_bundle()." %\
+                             model_or_vectors_file)
+        return VectorBundle(*bundle_files(model_or_vectors_file))
+
+    #--------------------------
+    # __init__
+    #----------------
+
+    def __init__(self, matrix_file, vocab_file):
+        '''
+        @param matrix_file: .npy file with float32 vectors
+        @type matrix_file: str
+        @param vocab_file: .vocab.json file with the names in row order
+        @type vocab_file: str
+        '''
+        self.matrix_file = matrix_file
+        self.vocab_file  = vocab_file
+        self.vectors = np.load(matrix_file, mmap_mode='r')
+        with open(vocab_file, 'r') as vocab_fd:
+            vocab_info = json.load(vocab_fd)
+        self.index2word = vocab_info['index2word']
+        self.counts     = vocab_info['counts']
+        # Name to row index:
+        self.vocab = {word : i for i, word in enumerate(self.index2word)}
+        if len(self.vocab) != self.vectors.shape[0]:
+            raise ValueError("Bundle '%s' has %s vectors, but %s names." %\
+                             (matrix_file, self.vectors.shape[0], len(self.vocab)))
+        # Unit length vectors, computed on first similarity query:
+        self.vectors_norm = None
+
+    def __getstate__(self):
+        return {'matrix_file' : self.matrix_file, 'vocab_file' : self.vocab_file}
+
+    def __setstate__(self, state):
+        self.__init__(state['matrix_file'], state['vocab_file'])
+
+    @property
+    def wv(self):
+        return self
+
+    @property
+    def vector_size(self):
+        return self.vectors.shape[1]
+
+    def __len__(self):
+        return len(self.index2word)
+
+    def __contains__(self, word):
+        return word in self.vocab
+
+    def __getitem__(self, word):
+        try:
+            return self.vectors[self.vocab[word]]
+        except KeyError:
+            raise KeyError("Course '%s' not in vocabulary" % word)
+
+    def word_vec(self, word, use_norm=False):
+        if use_norm:
+            return self.norm_vectors()[self.vocab[word]]
+        return self[word]
+
+    #--------------------------
+    # norm_vectors
+    #----------------
+
+    def norm_vectors(self):
+        '''
+        Unit length copy of the vectors. Kept in process memory;
+        the mapped vectors themselves are never written.
+        '''
+        if self.vectors_norm is None:
+            vectors = np.array(self.vectors, dtype=np.float32)
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self.vectors_norm = vectors / norms
+        return self.vectors_norm
+
+    #--------------------------
+    # most_similar
+    #----------------
+
+    def most_similar(self, positive=None, negative=None, topn=10):
+        '''
+        Cosine similarity ranking as in KeyedVectors.most_similar().
+        The query words themselves are excluded from the result.
+
+        @param positive: course name(s) that contribute positively
+        @type positive: {str | [str]}
+        @param negative: course name(s) that contribute negatively
+        @type negative: {str | [str]}
+        @param topn: number of results
+        @type topn: int
+        @return: (course name, similarity) tuples, most similar first
+        @rtype: [(str, float)]
+        '''
+        if isinstance(positive, str):
+            positive = [positive]
+        if isinstance(negative, str):
+            negative = [negative]
+        positive = positive or []
+        negative = negative or []
+        if len(positive) + len(negative) == 0:
+            raise ValueError("Cannot compute similarity with no input.")
+        vectors_norm = self.norm_vectors()
+        query = np.zeros(self.vector_size, dtype=np.float32)
+        for word in positive:
+            query += vectors_norm[self.vocab[word]]
+        for word in negative:
+            query -= vectors_norm[self.vocab[word]]
+        query /= max(np.linalg.norm(query), 1e-12)
+        similarities = vectors_norm @ query
+
+        query_idxs = set(self.vocab[word] for word in positive + negative)
+        num_candidates = min(topn + len(query_idxs), len(similarities))
+        candidates = np.argpartition(-similarities, num_candidates - 1)[:num_candidates]
+        candidates = candidates[np.argsort(-similarities[candidates])]
+        return [(self.index2word[idx], float(similarities[idx]))
+                for idx in candidates if idx not in query_idxs][:topn]
+
+    def similar_by_word(self, word, topn=10):
+        return self.most_similar(positive=[word], topn=topn)
+
+# -------------------------------------------- Main -------------------------
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog=os.path.basename(sys.argv[0]),
+                                     formatter_class=argparse.RawTextHelpFormatter,
+                                     description="Export vector bundles for existing .model or .vectors files."
+                                     )
+    parser.add_argument('--force',
+                        action='store_true',
+                        help='export even if the bundle is current',
+                        default=False
+                        )
+    parser.add_argument('files',
+                        nargs='+',
+                        help='.model or .vectors files'
+                        )
+    args = parser.parse_args();
+
+    # Only needed here; consumers of bundles do not load gensim:
+    from gensim.models import KeyedVectors
+    from gensim.models import Word2Vec
+
+    for model_or_vectors_file in args.files:
+        if not os.path.exists(model_or_vectors_file):
+            print('%s: no such file' % model_or_vectors_file)
+            continue
+        if bundle_is_current(model_or_vectors_file) and not args.force:
+            print('%s: bundle is current' % model_or_vectors_file)
+            continue
+        if model_or_vectors_file.endswith('.model'):
+            model_or_wv = Word2Vec.load(model_or_vectors_file)
+        else:
+            model_or_wv = KeyedVectors.load(model_or_vectors_file, mmap='r')
+        (matrix_file, vocab_file) = export_vector_bundle(model_or_wv, model_or_vectors_file)
+        print('%s: bundle written to %s and %s' % (model_or_vectors_file, matrix_file, vocab_file))
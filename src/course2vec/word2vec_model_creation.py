@@ -7,9 +7,14 @@ import argparse
 import csv
 from enum import Enum
 import gzip
+import json
 import logging
+import math
+import mmap
+import multiprocessing
 import os
-import sqlite3
+import random
+import re
 import sys
 import tempfile
 import time
@@ -17,13 +22,20 @@ import time
 import gensim
 from gensim.models import KeyedVectors
 from gensim.models import Word2Vec
+from gensim.models.callbacks import CallbackAny2Vec
 from sklearn import preprocessing
 from sklearn.decomposition.pca import PCA
 from sklearn.manifold import Isomap
+from sklearn.neighbors import kneighbors_graph
+from scipy.sparse.csgraph import dijkstra
 
 import numpy as np
 import sklearn
 
+from course2vec.model_registry import ModelRegistry
+from course2vec.sentence_corpus import CourseSentenceCorpus, CorpusContent, is_line_sentence_file
+from course2vec.vector_bundle import export_vector_bundle
+
 
 class Action(Enum):
     LOAD_MODEL = 0
@@ -100,9 +112,17 @@ class Word2VecModelCreator(gensim.models.Word2Vec):
             return
         elif action == Action.CREATE_MODEL:
             sentences_filename = actionFileName
-            self.sentences = self.load_sentences(sentences_filename,
-                                                 hasHeader=hasHeader
-                                                 ) 
+            if sentences_filename.endswith('.sqlite'):
+                # Stream student sentences straight from the enrollments:
+                self.sentences = self.create_course_sentences(sentences_filename,
+                                                              low_strm=low_strm,
+                                                              high_strm=high_strm,
+                                                              acad_careers=acad_careers,
+                                                              stream=True)
+            else:
+                self.sentences = self.load_sentences(sentences_filename,
+                                                     hasHeader=hasHeader
+                                                     ) 
             self.model = self.create_model(self.sentences)
             (self.model_filename, self.wv_filename) = self.save(saveFileName)
         elif action == Action.EVALUATE:
@@ -130,18 +150,151 @@ class Word2VecModelCreator(gensim.models.Word2Vec):
     # create_model 
     #----------------
         
-    def create_model(self, training_set, vec_size=150, win_size=10, save_name_prefix=None):
+    def create_model(self, training_set, vec_size=150, win_size=10, save_name_prefix=None, workers=10, corpus_file=None):
+        '''
+        Build vocabulary and train a model, either from sentences
+        in training_set, or from a LineSentence format corpus_file:
+        one sentence per line, course names separated by spaces, as
+        written by create_sentences.py. In corpus_file mode each 
+        worker thread reads its own section of the file, outside 
+        the GIL. Throughput then grows nearly linearly with the
+        number of workers; see experiments/corpus_file_benchmark.py.
+        
+        @param training_set: sentences; ignored if corpus_file is given
+        @type training_set: {[[str]] | CourseSentenceCorpus | None}
+        @param vec_size: dimensionality of the course vectors
+        @type vec_size: int
+        @param win_size: context window size
+        @type win_size: int
+        @param workers: number of training threads
+        @type workers: int
+        @param corpus_file: LineSentence format file to train from
+        @type corpus_file: str
+        @return: the trained model
+        @rtype: gensim.models.Word2Vec
+        '''
+        
+        self.logInfo("Start creating model%s..." % ('' if corpus_file is None else ' from %s' % corpus_file))
+        if corpus_file is not None:
+            # Passing corpus_file to the constructor would already
+            # train; build the vocabulary only, and train once:
+            model = gensim.models.Word2Vec(
+                size=vec_size,
+                window=win_size,
+                min_count=2,
+                workers=workers,
+                batch_words=5000)
+            model.build_vocab(corpus_file=corpus_file)
+            model.train(corpus_file=corpus_file, 
+                        total_examples=model.corpus_count, 
+                        total_words=model.corpus_total_words, 
+                        epochs=10)
+            self.logInfo("Done creating model.")
+            return model
         
-        self.logInfo("Start creating model...")
         # build vocabulary and train model
         model = gensim.models.Word2Vec(
             training_set,
             size=vec_size,
             window=win_size,
             min_count=2,
-            workers=10,
+            workers=workers,
             batch_words=5000)
-        model.train(training_set, total_examples=len(training_set), epochs=10)
+        # Use the sentence count from the vocabulary scan; 
+        # streamed corpora would need an extra pass for len():
+        model.train(training_set, total_examples=model.corpus_count, epochs=10)
+        self.logInfo("Done creating model.")
+        return model
+
+    #--------------------------
+    # create_model_resumable 
+    #----------------
+    
+    def create_model_resumable(self, 
+                               training_set, 
+                               checkpoint_dir,
+                               vec_size=150, 
+                               win_size=10, 
+                               epochs=10,
+                               workers=10,
+                               verification_method=None,
+                               patience=2,
+                               topn=4):
+        '''
+        Like create_model(), but trains epoch by epoch, with a 
+        checkpoint after each epoch (see EpochCheckpointer). Per-epoch
+        loss, wall time, and words/sec are appended to 
+        <checkpoint_dir>/epoch_metrics.jsonl.
+        
+        If checkpoint_dir holds a checkpoint from an earlier, interrupted
+        run, training resumes after its last completed epoch. The learning
+        rate decays linearly over all epochs from the initial alpha
+        recorded in the checkpoint, so a resumed run follows the same
+        schedule as an uninterrupted one. A checkpoint of a run with
+        a different number of epochs is refused.
+        
+        If verification_method is given, the model is scored with the
+        cross-listing verification after each epoch. Training stops early
+        when the score has not improved for patience epochs. The best 
+        scoring model is then returned.
+        
+        @param training_set: sentences
+        @type training_set: {[[str]] | CourseSentenceCorpus}
+        @param checkpoint_dir: directory for checkpoints and metrics log
+        @type checkpoint_dir: str
+        @param vec_size: dimensionality of the course vectors
+        @type vec_size: int
+        @param win_size: context window size
+        @type win_size: int
+        @param epochs: maximum number of epochs
+        @type epochs: int
+        @param workers: number of training threads
+        @type workers: int
+        @param verification_method: TOP_N or RANK for early stopping; None: no early stop
+        @type verification_method: VerificationMethods
+        @param patience: epochs without improvement before stopping early
+        @type patience: int
+        @param topn: only needed for TOP_N
+        @type topn: int
+        @return: the trained model
+        @rtype: gensim.models.Word2Vec
+        '''
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        checkpointer = EpochCheckpointer(self, 
+                                         checkpoint_dir, 
+                                         epochs,
+                                         verification_method=verification_method, 
+                                         patience=patience,
+                                         topn=topn)
+        model = checkpointer.load_checkpoint()
+        if model is None:
+            self.logInfo("Start creating model...")
+            model = gensim.models.Word2Vec(
+                size=vec_size,
+                window=win_size,
+                min_count=2,
+                workers=workers,
+                batch_words=5000,
+                compute_loss=True)
+            model.build_vocab(training_set)
+        else:
+            self.logInfo("Resuming model training after epoch %s..." % checkpointer.epochs_done)
+        
+        model_and_epochs = [model, checkpointer.epochs_done]
+        while model_and_epochs[1] < epochs and not checkpointer.stop_requested:
+            # One epoch per train() call, so that the 
+            # learning rate schedule survives a resume:
+            self.train_more_epochs(model_and_epochs, 
+                                   model_and_epochs[1] + 1, 
+                                   epochs, 
+                                   model.corpus_count, 
+                                   sentences=training_set,
+                                   callbacks=[checkpointer])
+        
+        if checkpointer.stop_requested:
+            self.logInfo("Stopped early after epoch %s; best was epoch %s." %\
+                         (checkpointer.epochs_done, checkpointer.best_epoch))
+            model = checkpointer.load_best()
         self.logInfo("Done creating model.")
         return model
 
@@ -155,7 +308,8 @@ class Word2VecModelCreator(gensim.models.Word2Vec):
         corresponding vectors in saveFileName with extension changed
         to '.vectors'. The vectors are of type KeyedVector and can
         be used for fast operations (see course_sim_analytics.py for
-        examples). 
+        examples). Finally, a memory-mappable vector bundle for
+        read-only consumers is written (see vector_bundle.py). 
         
         @param saveFileName: name of file to save model to. If None, a temp file is used.
         @type saveFileName: str
@@ -173,9 +327,136 @@ class Word2VecModelCreator(gensim.models.Word2Vec):
         key_vec_filename = os.path.join(saveFileName_dir, file_root + '.vectors') 
 
         self.model.wv.save(key_vec_filename)
+        export_vector_bundle(self.model, saveFileName)
         self.logInfo("Model and word vectors saved in \n    %s and \n    %s, \n    respectively" % (saveFileName, key_vec_filename))
         return (saveFileName, key_vec_filename)
 
+    #--------------------------
+    # update_model 
+    #----------------
+    
+    def update_model(self, 
+                     model_file, 
+                     new_sentences, 
+                     replay_sentences=None, 
+                     replay_fraction=0.1,
+                     epochs=10,
+                     saveFileName=None,
+                     new_sentences_source=None):
+        '''
+        Bring an existing model up to date with a new term's
+        enrollments, without retraining from scratch. The model
+        in model_file is loaded, courses that first appear in 
+        new_sentences are added to its vocabulary, and training
+        continues on new_sentences only. Typically those are the
+        full sentences of students who enrolled in the new term
+        (see CourseSentenceCorpus changed_since_strm). 
+        
+        Optionally, a random replay_fraction of replay_sentences,
+        such as the original training sentences, is mixed in. This
+        keeps courses that no longer appear from drifting away from
+        the rest.
+        
+        The sentences are streamed: new_sentences is iterated once
+        per pass, and the replay sample is drawn as replay_sentences
+        are iterated (see UpdateSentences).
+        
+        Training starts from the model's initial learning rate
+        schedule (schedule_alpha and schedule_min_alpha, recorded by
+        resumable and successive halving training), if it has one.
+        Otherwise from its alpha and min_alpha. A model trained with
+        explicit learning rates has the last epoch's rates in alpha,
+        which are too small for learning the new term's courses.
+        
+        The updated model is saved (see save()), and its lineage is
+        written next to it in <model>.lineage.json: the lineage of 
+        the parent model, plus an entry for this update.
+        
+        @param model_file: existing model to update
+        @type model_file: str
+        @param new_sentences: sentences of new or changed students
+        @type new_sentences: {[[str]] | CourseSentenceCorpus}
+        @param replay_sentences: sentences from which to sample the replay
+        @type replay_sentences: {[[str]] | CourseSentenceCorpus}
+        @param replay_fraction: probability with which each replay sentence is used
+        @type replay_fraction: float
+        @param epochs: number of update epochs
+        @type epochs: int
+        @param saveFileName: where to save the updated model. If None, a temp file is used.
+        @type saveFileName: str
+        @param new_sentences_source: description of new_sentences for the lineage record,
+            such as file name and strm
+        @type new_sentences_source: str
+        @return: tuple with names of files to which model and vectors were saved.
+        @rtype: (str, str)
+        '''
+        self.model = self.load_model(model_file)
+        vocab_size_before = len(self.model.wv.vocab)
+        
+        training_sentences = UpdateSentences(new_sentences, 
+                                             replay_sentences if replay_fraction > 0 else None, 
+                                             replay_fraction)
+        if next(iter(training_sentences), None) is None:
+            raise ValueError("No sentences to update model '%s' with." % model_file)
+        
+        start_alpha = getattr(self.model, 'schedule_alpha', None) or self.model.alpha
+        end_alpha   = getattr(self.model, 'schedule_min_alpha', None) or self.model.min_alpha
+        
+        self.logInfo('Updating model...')
+        # The vocabulary scan is a full pass; it also counts
+        # the new and replayed sentences:
+        self.model.build_vocab(training_sentences, update=True)
+        (num_new_sentences, num_replay_sentences) = (training_sentences.num_new_sentences,
+                                                     training_sentences.num_replay_sentences)
+        self.model.train(training_sentences, 
+                         total_examples=self.model.corpus_count, 
+                         epochs=epochs,
+                         start_alpha=start_alpha,
+                         end_alpha=end_alpha)
+        self.logInfo('Done updating model with %s new and %s replayed sentences; vocabulary grew from %s to %s courses.' %\
+                     (num_new_sentences, num_replay_sentences, vocab_size_before, len(self.model.wv.vocab)))
+        
+        (model_filename, wv_filename) = self.save(saveFileName)
+        
+        lineage = self.load_lineage(model_file)
+        lineage.append({'parent_model' : os.path.abspath(model_file),
+                        'updated' : time.strftime("%Y-%m-%d_%H_%M_%S"),
+                        'new_sentences_source' : new_sentences_source,
+                        'num_new_sentences' : num_new_sentences,
+                        'num_replay_sentences' : num_replay_sentences,
+                        'epochs' : epochs,
+                        'start_alpha' : start_alpha,
+                        'end_alpha' : end_alpha,
+                        'vocab_size_before' : vocab_size_before,
+                        'vocab_size_after' : len(self.model.wv.vocab)
+                        })
+        with open(self.lineage_filename(model_filename), 'w') as lineage_fd:
+            json.dump(lineage, lineage_fd, indent=2)
+        return (model_filename, wv_filename)
+
+    #--------------------------
+    # load_lineage 
+    #----------------
+    
+    def load_lineage(self, model_file):
+        '''
+        Return the list of update records that led to model_file,
+        oldest first. Empty for models created from scratch.
+        
+        @param model_file: model file name
+        @type model_file: str
+        @return: lineage records
+        @rtype: [{str : any}]
+        '''
+        lineage_file = self.lineage_filename(model_file)
+        if not os.path.exists(lineage_file):
+            return []
+        with open(lineage_file, 'r') as lineage_fd:
+            return json.load(lineage_fd)
+        
+    def lineage_filename(self, model_file):
+        return os.path.splitext(model_file)[0] + '.lineage.json'
+
     #--------------------------
     # load_model
     #----------------
@@ -207,7 +488,37 @@ class Word2VecModelCreator(gensim.models.Word2Vec):
     # import_sentences 
     #------------------
     
-    def load_sentences(self, sentence_filename, separator=',', hasHeader=True):
+    def load_sentences(self, sentence_filename, separator=',', hasHeader=True, stream=False):
+        '''
+        Read training sentences from file. If stream is True, 
+        return a CourseSentenceCorpus that reads the file anew 
+        on each iteration, instead of a list.
+        
+        LineSentence format files (course names separated by
+        spaces, as written by create_sentences.py) are recognized
+        in both cases; they have no header, and are split on spaces.
+        
+        @param sentence_filename: file with one sentence per line; may be gzipped if stream is True
+        @type sentence_filename: str
+        @param separator: separator between course names
+        @type separator: str
+        @param hasHeader: whether the file starts with a header line
+        @type hasHeader: bool
+        @param stream: whether to return a streaming corpus
+        @type stream: bool
+        @return: sentences
+        @rtype: {[[str]] | CourseSentenceCorpus}
+        '''
+        if stream:
+            if is_line_sentence_file(sentence_filename, separator=separator):
+                return CourseSentenceCorpus(sentence_filename,
+                                            content=CorpusContent.SENTENCES,
+                                            hasHeader=False,
+                                            separator=' ')
+            return CourseSentenceCorpus(sentence_filename, 
+                                        content=CorpusContent.SENTENCES, 
+                                        hasHeader=hasHeader, 
+                                        separator=separator)
 
         res_arr_of_arr = []
         with open(sentence_filename, 'r') as sentence_fd:
@@ -240,7 +551,8 @@ class Word2VecModelCreator(gensim.models.Word2Vec):
                                 hasHeader=False, 
                                 low_strm=None, 
                                 high_strm=None,
-                                acad_careers=None):
+                                acad_careers=None,
+                                stream=False):
         '''
         NOTE: A more versatile method for creating sentences from
               enrollment files is create_sentences.py.
@@ -267,11 +579,15 @@ class Word2VecModelCreator(gensim.models.Word2Vec):
 		no bound is imposed in the respective (or both) directions.
 		
 		NOTE: if using a .csv file for input, it MUST be ordered by
-		      emplid! If using an sqlite3 table, the query below
+		      emplid! If using an sqlite3 table, the corpus query
 		      takes care of that.  
 			            
 		Each sentences will be the concatenation of one student's 
 		course names, and their major.	            
+		
+		If stream is True, the sentences are not collected into a 
+		list. Instead, a CourseSentenceCorpus is returned, which 
+		re-reads the enrollments on each iteration.
         
         @param id_strm_crse_filename: name of file with enrollment info
         @type id_strm_crse_filename: string
@@ -284,103 +600,22 @@ class Word2VecModelCreator(gensim.models.Word2Vec):
         @param acad_careers: list of academic careers to include: UG, MED, LAW, etc.
             Default: include all.
         @type acad_careers: {None | (str)}
+        @param stream: whether to return a streaming corpus instead of a list
+        @type stream: bool
         @return: array of array representing the training sentences
-        @rtype: [[str,str,str,...],[str,str...]...] 
+        @rtype: {[[str,str,str,...],[str,str...]...] | CourseSentenceCorpus}
         '''
-        csv_fd = None
+        corpus = CourseSentenceCorpus(id_strm_crse_filename,
+                                      content=CorpusContent.ENROLLMENTS,
+                                      hasHeader=hasHeader,
+                                      low_strm=low_strm,
+                                      high_strm=high_strm,
+                                      acad_careers=acad_careers)
+        if stream:
+            return corpus
         
-        if id_strm_crse_filename.endswith('.sqlite'):
-            try:
-                conn = sqlite3.connect(id_strm_crse_filename)
-            except Exception as e:
-                raise ValueError("Could not open Sqlite3 db '%s' (%s)" % (id_strm_crse_filename, repr(e)))
-            reader = conn.cursor()
-            where_clause = '' if low_strm is None and high_strm is None and acad_careers is None else ' WHERE '
-            if low_strm is not None:
-                where_clause += "strm >= %s" % low_strm
-                if high_strm is not None or acad_careers is not None:
-                    where_clause += ' and '
-            if high_strm is not None:
-                where_clause += 'strm < %s' % high_strm
-                if acad_careers is not None:
-                    where_clause += ' and '
-            if acad_careers is not None:
-                where_clause += "acad_career in (%s)" % \
-                    ','.join(["'" + acad_career + "'" for acad_career in acad_careers])
-            try:    
-                reader.execute("SELECT * FROM emplid_crs_major_strm_gt10_2000plus" + where_clause + ' ORDER BY emplid'+ ';')
-            except Exception as e:
-                reader.close()
-                raise ValueError("Could not query Sqlite3 db '%s' (%s)" % (id_strm_crse_filename, repr(e)))                
-        else:
-            try:
-                csv_fd = open(id_strm_crse_filename, 'r')
-                reader = csv.reader(csv_fd)
-            except Exception as e:
-                raise ValueError("Could not open csv file '%s' (%s)" % (id_strm_crse_filename, repr(e)))                
-        try:
-            sentences = []
-            curr_emplid   = None
-            curr_sentence = None
-
-            #*************
-            # Just for safety against unordered emplids:
-            # ensure no dups outside of single, legitimitely
-            # ordered emplids group: 
-            emplid_dup_check = {}
-            #*************
-            
-            if hasHeader and not id_strm_crse_filename.endswith('.sqlite'):
-                # Ignore header in CSV:
-                next(reader)
-                
-            self.logInfo('Creating sentences from enrollments...')
-            for emplid, coursename, major, career, strm in reader: #@UnusedVariable
-                # Depending on how the underlying data was constructed, 
-                # undeclares may end up showing as having major '\N':
-                if major == '\\N':
-                    major = 'UNDECL'
-                if emplid != curr_emplid:
-                    # Starting a new student:
-                    if curr_sentence is not None:
-                        # Finished with one student, add finished sentence
-                        # to sentences list:
-                        sentences.append(curr_sentence)
-                        #*************
-                        # We've seen the emplid we just processed:
-                        emplid_dup_check[curr_emplid] = True
-                        #*************
-                        
-                    # Start a new sentence with this student's
-                    # first course:
-                    curr_sentence = [major, coursename]
-                    #*************
-                    # Make sure there are no emplid duplicates other
-                    # than the ones that are clustered together:
-                    try:
-                        assert(emplid_dup_check.get(emplid, None) is None)
-                    except AssertionError:
-                        print('Assertion error.')
-                        raise
-                    #*************                    
-                    curr_emplid   = emplid
-                    
-                else:
-                    # More courses for current student:
-                    curr_sentence.append(coursename)
-        finally:
-            try:
-                # If reader is a db:
-                reader.close()
-            except AttributeError:
-                try:
-                    # Oh well, guess it wasn't a db. In that
-                    # case close the file underlying the csv 
-                    # reader:
-                    csv_fd.close()
-                except Exception:
-                    pass
-            
+        self.logInfo('Creating sentences from enrollments...')
+        sentences = list(corpus)
         self.logInfo('Done creating sentences from enrollments.')
         return sentences
     
@@ -394,7 +629,11 @@ class Word2VecModelCreator(gensim.models.Word2Vec):
                        vector_sizes=None,
                        window_sizes=None,
                        topn = 4,
-                       num_low_dims=2):
+                       num_low_dims=2,
+                       num_workers=1,
+                       num_landmarks=None,
+                       randomized_pca=False,
+                       registry=None):
         '''
         Train with a variety of vector sizes and window
         combinations. Run the cross-list validation for
@@ -416,6 +655,17 @@ class Word2VecModelCreator(gensim.models.Word2Vec):
         Models are trained for all combinations of vector
         sizes, and window sizes as given in vec_sizes and win_sizes.
         
+        If num_workers > 1, the combinations are distributed over
+        a pool of that many processes. The sentences are then written
+        once to a corpus file, which each worker memory-maps 
+        (see MmapSentenceCorpus), rather than being pickled to 
+        every worker. 
+        
+        Each result is appended to grid_results_save_file_name as soon
+        as it is available. Combinations already recorded in that
+        file are skipped, so an interrupted sweep is resumed by 
+        calling again with the same file.
+        
         @param verification_method: code of method to use for evaluationg the
             models that are created. Options are as in enum class: VerificationMethods.
         @type verification_method: int
@@ -427,9 +677,22 @@ class Word2VecModelCreator(gensim.models.Word2Vec):
         @type window_sizes: [int]
         @param topn: test stringency: only needed if verification method is topn-n
         @type topn: int
+        @param num_low_dims: number of dimensions for the PCA and isomap diagnostics
+        @type num_low_dims: int
+        @param num_workers: number of processes among which to distribute the grid
+        @type num_workers: int
+        @param num_landmarks: number of landmarks for an approximate isomap
+            diagnostic. None: exact isomap.
+        @type num_landmarks: int
+        @param randomized_pca: whether the PCA diagnostic uses the randomized solver
+        @type randomized_pca: bool
+        @param registry: if provided, each new model is recorded there with its
+            metrics, and combinations the registry already holds for the same 
+            training sentences are skipped.
+        @type registry: ModelRegistry
         @return: a list of result objects, one for each vector-size/window-size
-            combination. The subclass of result objs is determined by the 
-            verification_method.
+            combination that was computed in this call. The subclass of result 
+            objs is determined by the verification_method.
         @rtype: [CrossRegistrationTestResult]
         '''
 
@@ -452,84 +715,482 @@ class Word2VecModelCreator(gensim.models.Word2Vec):
         num_of_cross_lists = len(self.cross_listings.keys())
         
         save_dir = os.path.dirname(self.training_filename)
+        
+        # Resume: skip combinations that earlier runs already recorded:
+        done_grid_points = self.recorded_grid_points(grid_results_save_file_name)
+        grid_points = [(vec_size, win_size) 
+                       for vec_size in vector_sizes 
+                       for win_size in window_sizes
+                       if (vec_size, win_size) not in done_grid_points]
+        if len(done_grid_points) > 0:
+            self.logInfo('Resuming grid search: %s combinations already in %s; %s to go.' %\
+                         (len(done_grid_points), grid_results_save_file_name, len(grid_points)))
+        
+        training_data_hash = None
+        if registry is not None:
+            training_data_hash = ModelRegistry.sentences_hash(self.sentences)
+            registered_grid_points = [(vec_size, win_size) for (vec_size, win_size) in grid_points
+                                      if len(registry.find(training_data_hash, vec_size, win_size)) > 0]
+            if len(registered_grid_points) > 0:
+                self.logInfo('Skipping combinations already in model registry: %s' % registered_grid_points)
+                grid_points = [grid_point for grid_point in grid_points if grid_point not in registered_grid_points]
+        
+        eval_args = (verification_method, topn, num_low_dims, 
+                     num_comparisons, num_of_cross_lists, save_dir, num_landmarks, randomized_pca)
         result_objects = []
         with open(grid_results_save_file_name, 'a') as grid_results_save_fd:
             # First, write one line with the number of cross list sets,
             # and the total number of course comparisons:
-            grid_results_save_fd.write('Number of cross list sets: %s; Number of comparisons: %s\n' %\
-                                       (num_of_cross_lists, num_comparisons)
-                                       )
-            grid_results_save_fd.flush()
-             
-            for vec_size in vector_sizes:
-                for win_size in window_sizes:
-                    #********
-                    self.model = self.create_model(self.sentences, vec_size=vec_size, win_size=win_size)
-                    #save_file = self.make_filename(save_dir, prefix='all_since2000', vec_size=vec_size, win_size=win_size, suffix_no_dot='model')
-                    #self.model = self.load_model(save_file)
-                    #********
-                    self.word_vectors = self.model.wv
-                    self.vectors     = self.word_vectors.vectors
-                    self.vocab       = self.word_vectors.vocab
-                    self.index2word  = self.word_vectors.index2word
-                    self.wv          = self.word_vectors
-                    
-                    # Save the model under an appropriate name:
-                    save_file = self.make_filename(save_dir, prefix='all_since2000', vec_size=vec_size, win_size=win_size, suffix_no_dot='model')
-                    #*********
-                    self.save(save_file)
-                    #*********                    
-                    
-                    if verification_method == VerificationMethods.TOP_N:
-                        accuracy = self.verify_model(topn=topn)
-                        # Create a test result object:
-                        result = CrossRegistrationTopNResult(topn,
-                                                             accuracy, 
-                                                             vec_size, 
-                                                             win_size, 
-                                                             num_comparisons,
-                                                             num_of_cross_lists
-                                                             )
-                    elif verification_method == VerificationMethods.RANK:
-                        (mean_rank, median_rank, sd_rank) = self.verify_model(verification_method)
-                        result = CrossRegistrationRankResult(mean_rank,
-                                                             median_rank,
-                                                             sd_rank,
-                                                             vec_size, 
-                                                             win_size, 
-                                                             num_comparisons,
-                                                             num_of_cross_lists
-                                                             )
-                    # Next, compute PCA, and add to result the 
-                    # Two-tuple with the percentage variance explained
-                    # values for the two dimensions:
-                    result.add_pca_power(self.compute_pca_explain_power(self.model, num_dims=num_low_dims))
+            if grid_results_save_fd.tell() == 0:
+                grid_results_save_fd.write('Number of cross list sets: %s; Number of comparisons: %s\n' %\
+                                           (num_of_cross_lists, num_comparisons)
+                                           )
+                grid_results_save_fd.flush()
+            
+            if num_workers <= 1 or len(grid_points) <= 1:
+                for (vec_size, win_size) in grid_points:
+                    result = self.evaluate_grid_point(self.sentences, vec_size, win_size, *eval_args)
                     result_objects.append(result)
-
-                    # Next, create isomap non-linear embedding
-                    # to 2 dims, and obtain the reconstruction error:
-                    reconstruction_error = self.compute_isomap_explain_power(self.model, num_dims=num_low_dims)
-                    result.add_isomap_reconstruction_error(reconstruction_error)
-
+                    if registry is not None:
+                        self.register_result(registry, result, training_data_hash)
                     # Save this result to file:
                     grid_results_save_fd.write(str(result) + '\n')
                     grid_results_save_fd.flush()
+                return result_objects
+            
+            # Share the sentences with the workers as a file
+            # that each of them memory-maps:
+            corpus_file = MmapSentenceCorpus.write_corpus_file(self.sentences)
+            
+            # Divide the cores among the concurrent gensim trainings:
+            train_workers = max(1, multiprocessing.cpu_count() // num_workers)
+            try:
+                # Spawn rather than fork: gensim's training threads
+                # don't survive a fork cleanly:
+                with multiprocessing.get_context('spawn').Pool(processes=num_workers,
+                                                               initializer=_init_grid_worker,
+                                                               initargs=(corpus_file, train_workers)
+                                                               ) as pool:
+                    worker_args = [(vec_size, win_size) + eval_args for (vec_size, win_size) in grid_points]
+                    for result in pool.imap_unordered(_evaluate_grid_point_in_worker, worker_args):
+                        result_objects.append(result)
+                        if registry is not None:
+                            self.register_result(registry, result, training_data_hash)
+                        # Save this result to file as soon as it arrives:
+                        grid_results_save_fd.write(str(result) + '\n')
+                        grid_results_save_fd.flush()
+            finally:
+                os.remove(corpus_file)
 
         return result_objects
 
+    #--------------------------
+    # evaluate_grid_point 
+    #----------------
+    
+    def evaluate_grid_point(self, 
+                            sentences, 
+                            vec_size, 
+                            win_size, 
+                            verification_method, 
+                            topn, 
+                            num_low_dims, 
+                            num_comparisons, 
+                            num_of_cross_lists, 
+                            save_dir,
+                            num_landmarks=None,
+                            randomized_pca=False,
+                            workers=10):
+        '''
+        Train, save, and evaluate the model for one vector-size/window-size
+        combination of the optimize_model() grid. 
+        
+        @return: result object, whose subclass is determined by verification_method
+        @rtype: CrossRegistrationTestResult
+        '''
+        self.model = self.create_model(sentences, vec_size=vec_size, win_size=win_size, workers=workers)
+        self.word_vectors = self.model.wv
+        self.vectors     = self.word_vectors.vectors
+        self.vocab       = self.word_vectors.vocab
+        self.index2word  = self.word_vectors.index2word
+        self.wv          = self.word_vectors
+        
+        # Save the model under an appropriate name:
+        save_file = self.make_filename(save_dir, prefix='all_since2000', vec_size=vec_size, win_size=win_size, suffix_no_dot='model')
+        self.save(save_file)
+        
+        result = self.evaluation_result(verification_method, 
+                                        topn, 
+                                        vec_size, 
+                                        win_size, 
+                                        num_comparisons, 
+                                        num_of_cross_lists)
+        result.model_file = save_file
+        result.model_fingerprint = self.model_fingerprint(self.model)
+        
+        # Next, compute PCA percentage variance explained for
+        # each dimension, and the isomap reconstruction error
+        # of the embedding into num_low_dims dims:
+        (pca_power, reconstruction_error) = self.compute_diagnostics(self.model, 
+                                                                     num_dims=num_low_dims, 
+                                                                     num_landmarks=num_landmarks,
+                                                                     randomized_pca=randomized_pca,
+                                                                     cache_dir=os.path.join(save_dir, 'diagnostics_cache'))
+        result.add_pca_power(pca_power)
+        result.add_isomap_reconstruction_error(reconstruction_error)
+        result.add_diagnostics_settings(num_landmarks, randomized_pca)
+        
+        return result
+
+    #--------------------------
+    # evaluation_result 
+    #----------------
+    
+    def evaluation_result(self, 
+                          verification_method, 
+                          topn, 
+                          vec_size, 
+                          win_size, 
+                          num_comparisons, 
+                          num_of_cross_lists):
+        '''
+        Verify self.wv with the given method, and wrap the outcome
+        in the matching CrossRegistrationTestResult subclass.
+        '''
+        if verification_method == VerificationMethods.TOP_N:
+            accuracy = self.verify_model(verification_method, topn=topn)
+            # Create a test result object:
+            return CrossRegistrationTopNResult(topn,
+                                               accuracy, 
+                                               vec_size, 
+                                               win_size, 
+                                               num_comparisons,
+                                               num_of_cross_lists
+                                               )
+        elif verification_method == VerificationMethods.RANK:
+            (mean_rank, median_rank, sd_rank) = self.verify_model(verification_method)
+            return CrossRegistrationRankResult(mean_rank,
+                                               median_rank,
+                                               sd_rank,
+                                               vec_size, 
+                                               win_size, 
+                                               num_comparisons,
+                                               num_of_cross_lists
+                                               )
+        else:
+            raise ValueError("Verification method %s does not exist." % verification_method)
+
+    #--------------------------
+    # register_result 
+    #----------------
+    
+    def register_result(self, registry, result, training_data_hash, epochs=10):
+        '''
+        Record the model behind a grid result in the model
+        registry, with the result's numbers as metrics.
+        
+        @param registry: the registry
+        @type registry: ModelRegistry
+        @param result: result of evaluate_grid_point(); carries model_file
+            and model_fingerprint
+        @type result: CrossRegistrationTestResult
+        @param training_data_hash: hash of the training sentences
+        @type training_data_hash: str
+        @param epochs: number of epochs the model was trained
+        @type epochs: int
+        @return: registry id of the model
+        @rtype: int
+        '''
+        if isinstance(result, CrossRegistrationRankResult):
+            metrics = {'mean_rank'   : result.mean_rank,
+                       'median_rank' : result.median_rank,
+                       'sd_rank'     : result.sd_rank}
+        else:
+            metrics = {'top%s_accuracy' % result.topn : result.accuracy}
+        metrics['isomap_reconstruction_error'] = result.reconstruction_error
+        for dim, var_ratio in enumerate(result.pca_var_ration_explained):
+            metrics['pca_var_explained_dim%s' % (dim + 1)] = var_ratio
+        # How the diagnostics were computed; 0 landmarks: exact isomap:
+        metrics['isomap_landmarks'] = result.isomap_landmarks or 0
+        metrics['randomized_pca']   = int(result.randomized_pca)
+        return registry.register(result.model_file,
+                                 result.model_fingerprint,
+                                 training_data_hash,
+                                 result.vec_size,
+                                 result.win_size,
+                                 epochs=epochs,
+                                 hyperparams={'min_count' : 2, 'batch_words' : 5000},
+                                 metrics=metrics)
+
+    #--------------------------
+    # recorded_grid_points 
+    #----------------
+    
+    def recorded_grid_points(self, grid_results_file_name):
+        '''
+        Return the set of (vec_size, win_size) combinations 
+        for which a grid results file already holds a result.
+        Understands the lines written by both the rank and 
+        the top-n result classes.
+        
+        @param grid_results_file_name: results file of an earlier optimize_model() run
+        @type grid_results_file_name: str
+        @return: set of recorded combinations
+        @rtype: {(int,int)}
+        '''
+        recorded = set()
+        if not os.path.exists(grid_results_file_name):
+            return recorded
+        # Rank results: '128,10,2.1,...'; top-n results: '... vec-128, win-10, ...'
+        rank_pattern = re.compile(r'^(\d+),(\d+),')
+        topn_pattern = re.compile(r'vec-(\d+), win-(\d+)')
+        with open(grid_results_file_name, 'r') as fd:
+            for line in fd:
+                match = rank_pattern.match(line) or topn_pattern.search(line)
+                if match is not None:
+                    recorded.add((int(match.group(1)), int(match.group(2))))
+        return recorded
+
+    #--------------------------
+    # optimize_model_successive_halving 
+    #----------------
+    
+    def optimize_model_successive_halving(self,
+                                          verification_method,
+                                          grid_results_save_file_name,
+                                          vector_sizes=None,
+                                          window_sizes=None,
+                                          topn=4,
+                                          num_low_dims=2,
+                                          min_epochs=2,
+                                          max_epochs=10,
+                                          eta=3,
+                                          num_landmarks=None,
+                                          randomized_pca=False,
+                                          registry=None):
+        '''
+        Adaptive alternative to optimize_model(): successive halving
+        over the same vector-size/window-size grid. All candidates 
+        are first trained for min_epochs, and scored with the 
+        cross-listing verification. Only the best 1/eta of them
+        continue training, with the epoch budget multiplied by eta,
+        until one candidate is left, or max_epochs is reached. The
+        winner is then trained to max_epochs, saved, and gets the
+        full result with PCA and isomap diagnostics.
+        
+        Candidates continue training where they left off. The learning
+        rate decays over the max_epochs schedule, so a candidate that 
+        survives every rung ends up trained as by create_model().
+        
+        The scores of each rung are appended to grid_results_save_file_name,
+        followed by the final result line of the winner.
+        
+        @param verification_method: RANK (lower mean rank is better), or 
+            TOP_N (higher accuracy is better)
+        @type verification_method: VerificationMethods
+        @param grid_results_save_file_name: file to which rung scores and result are appended
+        @type grid_results_save_file_name: str
+        @param vector_sizes: a list of vector dimension numbers to test.
+        @type vector_sizes: [int]
+        @param window_sizes: a list of window sizes to test.
+        @type window_sizes: [int]
+        @param topn: test stringency: only needed if verification method is topn-n
+        @type topn: int
+        @param num_low_dims: number of dimensions for the PCA and isomap diagnostics
+        @type num_low_dims: int
+        @param min_epochs: epochs every candidate is trained before the first cut
+        @type min_epochs: int
+        @param max_epochs: epochs of the finally chosen model
+        @type max_epochs: int
+        @param eta: reduction factor: 1/eta of the candidates survive each rung
+        @type eta: int
+        @param num_landmarks: landmarks for an approximate isomap diagnostic; None for exact isomap
+        @type num_landmarks: int
+        @param randomized_pca: whether the PCA diagnostic uses the randomized solver
+        @type randomized_pca: bool
+        @param registry: if provided, the winning model is recorded there
+        @type registry: ModelRegistry
+        @return: result object for the winning combination
+        @rtype: CrossRegistrationTestResult
+        '''
+        if verification_method not in (VerificationMethods.RANK, VerificationMethods.TOP_N):
+            raise ValueError("Verification method %s does not exist." % verification_method)
+        if eta < 2:
+            raise ValueError("Successive halving needs eta >= 2; got %s." % eta)
+
+        num_comparisons = 0
+        for cross_course_list in self.cross_listings.values():
+            num_comparisons += len(cross_course_list)
+        num_of_cross_lists = len(self.cross_listings.keys())
+        save_dir = os.path.dirname(self.training_filename)
+        total_examples = len(self.sentences)
+        
+        # Candidate (vec_size, win_size) --> [model, epochs trained so far]:
+        candidates = {}
+        for vec_size in vector_sizes:
+            for win_size in window_sizes:
+                model = gensim.models.Word2Vec(size=vec_size,
+                                               window=win_size,
+                                               min_count=2,
+                                               workers=10,
+                                               batch_words=5000)
+                model.build_vocab(self.sentences)
+                candidates[(vec_size, win_size)] = [model, 0]
+        
+        rung = 0
+        rung_epochs = min(min_epochs, max_epochs)
+        with open(grid_results_save_file_name, 'a') as grid_results_save_fd:
+            while True:
+                scores = {}
+                for grid_point, model_and_epochs in candidates.items():
+                    self.train_more_epochs(model_and_epochs, rung_epochs, max_epochs, total_examples)
+                    scores[grid_point] = self.halving_score(model_and_epochs[0], verification_method, topn)
+                    grid_results_save_fd.write('Halving rung %s: vec=%s win=%s epochs=%s score=%s\n' %\
+                                               (rung, grid_point[0], grid_point[1], rung_epochs, scores[grid_point]))
+                    grid_results_save_fd.flush()
+                
+                if len(candidates) == 1 or rung_epochs >= max_epochs:
+                    break
+                
+                # Keep the best 1/eta of the candidates; higher score is better:
+                num_survivors = max(1, int(math.ceil(len(candidates) / eta)))
+                survivors = sorted(scores.keys(), key=lambda grid_point: scores[grid_point], reverse=True)[:num_survivors]
+                candidates = {grid_point : candidates[grid_point] for grid_point in survivors}
+                self.logInfo('Halving rung %s done; %s candidate(s) continue: %s' % (rung, num_survivors, survivors))
+                rung += 1
+                rung_epochs = min(rung_epochs * eta, max_epochs)
+        
+            # Best of the last rung:
+            ((vec_size, win_size), model_and_epochs) = max(candidates.items(), key=lambda item: scores[item[0]])
+            self.train_more_epochs(model_and_epochs, max_epochs, max_epochs, total_examples)
+            self.model = model_and_epochs[0]
+            self.wv    = self.model.wv
+            save_file  = self.make_filename(save_dir, prefix='all_since2000', vec_size=vec_size, win_size=win_size, suffix_no_dot='model')
+            self.save(save_file)
+            
+            result = self.evaluation_result(verification_method, 
+                                            topn, 
+                                            vec_size, 
+                                            win_size, 
+                                            num_comparisons, 
+                                            num_of_cross_lists)
+            (pca_power, reconstruction_error) = self.compute_diagnostics(self.model, 
+                                                                         num_dims=num_low_dims, 
+                                                                         num_landmarks=num_landmarks,
+                                                                         randomized_pca=randomized_pca,
+                                                                         cache_dir=os.path.join(save_dir, 'diagnostics_cache'))
+            result.add_pca_power(pca_power)
+            result.add_isomap_reconstruction_error(reconstruction_error)
+            result.add_diagnostics_settings(num_landmarks, randomized_pca)
+            grid_results_save_fd.write(str(result) + '\n')
+            grid_results_save_fd.flush()
+        
+        if registry is not None:
+            result.model_file = save_file
+            result.model_fingerprint = self.model_fingerprint(self.model)
+            self.register_result(registry, result, ModelRegistry.sentences_hash(self.sentences), epochs=max_epochs)
+        return result
+
+    #--------------------------
+    # train_more_epochs 
+    #----------------
+    
+    def train_more_epochs(self, model_and_epochs, up_to_epochs, max_epochs, total_examples, 
+                          sentences=None, callbacks=()):
+        '''
+        Continue training a successive halving candidate until it 
+        has up_to_epochs epochs behind it. The learning rate follows
+        the linear decay a single max_epochs training would use.
+        
+        @param model_and_epochs: two-element list [model, epochs trained so far];
+            the epoch count is updated in place.
+        @type model_and_epochs: [Word2Vec, int]
+        @param sentences: training sentences; default: self.sentences
+        @type sentences: {[[str]] | CourseSentenceCorpus}
+        @param callbacks: gensim training callbacks
+        @type callbacks: [CallbackAny2Vec]
+        '''
+        (model, epochs_done) = model_and_epochs
+        if up_to_epochs <= epochs_done:
+            return
+        (start_alpha, end_alpha) = self.scheduled_alphas(model, epochs_done, up_to_epochs, max_epochs)
+        model.train(self.sentences if sentences is None else sentences, 
+                    total_examples=total_examples, 
+                    epochs=up_to_epochs - epochs_done,
+                    start_alpha=start_alpha,
+                    end_alpha=end_alpha,
+                    compute_loss=True,
+                    callbacks=callbacks)
+        model_and_epochs[1] = up_to_epochs
+
+    #--------------------------
+    # scheduled_alphas 
+    #----------------
+    
+    def scheduled_alphas(self, model, from_epochs, to_epochs, max_epochs):
+        '''
+        Start and end learning rates for training a model from
+        from_epochs to to_epochs, on the linear decay from the 
+        model's initial alpha to its min_alpha over max_epochs.
+        
+        Word2Vec.train() overwrites model.alpha and model.min_alpha
+        with the start_alpha and end_alpha it is given. The initial
+        values are therefore recorded on the model on first use, as
+        schedule_alpha and schedule_min_alpha. They are saved with 
+        the model, so checkpoints keep the original schedule.
+        
+        @param model: model being trained
+        @type model: gensim.models.Word2Vec
+        @param from_epochs: epochs already trained
+        @type from_epochs: int
+        @param to_epochs: epochs trained after this training call
+        @type to_epochs: int
+        @param max_epochs: epochs over which alpha decays to min_alpha
+        @type max_epochs: int
+        @return: start_alpha and end_alpha for Word2Vec.train()
+        @rtype: (float, float)
+        '''
+        if getattr(model, 'schedule_alpha', None) is None:
+            model.schedule_alpha     = model.alpha
+            model.schedule_min_alpha = model.min_alpha
+        alpha_drop = (model.schedule_alpha - model.schedule_min_alpha) / max_epochs
+        return (model.schedule_alpha - alpha_drop * from_epochs,
+                model.schedule_alpha - alpha_drop * to_epochs)
+
+    #--------------------------
+    # halving_score 
+    #----------------
+    
+    def halving_score(self, model, verification_method, topn):
+        '''
+        Cross-listing score of a model, oriented such that 
+        higher is better: top-n accuracy, or negative mean rank.
+        '''
+        self.wv = model.wv
+        if verification_method == VerificationMethods.TOP_N:
+            return self.verify_model(verification_method, topn=topn)
+        (mean_rank, _median_rank, _sd_rank) = self.verify_model(verification_method)
+        return -mean_rank
+
     #--------------------------
     # compute_pca_explain_power 
     #----------------
     
-    def compute_pca_explain_power(self, model, num_dims=2):
+    def compute_pca_explain_power(self, model, num_dims=2, randomized=False):
         '''
         Given a computed course vectors embedding model, 
         extract the vectors, standardize them, perform
         a 2-dim PCA, and return the two-tuple with each of
         the dimensions explained-variance ratio. 
         
+        With randomized True, the PCA uses a randomized SVD,
+        which only approximates the top num_dims components,
+        rather than a full decomposition.
+        
         @param model: course context model as trained by neural net
         @type model: gensim.model.word_vectors
+        @param randomized: whether to use the randomized SVD solver
+        @type randomized: bool
         @return: ratio of explained variance for each of the two dims
         @rtype: (float,float)
         '''
@@ -540,7 +1201,10 @@ class Word2VecModelCreator(gensim.models.Word2Vec):
         vectors_standardized = vectors
         vectors_standardized_normalized = preprocessing.normalize(vectors_standardized, norm='l2')
         #********
-        pca = PCA(n_components=num_dims)
+        if randomized:
+            pca = PCA(n_components=num_dims, svd_solver='randomized', random_state=23)
+        else:
+            pca = PCA(n_components=num_dims)
         _principalComponents = pca.fit_transform(vectors_standardized_normalized)
         explained_variance_ratios = pca.explained_variance_ratio_
         return explained_variance_ratios
@@ -549,14 +1213,22 @@ class Word2VecModelCreator(gensim.models.Word2Vec):
     # compute_isomap_explain_power 
     #----------------
     
-    def compute_isomap_explain_power(self, model, num_dims=2): 
+    def compute_isomap_explain_power(self, model, num_dims=2, num_landmarks=None): 
         '''
         Given a computed course vectors embedding model, extract the
         vectors, standardize them, perform a 2-dim isomap embedding,
         and return the two-tuple with the reconstruction error.
         
+        If num_landmarks is given, and smaller than the vocabulary,
+        landmark isomap is used instead: geodesic distances are only
+        computed from num_landmarks randomly chosen courses, and the
+        error is that of the landmarks' embedding. That replaces the 
+        roughly cubic cost of a full isomap.
+        
         @param model: course context model as trained by neural net
         @type model: gensim.model.word_vectors
+        @param num_landmarks: number of landmarks; None for full isomap
+        @type num_landmarks: int
         @return: ratio of explained variance for each of the two dims
         @rtype: (float,float)
         '''
@@ -567,12 +1239,129 @@ class Word2VecModelCreator(gensim.models.Word2Vec):
         #vectors_standardized = vectors
         #vectors_standardized_normalized = preprocessing.normalize(vectors_standardized, norm='l2')
         #********
+        if num_landmarks is not None and num_landmarks < len(vectors_standardized):
+            return self.landmark_isomap_reconstruction_error(vectors_standardized, num_dims, num_landmarks)
         isomap = Isomap(n_components=num_dims)
         x_transformed = isomap.fit_transform(vectors_standardized)
         x_transformed.shape
         reconstruction_error = isomap.reconstruction_error()
         return reconstruction_error
     
+    #--------------------------
+    # landmark_isomap_reconstruction_error 
+    #----------------
+    
+    def landmark_isomap_reconstruction_error(self, vectors, num_dims, num_landmarks, n_neighbors=5):
+        '''
+        Isomap reconstruction error, computed the way sklearn's 
+        Isomap.reconstruction_error() does, but for a random
+        sample of landmark points. Geodesics still run over 
+        the neighborhood graph of all points, but only from 
+        the landmarks.
+        
+        @param vectors: standardized course vectors
+        @type vectors: np.array
+        @param num_dims: dimensions of the embedding
+        @type num_dims: int
+        @param num_landmarks: number of landmark points
+        @type num_landmarks: int
+        @param n_neighbors: neighborhood size, as in sklearn's Isomap
+        @type n_neighbors: int
+        @return: reconstruction error of the landmark embedding
+        @rtype: float
+        '''
+        landmarks = np.random.RandomState(23).choice(len(vectors), num_landmarks, replace=False)
+        neighbor_graph = kneighbors_graph(vectors, n_neighbors=n_neighbors, mode='distance')
+        geodesics = dijkstra(neighbor_graph, directed=False, indices=landmarks)[:, landmarks]
+        # Landmarks in different components of the graph: use
+        # the largest finite distance rather than infinity:
+        finite = np.isfinite(geodesics)
+        if not finite.all():
+            geodesics[~finite] = geodesics[finite].max()
+        
+        # Double centering, as for classical MDS on the
+        # isomap kernel:
+        sq_geodesics = geodesics ** 2
+        kernel = -0.5 * (sq_geodesics 
+                         - sq_geodesics.mean(axis=0, keepdims=True) 
+                         - sq_geodesics.mean(axis=1, keepdims=True) 
+                         + sq_geodesics.mean())
+        eigenvalues = np.linalg.eigvalsh(kernel)[-num_dims:]
+        return np.sqrt(np.sum(kernel ** 2) - np.sum(eigenvalues ** 2)) / num_landmarks
+    
+    #--------------------------
+    # compute_diagnostics 
+    #----------------
+    
+    def compute_diagnostics(self, model, num_dims=2, num_landmarks=None, randomized_pca=False, cache_dir=None):
+        '''
+        PCA explained variance ratios and isomap reconstruction
+        error of a model. Both are exact by default. With 
+        num_landmarks, landmark isomap is used; with randomized_pca,
+        the randomized PCA solver.
+        
+        If cache_dir is given, results are kept there, one small
+        JSON file per model fingerprint and parameter combination.
+        A model whose vectors were already diagnosed is not
+        diagnosed again.
+        
+        @param model: trained model
+        @type model: gensim.models.Word2Vec
+        @param num_dims: number of PCA/isomap dimensions
+        @type num_dims: int
+        @param num_landmarks: landmark count; None for exact isomap
+        @type num_landmarks: int
+        @param randomized_pca: whether to use the randomized PCA solver
+        @type randomized_pca: bool
+        @param cache_dir: directory of the diagnostics cache
+        @type cache_dir: str
+        @return: PCA explained variance ratios, and isomap reconstruction error
+        @rtype: ([float], float)
+        '''
+        cache_file = None
+        if cache_dir is not None:
+            cache_file = os.path.join(cache_dir, '%s_dims%s_%s_%s.json' %\
+                                      (self.model_fingerprint(model),
+                                       num_dims,
+                                       'exact' if num_landmarks is None else 'landmarks%s' % num_landmarks,
+                                       'randpca' if randomized_pca else 'pca'))
+            if os.path.exists(cache_file):
+                with open(cache_file, 'r') as cache_fd:
+                    diagnostics = json.load(cache_fd)
+                return (diagnostics['pca_var_explained'], diagnostics['isomap_reconstruction_error'])
+        
+        pca_power = self.compute_pca_explain_power(model, num_dims=num_dims, randomized=randomized_pca)
+        reconstruction_error = self.compute_isomap_explain_power(model, num_dims=num_dims, num_landmarks=num_landmarks)
+        
+        if cache_file is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            # Write, then rename, so that concurrent grid 
+            # workers never see a partial file:
+            tmp_file = cache_file + '.%s.tmp' % os.getpid()
+            with open(tmp_file, 'w') as cache_fd:
+                json.dump({'pca_var_explained' : [float(ratio) for ratio in pca_power],
+                           'isomap_reconstruction_error' : float(reconstruction_error)}, 
+                          cache_fd)
+            os.replace(tmp_file, cache_file)
+        return (pca_power, reconstruction_error)
+    
+    #--------------------------
+    # model_fingerprint 
+    #----------------
+    
+    def model_fingerprint(self, model):
+        '''
+        Content hash of a model's word vectors and vocabulary order.
+        Identical vectors give identical fingerprints, regardless 
+        of the file the model came from.
+        
+        @param model: trained model, or KeyedVectors
+        @type model: {gensim.models.Word2Vec | KeyedVectors}
+        @return: hex digest
+        @rtype: str
+        '''
+        return ModelRegistry.fingerprint(model)
+    
     
     #--------------------------
     # make_filename 
@@ -689,8 +1478,11 @@ class Word2VecModelCreator(gensim.models.Word2Vec):
     # verify_model 
     #----------------
 
-    def verify_model(self, verification_method, topn=4):
+    def verify_model(self, verification_method, topn=4, batched=True):
         '''
+        Unless batched is False, the work is done by the much
+        faster verify_model_batched(). The pairwise version is 
+        kept for reference.
         
         @param verification_method: which of the VerificationMethod to use.
             Choices are TOP_N and RANK. 
@@ -698,12 +1490,17 @@ class Word2VecModelCreator(gensim.models.Word2Vec):
         @param topn: Only needed for TOP_N method: rank within which 
             sibling must be found.
         @type topn: int
+        @param batched: whether to use the matrix based evaluator
+        @type batched: bool
         @return: accuracy as measured by the requested verification method:
             TOP_N: accuracy percentage
             RANK: tuple of mean, median, sdev rank of siblings
         @rtype: {float if TOP_N | (float, float,float) if RANK
         '''
         
+        if batched:
+            return self.verify_model_batched(verification_method, topn=topn)
+        
         if verification_method == VerificationMethods.TOP_N:
             self.topn = topn 
             # Got the dict. Check similarities:
@@ -715,6 +1512,7 @@ class Word2VecModelCreator(gensim.models.Word2Vec):
             self.match_success_probabilities = []
 
             self._loop_through_cross_lists(self.cross_listings_verification_topn_method_helper)
+            self.num_cases = self.num_successes + self.num_failures
       
             # Return the overall accuracy, a percentage of successes of cases:
             return (100 * self.num_successes / self.num_cases)
@@ -730,6 +1528,123 @@ class Word2VecModelCreator(gensim.models.Word2Vec):
         else:
             raise ValueError("Verification method %s does not exist." % verification_method)        
 
+    #--------------------------
+    # verify_model_batched 
+    #----------------
+    
+    # Number of similarity rows computed per matrix multiply;
+    # bounds memory to BATCH_ROWS * vocab size floats:
+    VERIFICATION_BATCH_ROWS = 1024
+    
+    def verify_model_batched(self, verification_method, topn=4):
+        '''
+        Same results as the pairwise verify_model(), but computed
+        from matrices: the word vectors are normalized once. Then
+        the cosine similarities of a whole batch of courses against
+        the vocabulary come from a single matrix multiply.
+        
+        TOP_N: a case succeeds if the reference sibling is among the
+        topn courses most similar to the other sibling, not counting
+        the other sibling itself (as with most_similar()). Found 
+        with argpartition, without sorting the rows. 
+        
+        RANK: the rank of the other sibling among the courses 
+        similar to the reference sibling, as wv.rank() computes it:
+        one plus the number of courses, other than the reference 
+        itself, that are more similar.
+        
+        Pairs whose courses are not in the vocabulary are skipped,
+        like in the pairwise version.
+        
+        @param verification_method: TOP_N or RANK
+        @type verification_method: VerificationMethods
+        @param topn: only needed for TOP_N 
+        @type topn: int
+        @return: TOP_N: accuracy percentage; RANK: mean, median, sdev of ranks
+        @rtype: {float if TOP_N | (float, float,float) if RANK
+        '''
+        if verification_method not in (VerificationMethods.TOP_N, VerificationMethods.RANK):
+            raise ValueError("Verification method %s does not exist." % verification_method)
+        
+        vectors = self.wv.vectors
+        unit_vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        (reference_indices, other_indices, num_missing_references) = self.cross_listing_index_pairs()
+        
+        if verification_method == VerificationMethods.TOP_N:
+            # Similarities are computed from the point of view
+            # of the other sibling:
+            query_indices  = other_indices
+            target_indices = reference_indices
+        else:
+            query_indices  = reference_indices
+            target_indices = other_indices
+            
+        hits  = []
+        ranks = []
+        batch_rows = Word2VecModelCreator.VERIFICATION_BATCH_ROWS
+        for start in range(0, len(query_indices), batch_rows):
+            batch_query  = query_indices[start:start + batch_rows]
+            batch_target = target_indices[start:start + batch_rows]
+            batch_range  = np.arange(len(batch_query))
+            similarities = unit_vectors[batch_query].dot(unit_vectors.T)
+            # A course is never its own neighbor:
+            similarities[batch_range, batch_query] = -np.inf
+            target_similarities = similarities[batch_range, batch_target]
+            
+            if verification_method == VerificationMethods.TOP_N:
+                num_candidates = min(topn, similarities.shape[1] - 1)
+                top_indices = np.argpartition(-similarities, num_candidates - 1, axis=1)[:, :num_candidates]
+                hits.append((top_indices == batch_target[:, None]).any(axis=1))
+            else:
+                ranks.append((similarities > target_similarities[:, None]).sum(axis=1) + 1)
+        
+        if verification_method == VerificationMethods.TOP_N:
+            num_successes = int(np.concatenate(hits).sum()) if len(hits) > 0 else 0
+            # When only the reference course is missing from the vocabulary,
+            # the pairwise version counts a failure:
+            num_cases = len(query_indices) + num_missing_references
+            return 100 * num_successes / num_cases
+        
+        sibling_ranks = np.concatenate(ranks) if len(ranks) > 0 else np.array([])
+        return(np.mean(sibling_ranks), 
+               np.median(sibling_ranks),
+               np.std(sibling_ranks)
+               )
+
+    #--------------------------
+    # cross_listing_index_pairs 
+    #----------------
+    
+    def cross_listing_index_pairs(self):
+        '''
+        Translate the cross listings into parallel arrays of 
+        vocabulary indices: one entry for each (first sibling, other sibling)
+        pair in which both courses are in the vocabulary. 
+        
+        @return: reference sibling indices, other sibling indices, and 
+            the number of pairs in which only the reference course is
+            missing from the vocabulary.
+        @rtype: (np.array(int), np.array(int), int)
+        '''
+        vocab = self.wv.vocab
+        reference_indices = []
+        other_indices     = []
+        num_missing_references = 0
+        for first_sib, other_sibs in self.cross_listings.items():
+            first_sib_entry = vocab.get(first_sib, None)
+            for other_sib in other_sibs:
+                other_sib_entry = vocab.get(other_sib, None)
+                if other_sib_entry is None:
+                    continue
+                if first_sib_entry is None:
+                    num_missing_references += 1
+                    continue
+                reference_indices.append(first_sib_entry.index)
+                other_indices.append(other_sib_entry.index)
+        return (np.array(reference_indices, dtype=int), 
+                np.array(other_indices, dtype=int), 
+                num_missing_references)
+
     #--------------------------
     # cross_listings_verification_rank_method_helper 
     #----------------
@@ -865,6 +1780,280 @@ class Word2VecModelCreator(gensim.models.Word2Vec):
     def logDebug(self, msg):
         logging.debug(msg)
                 
+# -------------------------------------------- MmapSentenceCorpus ------------
+
+class MmapSentenceCorpus(object):
+    '''
+    Re-iterable sentences from a LineSentence style file:
+    one sentence per line, tokens separated by spaces. The
+    file is memory-mapped, so processes that train from the
+    same file share its pages through the OS instead of each
+    holding its own copy of the sentence lists.
+    '''
+    
+    def __init__(self, corpus_file):
+        self.corpus_file = corpus_file
+        self.mmap = None
+        self.num_sentences = None
+        
+    #--------------------------
+    # write_corpus_file 
+    #----------------
+    
+    @classmethod
+    def write_corpus_file(cls, sentences, corpus_file=None):
+        '''
+        Write sentences to a LineSentence style file. 
+        
+        @param sentences: lists of course names
+        @type sentences: [[str]]
+        @param corpus_file: destination; if None, a temp file is created
+        @type corpus_file: str
+        @return: name of the corpus file
+        @rtype: str
+        '''
+        if corpus_file is None:
+            corpus_fd = tempfile.NamedTemporaryFile('w', prefix='word2vec_corpus', 
+                                                    suffix='.txt', dir='/tmp', delete=False)
+        else:
+            corpus_fd = open(corpus_file, 'w')
+        with corpus_fd:
+            for sentence in sentences:
+                corpus_fd.write(' '.join(sentence) + '\n')
+        return corpus_fd.name
+            
+    def __iter__(self):
+        if self.mmap is None:
+            with open(self.corpus_file, 'rb') as fd:
+                self.mmap = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+        # Keep the position local, so concurrent 
+        # iterations don't disturb each other:
+        start = 0
+        size  = len(self.mmap)
+        while start < size:
+            end = self.mmap.find(b'\n', start)
+            if end == -1:
+                end = size
+            sentence = self.mmap[start:end].decode('utf-8').split()
+            start = end + 1
+            if len(sentence) > 0:
+                yield sentence
+                
+    def __len__(self):
+        if self.num_sentences is None:
+            self.num_sentences = sum(1 for _sentence in self)
+        return self.num_sentences
+
+    def __getstate__(self):
+        # Mmaps don't pickle; the unpickled copy re-maps:
+        state = self.__dict__.copy()
+        state['mmap'] = None
+        return state
+
+# -------------------------------------------- UpdateSentences ------------
+
+class UpdateSentences(object):
+    '''
+    Re-iterable training sentences of update_model(): all
+    new sentences, followed by a random sample of the replay 
+    sentences. Both are streamed. The sample is drawn with the
+    same seed on every pass, so the vocabulary scan and all
+    epochs see the same sentences. After each complete pass,
+    num_new_sentences and num_replay_sentences hold the counts.
+    '''
+    
+    def __init__(self, new_sentences, replay_sentences=None, replay_fraction=0.1, seed=None):
+        '''
+        @param new_sentences: sentences of new or changed students
+        @type new_sentences: {[[str]] | CourseSentenceCorpus}
+        @param replay_sentences: sentences from which to sample the replay; None for no replay
+        @type replay_sentences: {[[str]] | CourseSentenceCorpus | None}
+        @param replay_fraction: probability with which each replay sentence is used
+        @type replay_fraction: float
+        @param seed: seed of the replay sample; default: a random one
+        @type seed: int
+        '''
+        self.new_sentences    = new_sentences
+        self.replay_sentences = replay_sentences
+        self.replay_fraction  = replay_fraction
+        self.seed = random.randrange(2**32) if seed is None else seed
+        self.num_new_sentences    = None
+        self.num_replay_sentences = None
+        
+    def __iter__(self):
+        num_new_sentences = 0
+        for sentence in self.new_sentences:
+            num_new_sentences += 1
+            yield sentence
+        num_replay_sentences = 0
+        if self.replay_sentences is not None:
+            sampler = random.Random(self.seed)
+            for sentence in self.replay_sentences:
+                if sampler.random() < self.replay_fraction:
+                    num_replay_sentences += 1
+                    yield sentence
+        self.num_new_sentences    = num_new_sentences
+        self.num_replay_sentences = num_replay_sentences
+
+# -------------------------------------------- EpochCheckpointer ------------
+
+class EpochCheckpointer(CallbackAny2Vec):
+    '''
+    Gensim training callback used by create_model_resumable().
+    At the end of each epoch: 
+    
+       o saves the model as checkpoint_epoch<n>.model, and records
+         the epoch in checkpoint_state.json. Only then is the previous
+         checkpoint deleted, so a crash at any point leaves one
+         usable checkpoint.
+       o appends loss, wall time, and words/sec of the epoch
+         to epoch_metrics.jsonl
+       o optionally scores the model with the cross-listing 
+         verification, keeps the best model as best.model, and 
+         requests an early stop after patience epochs without
+         improvement.
+    '''
+    
+    STATE_FILE   = 'checkpoint_state.json'
+    METRICS_FILE = 'epoch_metrics.jsonl'
+    BEST_FILE    = 'best.model'
+    
+    def __init__(self, creator, checkpoint_dir, max_epochs, verification_method=None, patience=2, topn=4):
+        '''
+        @param creator: creator whose verification is used for scoring
+        @type creator: Word2VecModelCreator
+        @param checkpoint_dir: where checkpoints and metrics go
+        @type checkpoint_dir: str
+        @param max_epochs: epochs over which the learning rate decays
+        @type max_epochs: int
+        @param verification_method: TOP_N or RANK; None: no scoring, no early stop
+        @type verification_method: VerificationMethods
+        @param patience: epochs without improvement before stopping early
+        @type patience: int
+        @param topn: only needed for TOP_N
+        @type topn: int
+        '''
+        self.creator = creator
+        self.checkpoint_dir = checkpoint_dir
+        self.max_epochs = max_epochs
+        self.verification_method = verification_method
+        self.patience = patience
+        self.topn = topn
+        
+        self.epochs_done = 0
+        self.checkpoint_file = None
+        self.best_score  = None
+        self.best_epoch  = None
+        self.stop_requested = False
+        
+    def on_epoch_begin(self, model):
+        self.epoch_start_time = time.time()
+        
+    def on_epoch_end(self, model):
+        self.epochs_done += 1
+        epoch_secs = time.time() - self.epoch_start_time
+        epoch_metrics = {'epoch' : self.epochs_done,
+                         'loss' : model.get_latest_training_loss(),
+                         'secs' : epoch_secs,
+                         'words_per_sec' : model.corpus_total_words / epoch_secs if epoch_secs > 0 else None,
+                         'time' : time.strftime("%Y-%m-%d_%H_%M_%S")
+                         }
+        
+        if self.verification_method is not None:
+            score = self.creator.halving_score(model, self.verification_method, self.topn)
+            epoch_metrics['score'] = score
+            if self.best_score is None or score > self.best_score:
+                self.best_score = score
+                self.best_epoch = self.epochs_done
+                model.save(os.path.join(self.checkpoint_dir, EpochCheckpointer.BEST_FILE))
+            elif self.epochs_done - self.best_epoch >= self.patience:
+                self.stop_requested = True
+        
+        self.save_checkpoint(model)
+        with open(os.path.join(self.checkpoint_dir, EpochCheckpointer.METRICS_FILE), 'a') as metrics_fd:
+            metrics_fd.write(json.dumps(epoch_metrics) + '\n')
+            
+    def save_checkpoint(self, model):
+        prev_checkpoint_file = self.checkpoint_file
+        self.checkpoint_file = os.path.join(self.checkpoint_dir, 'checkpoint_epoch%s.model' % self.epochs_done)
+        model.save(self.checkpoint_file)
+        state_file = os.path.join(self.checkpoint_dir, EpochCheckpointer.STATE_FILE)
+        with open(state_file + '.tmp', 'w') as state_fd:
+            json.dump({'epochs_done' : self.epochs_done,
+                       'checkpoint_file' : self.checkpoint_file,
+                       'best_score' : self.best_score,
+                       'best_epoch' : self.best_epoch,
+                       'schedule_alpha' : model.schedule_alpha,
+                       'schedule_min_alpha' : model.schedule_min_alpha,
+                       'max_epochs' : self.max_epochs}, state_fd)
+        os.replace(state_file + '.tmp', state_file)
+        if prev_checkpoint_file is not None:
+            # Gensim may have put large arrays into companion files:
+            for file_name in os.listdir(self.checkpoint_dir):
+                if file_name.startswith(os.path.basename(prev_checkpoint_file)):
+                    os.remove(os.path.join(self.checkpoint_dir, file_name))
+                    
+    def load_checkpoint(self):
+        '''
+        Return the model of the last completed epoch, or None
+        if there is no checkpoint. Restores the epoch count, the
+        learning rate schedule, and the early stopping state.
+        
+        Checks that the checkpoint ends where an uninterrupted
+        run would be after the same number of epochs: Word2Vec.train()
+        leaves the end alpha of the last epoch in model.min_alpha.
+        
+        @raise ValueError: if the checkpoint was written by a run 
+            with a different number of epochs, or its learning rate
+            is off the schedule
+        '''
+        state_file = os.path.join(self.checkpoint_dir, EpochCheckpointer.STATE_FILE)
+        if not os.path.exists(state_file):
+            return None
+        with open(state_file, 'r') as state_fd:
+            state = json.load(state_fd)
+        if state['max_epochs'] != self.max_epochs:
+            raise ValueError("Checkpoint in %s is of a run with %s epochs, not %s; resuming would change the learning rate schedule." %\
+                             (self.checkpoint_dir, state['max_epochs'], self.max_epochs))
+        self.epochs_done     = state['epochs_done']
+        self.checkpoint_file = state['checkpoint_file']
+        self.best_score      = state['best_score']
+        self.best_epoch      = state['best_epoch']
+        model = Word2Vec.load(self.checkpoint_file)
+        model.schedule_alpha     = state['schedule_alpha']
+        model.schedule_min_alpha = state['schedule_min_alpha']
+        
+        (_start_alpha, end_alpha) = self.creator.scheduled_alphas(model, 
+                                                                   self.epochs_done - 1, 
+                                                                   self.epochs_done, 
+                                                                   self.max_epochs)
+        if not math.isclose(model.min_alpha, end_alpha, rel_tol=1e-9, abs_tol=1e-12):
+            raise ValueError("Checkpoint %s ends at alpha %s; an uninterrupted run would be at %s after epoch %s." %\
+                             (self.checkpoint_file, model.min_alpha, end_alpha, self.epochs_done))
+        return model
+    
+    def load_best(self):
+        return Word2Vec.load(os.path.join(self.checkpoint_dir, EpochCheckpointer.BEST_FILE))
+
+# -------------------------------------------- Grid Search Workers ------------
+
+# State of one optimize_model() pool worker process:
+_grid_worker = {}
+
+def _init_grid_worker(corpus_file, train_workers):
+    '''
+    Pool initializer: create the per-process model creator,
+    and memory-map the shared corpus file.
+    '''
+    _grid_worker['creator'] = Word2VecModelCreator(action=None)
+    _grid_worker['corpus']  = MmapSentenceCorpus(corpus_file)
+    _grid_worker['train_workers'] = train_workers
+    
+def _evaluate_grid_point_in_worker(args):
+    creator = _grid_worker['creator']
+    return creator.evaluate_grid_point(_grid_worker['corpus'], *args, 
+                                       workers=_grid_worker['train_workers'])
+
 # -------------------------------------------- CrossRegistrationTestResult Classes and Subclasses ------------                
                 
 class CrossRegistrationTestResult(object):
@@ -893,6 +2082,8 @@ class CrossRegistrationTestResult(object):
         self.num_cross_registrations = num_cross_list_sets
         self.pca_var_ration_explained = (0.0)
         self.reconstruction_error = -1.0
+        self.isomap_landmarks = None
+        self.randomized_pca   = False
         
     def add_pca_power(self, pca_var_ratio_explained_arr):
         '''
@@ -908,6 +2099,18 @@ class CrossRegistrationTestResult(object):
         
     def add_isomap_reconstruction_error(self, reconstruction_error):
         self.reconstruction_error = reconstruction_error
+        
+    def add_diagnostics_settings(self, isomap_landmarks, randomized_pca):
+        '''
+        Record how the PCA and isomap numbers were computed.
+        
+        @param isomap_landmarks: landmarks of the isomap diagnostic; None if exact
+        @type isomap_landmarks: {int | None}
+        @param randomized_pca: whether the PCA used the randomized solver
+        @type randomized_pca: bool
+        '''
+        self.isomap_landmarks = isomap_landmarks
+        self.randomized_pca   = randomized_pca
 
 class CrossRegistrationTopNResult(CrossRegistrationTestResult):
         
@@ -923,19 +2126,18 @@ class CrossRegistrationTopNResult(CrossRegistrationTestResult):
             sibling had to appear.
         @type topn: int
         '''
-        super(CrossRegistrationTestResult).__init__(*args)
+        super().__init__(*args)
         self.topn = topn
         self.accuracy = accuracy
         
     def __str__(self):
-        printable = 'Test: topn-%s, vec-%s, win-%s, accuracy-%s num-compares-%s, ' +\
-                    'num-registrations-%s\nprob-when_successful-%s,' +\
-                    'pca_explained_var_ratio-%s' +\
-                    'isomap_reconstruction_error-%s' \
+        printable = ('Test: topn-%s, vec-%s, win-%s, accuracy-%s num-compares-%s, ' +\
+                     'num-registrations-%s, pca_explained_var_ratio-%s, ' +\
+                     'isomap_reconstruction_error-%s, isomap_landmarks-%s, randomized_pca-%s') \
                     %\
-            (self.topn, self.vec_size, self.win_size, self.accuracy, self.num_comparisons, self.num_cross_list_sets,
-             self.success_probabilities, str(self.pca_var_ratio_explained),
-             self.reconstruction_error)
+            (self.topn, self.vec_size, self.win_size, self.accuracy, self.num_comparisons, self.num_cross_registrations,
+             str(self.pca_var_ration_explained), self.reconstruction_error,
+             'exact' if self.isomap_landmarks is None else self.isomap_landmarks, self.randomized_pca)
         return printable
         
 class CrossRegistrationRankResult(CrossRegistrationTestResult):
@@ -949,15 +2151,18 @@ class CrossRegistrationRankResult(CrossRegistrationTestResult):
         self.args = args
         
     def __str__(self):
-        printable = 'vecdim,winsize,mean_rank,median_rank,sd_rank,pca_var_explained,isomap_reconstruction_error\n'
-        printable += '%d,%d,%.1f,%.1f,%.1f,(%.2f,%.2f),%.2f' % (self.vec_size, 
+        printable = 'vecdim,winsize,mean_rank,median_rank,sd_rank,pca_var_explained,isomap_reconstruction_error,' +\
+                    'isomap_landmarks,randomized_pca\n'
+        printable += '%d,%d,%.1f,%.1f,%.1f,(%.2f,%.2f),%.2f,%s,%s' % (self.vec_size, 
                                                self.win_size, 
                                                self.mean_rank,
                                                self.median_rank,
                                                self.sd_rank,
                                                self.pca_var_ration_explained[0],
                                                self.pca_var_ration_explained[1],
-                                               self.reconstruction_error
+                                               self.reconstruction_error,
+                                               'exact' if self.isomap_landmarks is None else self.isomap_landmarks,
+                                               self.randomized_pca
                                                )
         return printable
     
@@ -970,7 +2175,7 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(prog=os.path.basename(sys.argv[0]), formatter_class=argparse.RawTextHelpFormatter)
     parser.add_argument('-a', '--action',
                         type=str,
-                        choices=['create_model', 'load_model', 'load_vectors', 'save_model', 'evaluate', 'optimize_model', 'create_sentences_file'],
+                        choices=['create_model', 'update_model', 'load_model', 'load_vectors', 'save_model', 'evaluate', 'optimize_model', 'create_sentences_file', 'export_bundle'],
                         help="what you want the program to do.", 
                         default=None);
     parser.add_argument('-f', '--file',
@@ -992,6 +2197,61 @@ if __name__ == '__main__':
                         help="Name of academic careers to include (e.g. UG, MED, LAW). Use multiple times as needed. \n" +
                              "If left out, all careers are included.",
                         default=None);
+    parser.add_argument('--base_model',
+                        help='for update_model: the model to update with the enrollments in --file (a .sqlite db).\n' +\
+                             'Students with enrollments in --low_strm or later are used.',
+                        default=None);
+    parser.add_argument('--replay_file',
+                        help='for update_model: sentences file (e.g. the original training set) to sample replay sentences from',
+                        default=None);
+    parser.add_argument('--replay_fraction',
+                        type=float,
+                        help='for update_model: fraction of --replay_file sentences mixed into the update. Default: 0.1',
+                        default=0.1);
+    parser.add_argument('--corpus_file',
+                        action='store_true',
+                        help='for create_model: the file is a LineSentence format sentences file (space separated);\n' +\
+                             'train from it in gensim corpus_file mode, which scales with --threads.',
+                        default=False);
+    parser.add_argument('--checkpoint_dir',
+                        help='for create_model: train epoch by epoch with checkpoints and an epoch metrics log\n' +\
+                             'in this directory; resumes from an existing checkpoint there.',
+                        default=None);
+    parser.add_argument('--epochs',
+                        type=int,
+                        help='for create_model with --checkpoint_dir: maximum number of epochs. Default: 10',
+                        default=10);
+    parser.add_argument('--early_stop',
+                        type=int,
+                        help='for create_model with --checkpoint_dir: stop when the cross-listing rank\n' +\
+                             'has not improved for this many epochs. Default: no early stop',
+                        default=None);
+    parser.add_argument('--threads',
+                        type=int,
+                        help='number of gensim training threads for create_model. Default: 10',
+                        default=10);
+    parser.add_argument('--search',
+                        choices=['grid', 'halving'],
+                        help='optimize_model strategy: full grid, or successive halving. Default: grid',
+                        default='grid');
+    parser.add_argument('--registry',
+                        nargs='?',
+                        const=ModelRegistry.DEFAULT_DB_FILE,
+                        help='optimize_model: record models in this model registry db, and skip\n' +\
+                             'configurations it already holds. Without value: %s' % ModelRegistry.DEFAULT_DB_FILE,
+                        default=None);
+    parser.add_argument('--landmarks',
+                        type=int,
+                        help='optimize_model: landmarks for an approximate isomap diagnostic. Default: exact isomap',
+                        default=None);
+    parser.add_argument('--randomized_pca',
+                        action='store_true',
+                        help='optimize_model: use the randomized solver for the PCA diagnostic. Default: exact PCA',
+                        default=False);
+    parser.add_argument('--workers',
+                        type=int,
+                        help='number of processes among which to distribute the optimize_model grid. Default: 1',
+                        default=1);
     parser.add_argument('--hasHeader',
                         type=int,                        
                         help='whether action file has a column name header (relevant for .csv files): 1/0. Default: 0',
@@ -1009,8 +2269,10 @@ if __name__ == '__main__':
         model_filename   = args.file
     
     # Be on the save side: if the requested save destination
-    # exists and is not empty, balk:
-    if args.savefile is not None and os.path.exists(args.savefile) and os.stat(args.savefile).st_size > 0:
+    # exists and is not empty, balk. Except for optimize_model,
+    # which resumes from the combinations already in the file:
+    if args.savefile is not None and os.path.exists(args.savefile) and os.stat(args.savefile).st_size > 0 \
+        and args.action != 'optimize_model':
         raise ValueError("Savefile '%s' exists; please remove it first." % args.savefile)
     
     # Create filename in same dir as model, but w/ extension .vectors:
@@ -1028,18 +2290,58 @@ if __name__ == '__main__':
         if args.savefile is None:
             raise ValueError("Must provide filename for saving the model model creation.")
         
-        wordvec_creator = Word2VecModelCreator(
-            action=Action.CREATE_MODEL, 
-            actionFileName=args.file,
-            saveFileName=args.savefile,
-            hasHeader=True if not args.file.endswith('.sqlite') else False,
-            low_strm=args.low_strm,
-            high_strm=args.high_strm,
-            acad_careers=args.acad_career
-            )
+        if args.corpus_file:
+            wordvec_creator.model = wordvec_creator.create_model(None, 
+                                                                 workers=args.threads, 
+                                                                 corpus_file=args.file)
+            (wordvec_creator.model_filename, wordvec_creator.wv_filename) = wordvec_creator.save(args.savefile)
+        elif args.checkpoint_dir is not None:
+            if args.file.endswith('.sqlite'):
+                sentences = wordvec_creator.create_course_sentences(args.file,
+                                                                    low_strm=args.low_strm,
+                                                                    high_strm=args.high_strm,
+                                                                    acad_careers=args.acad_career,
+                                                                    stream=True)
+            else:
+                sentences = wordvec_creator.load_sentences(args.file, hasHeader=True)
+            wordvec_creator.model = wordvec_creator.create_model_resumable(
+                sentences,
+                args.checkpoint_dir,
+                epochs=args.epochs,
+                workers=args.threads,
+                verification_method=None if args.early_stop is None else VerificationMethods.RANK,
+                patience=args.early_stop)
+            (wordvec_creator.model_filename, wordvec_creator.wv_filename) = wordvec_creator.save(args.savefile)
+        else:
+            wordvec_creator = Word2VecModelCreator(
+                action=Action.CREATE_MODEL, 
+                actionFileName=args.file,
+                saveFileName=args.savefile,
+                hasHeader=True if not args.file.endswith('.sqlite') else False,
+                low_strm=args.low_strm,
+                high_strm=args.high_strm,
+                acad_careers=args.acad_career
+                )
         print("Model file: '%s';\nVector file: '%s'" % (wordvec_creator.model_filename,
                                                         wordvec_creator.wv_filename)
                                                         )
+    elif args.action == 'update_model':
+        if args.base_model is None or args.file is None or not args.file.endswith('.sqlite'):
+            raise ValueError("Must provide --base_model, and a .sqlite enrollment db via --file for update_model.")
+        if args.low_strm is None:
+            raise ValueError("Must provide --low_strm: the first strm whose enrollments are new.")
+        new_sentences = CourseSentenceCorpus(args.file, 
+                                             changed_since_strm=args.low_strm,
+                                             acad_careers=args.acad_career)
+        replay_sentences = None if args.replay_file is None \
+            else CourseSentenceCorpus(args.replay_file, separator=' ')
+        (model_filename, wv_filename) = wordvec_creator.update_model(args.base_model,
+                                                                     new_sentences,
+                                                                     replay_sentences=replay_sentences,
+                                                                     replay_fraction=args.replay_fraction,
+                                                                     saveFileName=args.savefile,
+                                                                     new_sentences_source='%s, strm >= %s' % (args.file, args.low_strm))
+        print("Model file: '%s';\nVector file: '%s'" % (model_filename, wv_filename))
     elif args.action == 'load_model':
         wordvec_creator = Word2VecModelCreator(
             action=Action.LOAD_MODEL, 
@@ -1063,17 +2365,44 @@ if __name__ == '__main__':
         wordvec_creator = Word2VecModelCreator(action=Action.OPTIMIZE_MODEL, 
                                                actionFileName=args.file,
                                                hasHeader=True)
-        res_objs = wordvec_creator.optimize_model(VerificationMethods.RANK,
-                                                  grid_results_save_file_name=args.savefile,
-                                                  vector_sizes = [64, 128, 256, 512],
-                                                  #window_sizes = [2, 5, 10, 15, 20, 25]
-                                                  window_sizes = [10],
-                                                  num_low_dims=2
-                                                  )
+        registry = None if args.registry is None else ModelRegistry(args.registry)
+        if args.search == 'halving':
+            res_objs = [wordvec_creator.optimize_model_successive_halving(VerificationMethods.RANK,
+                                                                          grid_results_save_file_name=args.savefile,
+                                                                          vector_sizes = [64, 128, 256, 512],
+                                                                          window_sizes = [2, 5, 10, 15, 20, 25],
+                                                                          num_low_dims=2,
+                                                                          num_landmarks=args.landmarks,
+                                                                          randomized_pca=args.randomized_pca,
+                                                                          registry=registry
+                                                                          )]
+        else:
+            res_objs = wordvec_creator.optimize_model(VerificationMethods.RANK,
+                                                      grid_results_save_file_name=args.savefile,
+                                                      vector_sizes = [64, 128, 256, 512],
+                                                      #window_sizes = [2, 5, 10, 15, 20, 25]
+                                                      window_sizes = [10],
+                                                      num_low_dims=2,
+                                                      num_workers=args.workers,
+                                                      num_landmarks=args.landmarks,
+                                                      randomized_pca=args.randomized_pca,
+                                                      registry=registry
+                                                      )
     
     
         print('Results are in %s' % args.savefile)
 
+    elif args.action == 'export_bundle':
+        # Bundle for a model that was saved before bundles existed:
+        if args.file is None or not os.path.exists(args.file):
+            raise ValueError("Must provide the .model or .vectors file to export.")
+        if args.file.endswith('.model'):
+            wv = Word2Vec.load(args.file).wv
+        else:
+            wv = KeyedVectors.load(args.file)
+        (matrix_file, vocab_file) = export_vector_bundle(wv, args.file)
+        print("Bundle files: '%s' and '%s'" % (matrix_file, vocab_file))
+        
     elif args.action == 'create_sentences_file':
         if args.file is None or not os.path.exists(args.file):
             raise ValueError("Must provide .csv with student ID, course, major, and strm.")
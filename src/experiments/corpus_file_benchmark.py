@@ -0,0 +1,148 @@
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+
+Compare course2vec training throughput of the two ways
+to feed gensim:
+
+   o iterable: sentences held in memory as lists, handed
+               to worker threads by a single producer thread,
+               and therefore limited by the GIL
+   o corpus_file: each worker thread reads its own section of
+               a LineSentence format file
+
+Both are timed for each of a list of thread counts. Output
+is a CSV table on stdout:
+
+    mode,threads,secs,words_per_sec,speedup_vs_iterable
+
+The two modes of create_model() train different numbers of
+epochs (see EPOCHS_TRAINED), so the speedup compares words/sec
+rather than wall time.
+'''
+
+import argparse
+import os
+import sys
+import time
+
+from course2vec.sentence_corpus import CourseSentenceCorpus, CorpusContent
+from course2vec.word2vec_model_creation import Word2VecModelCreator
+
+
+class CorpusFileBenchmark(object):
+    '''
+    Times Word2VecModelCreator.create_model() in both
+    input modes on the same LineSentence file.
+    '''
+
+    # Epochs trained by create_model() per mode. With sentences,
+    # the Word2Vec constructor trains gensim's default 5 epochs,
+    # and create_model() 10 more. With a corpus_file, the
+    # vocabulary is built without training, then 10 epochs run:
+    EPOCHS_TRAINED = {'iterable' : 5 + 10,
+                      'corpus_file' : 10}
+
+    #--------------------------
+    # __init__
+    #----------------
+
+    def __init__(self, line_sentence_file, vec_size=150, win_size=10):
+        '''
+        @param line_sentence_file: training sentences, one per line,
+            course names separated by spaces
+        @type line_sentence_file: str
+        @param vec_size: vector size of the trained models
+        @type vec_size: int
+        @param win_size: window size of the trained models
+        @type win_size: int
+        '''
+        if not os.path.exists(line_sentence_file):
+            raise ValueError("Sentence file '%s' does not exist." % line_sentence_file)
+        self.line_sentence_file = line_sentence_file
+        self.vec_size = vec_size
+        self.win_size = win_size
+        self.creator  = Word2VecModelCreator(action=None)
+
+        # Materialize once, so that the iterable path is
+        # timed at its best, without file reading:
+        self.sentences = list(CourseSentenceCorpus(line_sentence_file,
+                                                   content=CorpusContent.SENTENCES,
+                                                   separator=' '))
+
+    #--------------------------
+    # run
+    #----------------
+
+    def run(self, thread_counts, out_fd=sys.stdout):
+        '''
+        Train in both modes for each thread count, and
+        write one CSV line per run to out_fd.
+
+        @param thread_counts: numbers of gensim worker threads to try
+        @type thread_counts: [int]
+        @return: {(mode, threads) : secs}
+        @rtype: {(str,int) : float}
+        '''
+        timings = {}
+        words_per_sec = {}
+        out_fd.write('mode,threads,secs,words_per_sec,speedup_vs_iterable\n')
+        for threads in thread_counts:
+            for mode in ('iterable', 'corpus_file'):
+                start_time = time.time()
+                if mode == 'iterable':
+                    model = self.creator.create_model(self.sentences,
+                                                      vec_size=self.vec_size,
+                                                      win_size=self.win_size,
+                                                      workers=threads)
+                else:
+                    model = self.creator.create_model(None,
+                                                      vec_size=self.vec_size,
+                                                      win_size=self.win_size,
+                                                      workers=threads,
+                                                      corpus_file=self.line_sentence_file)
+                secs = time.time() - start_time
+                timings[(mode, threads)] = secs
+                words_trained = model.corpus_total_words * CorpusFileBenchmark.EPOCHS_TRAINED[mode]
+                words_per_sec[(mode, threads)] = words_trained / secs
+                out_fd.write('%s,%s,%.1f,%.0f,%.2f\n' % (mode,
+                                                         threads,
+                                                         secs,
+                                                         words_per_sec[(mode, threads)],
+                                                         words_per_sec[(mode, threads)] / words_per_sec[('iterable', threads)]))
+                out_fd.flush()
+        return timings
+
+# -------------------------------------------- Main -------------------------
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog=os.path.basename(sys.argv[0]),
+                                     formatter_class=argparse.RawTextHelpFormatter,
+                                     description="Iterable vs. corpus_file course2vec training throughput."
+                                     )
+    parser.add_argument('-t', '--threads',
+                        type=int,
+                        nargs='+',
+                        help='gensim worker thread counts to time; default: 1 2 4 8 16 32',
+                        default=[1, 2, 4, 8, 16, 32]
+                        )
+    parser.add_argument('-v', '--vecsize',
+                        type=int,
+                        help='vector size; default: 150',
+                        default=150
+                        )
+    parser.add_argument('-w', '--winsize',
+                        type=int,
+                        help='window size; default: 10',
+                        default=10
+                        )
+    parser.add_argument('sentencefile',
+                        help='LineSentence format training file, e.g. as created by create_sentences.py'
+                        )
+
+    args = parser.parse_args();
+
+    CorpusFileBenchmark(args.sentencefile,
+                        vec_size=args.vecsize,
+                        win_size=args.winsize).run(args.threads)
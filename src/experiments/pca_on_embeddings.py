@@ -24,6 +24,8 @@ import numpy as np
 import pandas as pd
 from utils.constants import majors
 from utils.course_info_collector import CourseInfoCollector
+from course2vec.model_registry import ModelRegistry
+from course2vec.vector_bundle import VectorBundle, bundle_is_current
 #from pandas.util.testing import capture_stdout
 from sklearn.metrics.regression import explained_variance_score
 
@@ -348,6 +350,11 @@ class DimReducerSimple(object):
     #----------------
 
     def load_vectors(self, vectors_path):
+        # Fastest: a memory-mapped vector bundle next to
+        # the model or vectors file:
+        if bundle_is_current(vectors_path):
+            vectors = VectorBundle.load(vectors_path)
+            return pd.DataFrame(np.asarray(vectors.vectors), index=vectors.index2word)
         # Just in case they passed a model:
         if vectors_path.endswith('.model'):
             model = Word2Vec.load(vectors_path)
@@ -1330,11 +1337,21 @@ if __name__ == '__main__':
                         help='Range where to explore k for kmeans: 2 numbers, excl. top number. Default [2-11)',
                         default=[2,11]
                         )
+    parser.add_argument('-b', '--bestby',
+                        help="instead of a vectors file, use the model registry's best model by this metric, e.g. mean_rank",
+                        default=None
+                        )
     parser.add_argument('vectors',
+                        nargs='?',
                         help='file with vector embeddings.'
                         )
 
     args = parser.parse_args();
+    
+    if args.vectors is None:
+        if args.bestby is None:
+            parser.error('Need a vectors file, or --bestby.')
+        args.vectors = ModelRegistry().best_model(args.bestby)['vectors_file']
 
     # Turn the kmeans range into a Python 3 range iterator:    
     krange = range(args.krange[0], args.krange[1])
@@ -0,0 +1,159 @@
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+
+Memory and recall of quantized course vectors compared with
+the exact float32 vectors of a model. For each encoding the
+output has one CSV line:
+
+    encoding,bytes,compression,recall_at_k,cross_list_hits_at_k
+
+   o recall_at_k:          fraction of the exact top-k neighbors of sampled
+                           courses that the encoding also puts in its top-k
+   o cross_list_hits_at_k: fraction of cross-listed (course, sibling) pairs
+                           with the sibling among the course's top-k. This is
+                           the ground truth used for model verification in
+                           word2vec_model_creation.py
+'''
+
+import argparse
+import os
+import sys
+
+from gensim.models import KeyedVectors
+
+import numpy as np
+
+from course2vec.quantized_vectors import Int8Vectors, PqVectors, unit_rows
+from course2vec.word2vec_model_creation import Word2VecModelCreator
+
+
+class QuantizationBenchmark(object):
+    '''
+    Compares exact, int8, and product quantized
+    similarity search on one vectors file.
+    '''
+
+    #--------------------------
+    # __init__
+    #----------------
+
+    def __init__(self, vectors_file, topn=10, num_queries=500, seed=1):
+        '''
+        @param vectors_file: KeyedVectors file of a model
+        @type vectors_file: str
+        @param topn: k of the recall measures
+        @type topn: int
+        @param num_queries: number of courses sampled for recall_at_k
+        @type num_queries: int
+        @param seed: random seed of the sampling
+        @type seed: int
+        '''
+        if not os.path.exists(vectors_file):
+            raise ValueError("Vectors file '%s' does not exist." % vectors_file)
+        self.wv    = KeyedVectors.load(vectors_file)
+        self.topn  = topn
+        self.unit_vectors = unit_rows(self.wv.vectors)
+
+        rng = np.random.RandomState(seed)
+        num_vectors = self.unit_vectors.shape[0]
+        self.query_ids = rng.choice(num_vectors, min(num_queries, num_vectors), replace=False)
+
+        # The creator loads the cross listings:
+        creator = Word2VecModelCreator(action=None)
+        creator.wv = self.wv
+        (self.cross_list_refs, self.cross_list_sibs, _num_missing) = creator.cross_listing_index_pairs()
+
+    #--------------------------
+    # exact_top_ids
+    #----------------
+
+    def exact_top_ids(self, query_id):
+        similarities = self.unit_vectors @ self.unit_vectors[query_id]
+        similarities[query_id] = -np.inf
+        return np.argsort(-similarities)[:self.topn]
+
+    #--------------------------
+    # approx_top_ids
+    #----------------
+
+    def approx_top_ids(self, encoding, query_id):
+        (ids, _similarities) = encoding.search(self.unit_vectors[query_id], self.topn + 1)
+        return ids[ids != query_id][:self.topn]
+
+    #--------------------------
+    # evaluate
+    #----------------
+
+    def evaluate(self, encoding):
+        '''
+        @param encoding: quantized vectors, or None for the exact vectors
+        @type encoding: {QuantizedVectors | None}
+        @return: recall_at_k and cross_list_hits_at_k
+        @rtype: (float, float)
+        '''
+        top_ids = (lambda query_id: self.exact_top_ids(query_id)) if encoding is None \
+            else (lambda query_id: self.approx_top_ids(encoding, query_id))
+
+        hits = 0
+        for query_id in self.query_ids:
+            hits += len(set(self.exact_top_ids(query_id)).intersection(top_ids(query_id)))
+        recall = hits / (len(self.query_ids) * self.topn)
+
+        cross_list_hits = 0
+        for ref_id, sib_id in zip(self.cross_list_refs, self.cross_list_sibs):
+            if sib_id in top_ids(ref_id):
+                cross_list_hits += 1
+        cross_list_rate = cross_list_hits / max(1, len(self.cross_list_refs))
+        return (recall, cross_list_rate)
+
+    #--------------------------
+    # run
+    #----------------
+
+    def run(self, num_subspaces_list, out_fd=sys.stdout):
+        '''
+        Evaluate exact and int8 search, and product
+        quantization for each number of subspaces.
+
+        @param num_subspaces_list: PQ subspace counts, i.e. bytes per vector
+        @type num_subspaces_list: [int]
+        '''
+        exact_bytes = self.wv.vectors.astype(np.float32).nbytes
+        encodings = [('float32', None), ('int8', Int8Vectors(self.wv.vectors, self.wv.index2word))]
+        for num_subspaces in num_subspaces_list:
+            encodings.append(('pq%s' % num_subspaces,
+                              PqVectors(self.wv.vectors, self.wv.index2word, num_subspaces=num_subspaces)))
+
+        out_fd.write('encoding,bytes,compression,recall_at_%s,cross_list_hits_at_%s\n' % (self.topn, self.topn))
+        for name, encoding in encodings:
+            num_bytes = exact_bytes if encoding is None else encoding.nbytes()
+            (recall, cross_list_rate) = self.evaluate(encoding)
+            out_fd.write('%s,%s,%.1f,%.3f,%.3f\n' % (name, num_bytes, exact_bytes / num_bytes, recall, cross_list_rate))
+            out_fd.flush()
+
+# -------------------------------------------- Main -------------------------
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog=os.path.basename(sys.argv[0]),
+                                     formatter_class=argparse.RawTextHelpFormatter,
+                                     description="Memory and recall of int8 and product quantized course vectors."
+                                     )
+    parser.add_argument('-k', '--topn',
+                        type=int,
+                        help='k of recall@k; default: 10',
+                        default=10
+                        )
+    parser.add_argument('-m', '--subspaces',
+                        type=int,
+                        nargs='+',
+                        help='product quantization subspace counts; default: 10 15 25 50',
+                        default=[10, 15, 25, 50]
+                        )
+    parser.add_argument('vectorsfile',
+                        help='KeyedVectors file as saved by word2vec_model_creation.py'
+                        )
+    args = parser.parse_args();
+
+    QuantizationBenchmark(args.vectorsfile, topn=args.topn).run(args.subspaces)
@@ -3,9 +3,125 @@ Created on Aug 21, 2018
 
 @author: paepcke
 '''
+import itertools
+import os
+import time
+
 
-        
 class Message(object):
-    def __init__(self, msg_code, state=None):
+    
+    # Source of process-unique message sequence numbers:
+    _seq_nums = itertools.count(1)
+    
+    def __init__(self, msg_code, state=None, correlation_id=None, traced=False):
+        '''
+        Every message gets an id that is unique across processes,
+        and a creation timestamp. Replies set correlation_id to 
+        the id of the request they answer.
+        
+        If traced is True, the message collects (hop_name, time)
+        stamps on its way through the processes (see stamp()).
+        See latency_tracer.py for how those are evaluated.
+        
+        @param msg_code: what the message is about
+        @type msg_code: str
+        @param state: payload
+        @type state: any
+        @param correlation_id: id of the request this message answers
+        @type correlation_id: str
+        @param traced: whether to collect hop timestamps
+        @type traced: bool
+        '''
         self.msg_code = msg_code
-        self.state    = state
\ No newline at end of file
+        self.state    = state
+        self.msg_id   = '%s-%s' % (os.getpid(), next(Message._seq_nums))
+        self.created  = time.time()
+        self.correlation_id = correlation_id
+        self.hops     = [] if traced else None
+        
+    def stamp(self, hop_name):
+        '''
+        Record that the message passed hop_name now. No-op
+        for untraced messages.
+        '''
+        if self.hops is not None:
+            self.hops.append((hop_name, time.time()))
+        
+    def reply(self, msg_code, state=None):
+        '''
+        Create a message that answers this one. If this one
+        is traced, the answer continues its hop record.
+        '''
+        answer = Message(msg_code, state, correlation_id=self.msg_id)
+        if self.hops is not None:
+            answer.hops = list(self.hops)
+        return answer
+
+class CourseBoard(object):
+    '''
+    Structured content of the course board: course entries
+    plus free text lines (e.g. top10 results). Entries are
+    (course_name, descr, description) tuples, keyed by course
+    name. The visualizer sends only additions ('crse_board_diff'
+    messages). HTML is produced only by to_html(), which the
+    control surface calls once per refresh.
+    '''
+
+    def __init__(self):
+        self.entries = {}
+        self.text_lines = []
+
+    def add(self, entries):
+        '''
+        Add course entries. Returns the entries that
+        were not already on the board.
+
+        @param entries: (course_name, descr, description) tuples
+        @type entries: [(str,str,str)]
+        @return: the newly added entries
+        @rtype: [(str,str,str)]
+        '''
+        added = []
+        for entry in entries:
+            if entry[0] not in self.entries:
+                self.entries[entry[0]] = entry
+                added.append(entry)
+        return added
+
+    def add_text(self, text):
+        self.text_lines.append(text)
+
+    def clear(self):
+        self.entries = {}
+        self.text_lines = []
+
+    def course_names(self):
+        return self.entries.keys()
+
+    def __len__(self):
+        return len(self.entries) + len(self.text_lines)
+
+    def to_html(self, max_lines=None):
+        '''
+        Render courses sorted by name, followed by any
+        free text lines. If max_lines is given, at most that
+        many lines are rendered, plus an ellipsis line.
+
+        @param max_lines: upper limit on the number of lines
+        @type max_lines: int
+        @return: html
+        @rtype: str
+        '''
+        lines = []
+        for course_name in sorted(self.entries.keys()):
+            (_name, descr, description) = self.entries[course_name]
+            line = course_name
+            if descr is not None:
+                line += ' <b>' + descr + '</b>'
+            if description:
+                line += '; ' + description
+            lines.append(line)
+        lines.extend(self.text_lines)
+        if max_lines is not None and len(lines) > max_lines:
+            lines = lines[:max_lines] + ['... more buried under.']
+        return '<br>'.join(lines)
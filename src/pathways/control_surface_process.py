@@ -10,12 +10,14 @@ from queue import Empty
 import sys
 
 from PyQt5.QtCore import QFile, QTimer 
+from PyQt5.QtGui import QKeySequence
 from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QCheckBox 
 from PyQt5.QtWidgets import QFileDialog, QMessageBox, QMainWindow, QTextEdit
-from PyQt5.QtWidgets import QPushButton, QLineEdit
+from PyQt5.QtWidgets import QPushButton, QLineEdit, QShortcut
 from PyQt5 import uic
 
-from common_classes import Message
+from common_classes import Message, CourseBoard
+from latency_tracer import LatencyTracer
 
 class ControlSurface(object):
     '''
@@ -32,11 +34,31 @@ class ControlSurface(object):
 
     # Time between checking instructions queue from parent process:
     QUEUE_CHECK_INTERVAL = 200 # milliseconds
+    
+    # Upper bound on msgs handled per queue check, so that 
+    # a flood of msgs cannot freeze the UI:
+    MAX_MSGS_PER_CHECK = 50
+    
+    # Requests whose round trip latency through main and
+    # the viz is traced. The viz answers each with 'handled':
+    TRACED_MSG_CODES = ('top10', 'where_is', 'enrollment_history')
 
-    def __init__(self, ui_file, out_queue=None, in_queue=None):
+    def __init__(self, ui_file, out_queue=None, in_queue=None, latency_log=None):
+        '''
+        @param ui_file: QtDesigner file of the control surface
+        @type ui_file: str
+        @param out_queue: queue to the main process
+        @type out_queue: multiprocessing.Queue
+        @param in_queue: queue from the main process
+        @type in_queue: multiprocessing.Queue
+        @param latency_log: optional file to which each traced round
+            trip is appended. Ctrl-L prints the latency histograms.
+        @type latency_log: str
+        '''
         super().__init__()
     
         self.debug = True
+        self.latency_tracer = LatencyTracer(latency_log)
     
         self.ui_file = ui_file
         self.out_queue = out_queue    
@@ -64,6 +86,11 @@ class ControlSurface(object):
         # viz state:
         
         self.synchronizing = False
+        
+        # Content of the course board. The widget is
+        # re-rendered from it at most once per queue check:
+        self.crse_board_model = CourseBoard()
+        self.crse_board_dirty = False
 
         self.app = QApplication(sys.argv)
         self.control_surface_widget = ContainerWidget(self.ui_file)
@@ -122,6 +149,10 @@ class ControlSurface(object):
         draft_chk_box_obj = self.control_surface_widget.findChild(QCheckBox, 'draftModeChk')
         self.connect_chk_box(draft_chk_box_obj, self.slot_draft_mode)
         
+        # Ctrl-L: print round trip latency histograms:
+        self.latency_shortcut = QShortcut(QKeySequence('Ctrl+L'), self.control_surface_widget)
+        self.latency_shortcut.activated.connect(self.latency_tracer.dump)
+        
         
     def connect_chk_box(self, chkBoxObj, slot_func):
         '''
@@ -189,6 +220,8 @@ class ControlSurface(object):
                               '(Alternative: cancel, Save Visualization; then quit.)',
                               defaultButton='Cancel'):
             self.write_to_main('stop', None)
+            if len(self.latency_tracer.histograms) > 0:
+                self.latency_tracer.dump()
             if self.out_queue is not None:
                 self.out_queue.close()
             self.app.exit()
@@ -260,12 +293,16 @@ class ControlSurface(object):
         # Note: can't use the empty() method here, b/c it's 
         # unreliable for multiprocess operation:
         try:
-            control_msg = self.in_queue.get(block=False)
-            if self.debug:
-                print("In to cntrl from main: %s; state: %s" % (control_msg.msg_code, control_msg.state))
-            self.handle_msg_from_main(control_msg)
+            for _i in range(ControlSurface.MAX_MSGS_PER_CHECK):
+                control_msg = self.in_queue.get(block=False)
+                if self.debug:
+                    print("In to cntrl from main: %s; state: %s" % (control_msg.msg_code, control_msg.state))
+                self.handle_msg_from_main(control_msg)
         except Empty:
             pass 
+        # All board changes of this round are rendered at once:
+        if self.crse_board_dirty:
+            self.render_crse_board()
         
     def write_to_main(self, msg_code, state):
         if self.debug:
@@ -274,12 +311,23 @@ class ControlSurface(object):
             else:
                 print('Sending from control to main: %s, %s' % (msg_code, state))
         if self.out_queue is not None:
-            self.out_queue.put(Message(msg_code, state))
+            msg = Message(msg_code, state, traced=msg_code in ControlSurface.TRACED_MSG_CODES)
+            msg.stamp('control_sent')
+            self.out_queue.put(msg)
         
     def handle_msg_from_main(self, msg):
         msg_code = msg.msg_code
         if msg_code == 'update_crse_board':
             self.write_to_msg_board(msg.state)
+        elif msg_code == 'crse_board_diff':
+            # List of (course_name, descr, description):
+            if len(self.crse_board_model.add(msg.state)) > 0:
+                self.crse_board_dirty = True
+        elif msg_code == 'handled':
+            # End of a traced round trip; state is the
+            # msg code of the request:
+            msg.stamp('control_recv')
+            self.latency_tracer.record(msg.state, msg.hops)
         elif msg_code == 'clear_crse_board':
             self.clear_msg_board()
         elif msg_code == 'update_status':
@@ -295,6 +343,8 @@ class ControlSurface(object):
             pass
             
     def clear_msg_board(self):
+        self.crse_board_model.clear()
+        self.crse_board_dirty = False
         self.crse_board.clear()
         self.refresh_crse_board()
         
@@ -337,22 +387,23 @@ class ControlSurface(object):
         
         
     def write_to_msg_board(self, text, ):
-        curr_txt = self.crse_board.toHtml()
-        # Already have max lines plus a line saying "... more buried under."?
-        num_lines = curr_txt.count('\n')
-        if num_lines >= ControlSurface.MAX_NUM_COURSES_TO_LIST + 1:
-            # Board is full, with elipses already added:
-            return
-        elif num_lines == ControlSurface.MAX_NUM_COURSES_TO_LIST:
-            curr_txt = curr_txt + '\n... more buried under.'
-        else:
-            # Have room for more courses in the displayed list:
-            if len(curr_txt) == 0:
-                curr_txt = text
-            else:
-                curr_txt += '<br>' + text
+        '''
+        Append free text, such as a top10 list, below
+        the courses on the board.
         
-        self.crse_board.setHtml(curr_txt)
+        @param text: html text to add
+        @type text: str
+        '''
+        self.crse_board_model.add_text(text)
+        self.crse_board_dirty = True
+        
+    def render_crse_board(self):
+        '''
+        The only place where the course board model
+        is turned into html.
+        '''
+        self.crse_board.setHtml(self.crse_board_model.to_html(ControlSurface.MAX_NUM_COURSES_TO_LIST))
+        self.crse_board_dirty = False
         self.refresh_crse_board()
         
     def refresh_crse_board(self):
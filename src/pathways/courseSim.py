@@ -16,6 +16,7 @@ from common_classes import Message
 from control_surface_process import ControlSurface
 from course_tsne_visualization import TSNECourseVisualizer
 from course_vector_creation import CourseVectorsCreator
+from course2vec.model_registry import ModelRegistry
 
 
 class TsneCourseExplorer(object):
@@ -26,11 +27,30 @@ class TsneCourseExplorer(object):
     
     def __init__(self,
                  draft_mode=True,
-                 vector_file=None):
+                 vector_file=None,
+                 warm_standby=True,
+                 latency_log=None):
         '''
+        If warm_standby is True, a second visualizer process
+        is kept pre-started, with imports done and data loaded.
+        It blocks until a recompute or restore swaps it in, so
+        that those operations only pay for the t-SNE fit, or the
+        cache load.
+        
+        @param draft_mode: whether to start with a draft quality plot
+        @type draft_mode: bool
+        @param vector_file: model file to use instead of the default
+        @type vector_file: str
+        @param warm_standby: whether to keep a pre-started visualizer
+        @type warm_standby: bool
+        @param latency_log: file to which the control surface appends
+            round trip latencies of traced requests
+        @type latency_log: str
         '''
         
         self.debug = True
+        self.warm_standby = warm_standby
+        self.standby = None
         
         data_dir = os.path.join(os.path.dirname(__file__), '../data/')
         ui_dir   = os.path.join(os.path.dirname(__file__), '../qtui/')
@@ -41,7 +61,8 @@ class TsneCourseExplorer(object):
         control_surface_process = Process(target=ControlSurface, 
                                           args=(ui_file, 
                                                 self.control_surface_from_queue,
-                                                self.control_surface_to_queue
+                                                self.control_surface_to_queue,
+                                                latency_log
                                                 )
                                           )
         control_surface_process.name = 'tsne_control_surface'
@@ -63,6 +84,11 @@ class TsneCourseExplorer(object):
         if msg.msg_code != 'ready':
             raise ValueError("Was expecting 'ready' message from viz process.")
         
+        # Only now warm up the standby, so that it does not
+        # compete with the first plot for cores:
+        if self.warm_standby:
+            self.standby = self.start_standby_process()
+        
         # Raise the control surface, b/c it gets buried by the viz
         # (Doesn't work):
         self.send_to_control(msg_code='raise')
@@ -92,6 +118,7 @@ class TsneCourseExplorer(object):
         
         # Wait for the Tsne viz thread to stop:
         self.tsne_process.join()
+        self.stop_standby_process()
 
     def start_tsne_process(self, kwargs={}):
         self.tsne_viz_to_queue = Queue()
@@ -110,6 +137,59 @@ class TsneCourseExplorer(object):
         #***********
         self.tsne_process.start()
         
+    def start_standby_process(self):
+        '''
+        Start a visualizer process that loads everything, and
+        then waits for an 'activate' message. Returns a 
+        (process, to_queue, from_queue) triple.
+        
+        @return: standby process and its two queues
+        @rtype: (Process, Queue, Queue)
+        '''
+        to_queue   = Queue()
+        from_queue = Queue()
+        kwargs = {'in_queue'   : to_queue,
+                  'out_queue'  : from_queue,
+                  'standalone' : False,
+                  'standby'    : True
+                  }
+        process = Process(target=TSNECourseVisualizer,
+                          args=(self.vector_creator,),
+                          kwargs=kwargs
+                          )
+        process.name = 'tsne_viz_standby'
+        process.start()
+        return (process, to_queue, from_queue)
+
+    def activate_standby(self, init_parms):
+        '''
+        Make the warm standby visualizer the active one, and
+        have it build a plot from init_parms. Falls back to 
+        starting a cold process if no standby is available.
+        The fresh standby for next time is only started when
+        the activated viz reports 'ready' (see handle_msg_from_tse()),
+        so that it does not compete with the t-SNE fit for cores.
+        
+        @param init_parms: dict of visualizer init parms
+        @type init_parms: dict
+        '''
+        if self.standby is None or not self.standby[0].is_alive():
+            self.start_tsne_process(init_parms)
+        else:
+            (self.tsne_process, 
+             self.tsne_viz_to_queue, 
+             self.tsne_viz_from_queue) = self.standby
+            self.tsne_viz_to_queue.put(Message('activate', init_parms))
+        self.standby = None
+
+    def stop_standby_process(self):
+        if self.standby is None:
+            return
+        (process, to_queue, _from_queue) = self.standby
+        to_queue.put(Message('kill_yourself', None))
+        process.terminate()
+        process.join()
+        self.standby = None
 
     def handle_msg_from_control(self, msg):
         print("In main: Msg from control: %s, %s" % (msg.msg_code, msg.state))
@@ -120,6 +200,7 @@ class TsneCourseExplorer(object):
             if self.debug:
                 print('Sending from main to tsne: %s, %s' % (msg.msg_code, msg.state))
             
+            msg.stamp('main_to_viz')
             self.tsne_viz_to_queue.put(msg)
     
     def handle_msg_from_tse(self, msg):
@@ -128,8 +209,15 @@ class TsneCourseExplorer(object):
             print("In main: Msg from Tsne viz: %s; %s" % (msg.msg_code, msg.state))
         
         # If it's a 'ready' message, that's from a recomputation
-        # request. Ignore it:
+        # request, or from an activated standby that finished
+        # its plot. Only now warm up the next standby. A 
+        # 'standby_ready' is left in the queue by a standby viz 
+        # that was swapped in; ignore it:
         if msg.msg_code == 'ready':
+            if self.warm_standby and self.standby is None:
+                self.standby = self.start_standby_process()
+            return
+        elif msg.msg_code == 'standby_ready':
             return
         
         # Does the viz want to restart?
@@ -139,14 +227,19 @@ class TsneCourseExplorer(object):
             self.tsne_process.join()
             # state will be a dict of initialization parms 
             # for the new process:
-            self.start_tsne_process(msg.state)
+            if self.warm_standby:
+                self.activate_standby(msg.state)
+            else:
+                self.start_tsne_process(msg.state)
             
         elif msg.msg_code == 'stop':
             self.tsne_process.terminate()
             self.tsne_process.join()
+            self.stop_standby_process()
             self.keep_going = False
         else:    
             # Just forward to the control surface:
+            msg.stamp('main_to_control')
             self.send_to_control(msg)
 
     
@@ -167,11 +260,30 @@ if __name__ == '__main__':
                         choices=['true', 'false'],
                         help='whether or not to show model in draft mode, or full quality. Default is full.',
                         default='true');
+    parser.add_argument('--noStandby',
+                        action='store_true',
+                        help='do not keep a pre-started visualizer for fast recompute/restore.',
+                        default=False);
+    
+    parser.add_argument('--latencyLog',
+                        help='file to which round trip latencies of control surface requests are appended.\n' +\
+                             'Ctrl-L in the control surface prints latency histograms.',
+                        default=None);
+    parser.add_argument('--bestBy',
+                        help="use the model registry's best model by this metric, e.g. mean_rank.\n" +\
+                             'Ignored if --file is given.',
+                        default=None);
     
     args = parser.parse_args();
+    
+    vector_file = args.file
+    if vector_file is None and args.bestBy is not None:
+        vector_file = ModelRegistry().best_model(args.bestBy)['model_file']
                         
     multiprocessing.set_start_method('spawn')
-    TsneCourseExplorer(vector_file=args.file,
-                       draft_mode=True if args.draftMode == 'true' else False)
+    TsneCourseExplorer(vector_file=vector_file,
+                       draft_mode=True if args.draftMode == 'true' else False,
+                       warm_standby=not args.noStandby,
+                       latency_log=args.latencyLog)
 #     #tsne_similarity_explorer = TsneCourseSimExplorer()
     #sys.exit(tsne_similarity_explorer.app.exec_())
@@ -0,0 +1,420 @@
+#!/usr/bin/env python
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+
+Headless batch creation of course map images. Where
+TSNECourseVisualizer with ShowOrSave.SAVE produces one
+image per process, and builds all the interactive machinery
+along the way, this module takes a list of configurations
+and renders them in a process pool with the Agg backend.
+No queues, timers, or event listeners are involved.
+
+Each configuration is a dict:
+
+    {'model_file'       : <path to word2vec .model file>,
+     'perplexity'       : <int>,
+     'draft_mode'       : <bool>,
+     'active_acad_grps' : [<acad grp>, ...],    # None: all groups
+     'formats'          : ['png', 'svg']
+     }
+
+Fitted t-SNE coordinates depend only on model, perplexity,
+and draft mode, not on the academic groups. They are cached
+as .npz files in the embedding cache directory, and computed
+at most once per batch. A manifest.json in the output directory
+lists every configuration with its output files.
+
+Usage example for a nightly run:
+
+    course_map_batch_renderer.py -m m1.model -m m2.model \
+                                 -p 30 -p 60 \
+                                 -g ENGR,H&S -g MED \
+                                 /tmp/nightlyMaps
+'''
+
+import argparse
+import itertools
+import json
+import logging
+from logging import info as logInfo
+from logging import error as logErr
+import multiprocessing
+import os
+import re
+import sys
+import time
+
+# Must be set before course_tsne_visualization, and thereby
+# pyplot are imported, in this process and in pool workers:
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from course_tsne_visualization import TSNECourseVisualizer
+from course_vector_creation import CourseVectorsCreator
+from multicoretsne import MulticoreTSNE as TSNE
+
+
+class HeadlessCourseMap(TSNECourseVisualizer):
+    '''
+    Just the course-to-school and color mapping parts of
+    TSNECourseVisualizer, plus a single-scatter rendering
+    of a fitted embedding.
+    '''
+
+    #--------------------------
+    # __init__
+    #----------------
+
+    def __init__(self):
+        # Deliberately not calling super().__init__(): that
+        # would compute and show a plot.
+        if len(TSNECourseVisualizer.course_school_dict) == 0:
+            TSNECourseVisualizer.load_course_info()
+        self.crse_subject_re = re.compile(r'([^0-9]*).*$')
+
+    #--------------------------
+    # render
+    #----------------
+
+    def render(self, course_names, fitted_vectors, config, out_root):
+        '''
+        Plot the courses of the active academic groups in
+        one scatter call, and save the figure in each of the
+        requested formats.
+
+        @param course_names: course names in fitted_vectors row order
+        @type course_names: [str]
+        @param fitted_vectors: 2D t-SNE coordinates
+        @type fitted_vectors: np.ndarray
+        @param config: configuration as described in module header
+        @type config: dict
+        @param out_root: output path without extension
+        @type out_root: str
+        @return: number of plotted courses, and the written files
+        @rtype: (int, [str])
+        '''
+        active_acad_grps = config.get('active_acad_grps', None)
+        if active_acad_grps is None:
+            active_acad_grps = list(TSNECourseVisualizer.course_color_dict.keys())
+
+        color_map = self.get_acad_grp_to_color_map(course_names)
+        keep  = []
+        dot_colors = []
+        for i, course_name in enumerate(course_names):
+            color = color_map.get(course_name, None)
+            if color is None:
+                continue
+            if self.group_name_from_course_name(course_name) not in active_acad_grps:
+                continue
+            keep.append(i)
+            dot_colors.append(color)
+
+        figure, ax = plt.subplots(nrows=1, ncols=1, figsize=(15,10))
+        ax.scatter(fitted_vectors[keep, 0],
+                   fitted_vectors[keep, 1],
+                   c=dot_colors,
+                   marker='o',
+                   s=TSNECourseVisualizer.DOT_SIZE
+                   )
+        figure.suptitle('t_sne Clusters of %s courses in %s; %s quality (perplexity: %s)' %\
+                        (len(keep),
+                         ','.join(active_acad_grps),
+                         'draft' if config.get('draft_mode', False) else 'full',
+                         config['perplexity']
+                         )
+                        )
+        self.add_legend(ax)
+
+        written = []
+        for fmt in config.get('formats', ['png']):
+            filename = out_root + '.' + fmt
+            figure.savefig(filename, format=fmt)
+            written.append(filename)
+        plt.close(figure)
+        return (len(keep), written)
+
+
+class CourseMapBatchRenderer(object):
+    '''
+    Fan a list of course map configurations out over a
+    process pool. See module header for the config format.
+    '''
+
+    DEFAULT_EMBEDDING_CACHE_DIR = os.path.join(TSNECourseVisualizer.DEFAULT_CACHE_FILE_DIR, 'embeddings')
+    MANIFEST_NAME = 'manifest.json'
+
+    # Number of courses fitted in draft mode; same as
+    # in TSNECourseVisualizer.plot_tsne_clusters():
+    DRAFT_NUM_COURSES = 500
+
+    #--------------------------
+    # __init__
+    #----------------
+
+    def __init__(self,
+                 out_dir,
+                 embedding_cache_dir=None,
+                 num_workers=None,
+                 tsne_jobs_per_worker=1):
+        '''
+        @param out_dir: directory for images and manifest
+        @type out_dir: str
+        @param embedding_cache_dir: where fitted t-SNE coordinates are
+            cached. Default: <cache>/embeddings
+        @type embedding_cache_dir: str
+        @param num_workers: size of process pool. Default: number of cores
+        @type num_workers: int
+        @param tsne_jobs_per_worker: n_jobs for each MulticoreTSNE fit
+        @type tsne_jobs_per_worker: int
+        '''
+        self.out_dir = out_dir
+        self.embedding_cache_dir = CourseMapBatchRenderer.DEFAULT_EMBEDDING_CACHE_DIR \
+            if embedding_cache_dir is None else embedding_cache_dir
+        self.num_workers = multiprocessing.cpu_count() if num_workers is None else num_workers
+        self.tsne_jobs_per_worker = tsne_jobs_per_worker
+
+        os.makedirs(self.out_dir, exist_ok=True)
+        os.makedirs(self.embedding_cache_dir, exist_ok=True)
+
+    #--------------------------
+    # run
+    #----------------
+
+    def run(self, configs):
+        '''
+        Render all configurations. First, the distinct embeddings
+        that are not yet cached are fitted in parallel. Then all
+        images are rendered in parallel. Finally the manifest is
+        written.
+
+        @param configs: list of configuration dicts
+        @type configs: [dict]
+        @return: path to the manifest
+        @rtype: str
+        '''
+        start_time = time.time()
+
+        embedding_jobs = {}
+        for config in configs:
+            cache_file = self.embedding_cache_file(config)
+            if not os.path.exists(cache_file):
+                embedding_jobs[cache_file] = (config['model_file'],
+                                              config['perplexity'],
+                                              config.get('draft_mode', False),
+                                              cache_file,
+                                              self.tsne_jobs_per_worker)
+
+        # Spawn rather than fork: workers must not inherit
+        # a GUI backend from the parent:
+        ctx = multiprocessing.get_context('spawn')
+        with ctx.Pool(self.num_workers) as pool:
+            if len(embedding_jobs) > 0:
+                logInfo('Fitting %s embedding(s)...' % len(embedding_jobs))
+                pool.starmap(fit_embedding, embedding_jobs.values())
+                logInfo('Done fitting embeddings.')
+
+            render_jobs = [(config,
+                            self.embedding_cache_file(config),
+                            os.path.join(self.out_dir, self.image_file_root(config)))
+                           for config in configs]
+            logInfo('Rendering %s course map(s)...' % len(render_jobs))
+            manifest_entries = pool.starmap(render_config, render_jobs)
+            logInfo('Done rendering course maps.')
+
+        manifest = {'created'  : time.strftime("%Y-%m-%d_%H_%M_%S"),
+                    'runtime'  : int(time.time() - start_time),
+                    'entries'  : manifest_entries
+                    }
+        manifest_file = os.path.join(self.out_dir, CourseMapBatchRenderer.MANIFEST_NAME)
+        with open(manifest_file, 'w') as fd:
+            json.dump(manifest, fd, indent=2)
+        return manifest_file
+
+    #--------------------------
+    # embedding_cache_file
+    #----------------
+
+    def embedding_cache_file(self, config):
+        model_root, _ext = os.path.splitext(os.path.basename(config['model_file']))
+        return os.path.join(self.embedding_cache_dir,
+                            'tsneCoords_%s_Perplexity_%s_%s.npz' %\
+                            (model_root,
+                             config['perplexity'],
+                             'draftQual' if config.get('draft_mode', False) else 'fullQual'))
+
+    #--------------------------
+    # image_file_root
+    #----------------
+
+    def image_file_root(self, config):
+        model_root, _ext = os.path.splitext(os.path.basename(config['model_file']))
+        acad_grps = config.get('active_acad_grps', None)
+        grp_part  = 'allGrps' if acad_grps is None else '_'.join(sorted(acad_grps)).replace('&', 'and')
+        return 'courseMap_%s_Perplexity_%s_%s_%s' %\
+            (model_root,
+             config['perplexity'],
+             grp_part,
+             'draftQual' if config.get('draft_mode', False) else 'fullQual')
+
+    #--------------------------
+    # product_configs
+    #----------------
+
+    @classmethod
+    def product_configs(cls,
+                        model_files,
+                        perplexities,
+                        acad_grp_sets=None,
+                        draft_mode=False,
+                        formats=('png', 'svg')):
+        '''
+        Return the configurations for all combinations of
+        model files, perplexities, and academic group sets.
+
+        @param model_files: paths to .model files
+        @type model_files: [str]
+        @param perplexities: t-SNE perplexities
+        @type perplexities: [int]
+        @param acad_grp_sets: lists of academic groups. A None
+            entry, or None for the whole argument means all groups.
+        @type acad_grp_sets: [[str]]
+        @param draft_mode: whether to fit only a subset of courses
+        @type draft_mode: bool
+        @param formats: image formats to write
+        @type formats: (str)
+        @return: list of configurations
+        @rtype: [dict]
+        '''
+        if acad_grp_sets is None:
+            acad_grp_sets = [None]
+        configs = []
+        for (model_file, perplexity, acad_grps) in itertools.product(model_files,
+                                                                      perplexities,
+                                                                      acad_grp_sets):
+            configs.append({'model_file'       : model_file,
+                            'perplexity'       : perplexity,
+                            'draft_mode'       : draft_mode,
+                            'active_acad_grps' : acad_grps,
+                            'formats'          : list(formats)
+                            })
+        return configs
+
+# ------------------------------- Pool Worker Functions ---------------
+# Module level, so that they can be pickled for the pool.
+
+def fit_embedding(model_file, perplexity, draft_mode, cache_file, n_jobs=1):
+    '''
+    Fit a t-SNE model to all vectors of a course2vec model,
+    and save the 2D coordinates together with the course
+    names to cache_file (.npz).
+    '''
+    vector_creator = CourseVectorsCreator()
+    vector_creator.load_word2vec_model(model_file)
+    course_names = list(vector_creator.wv.vocab.keys())
+    vectors = np.array([vector_creator.wv[course_name] for course_name in course_names])
+    if draft_mode:
+        course_names = course_names[:CourseMapBatchRenderer.DRAFT_NUM_COURSES]
+        vectors      = vectors[:CourseMapBatchRenderer.DRAFT_NUM_COURSES,]
+
+    # Same settings as TSNECourseVisualizer.plot_tsne_clusters():
+    tsne_model = TSNE.MulticoreTSNE(perplexity=perplexity,
+                                    n_components=2,
+                                    init='random',
+                                    n_iter=2500,
+                                    random_state=23,
+                                    n_jobs=n_jobs,
+                                    cheat_metric=True)
+    fitted_vectors = tsne_model.fit_transform(vectors)
+    # Write to a temp name first, so that an interrupted
+    # fit does not leave a truncated cache entry:
+    tmp_file = cache_file + '.tmp.npz'
+    np.savez(tmp_file, course_names=np.array(course_names), fitted_vectors=fitted_vectors)
+    os.replace(tmp_file, cache_file)
+    return cache_file
+
+def render_config(config, cache_file, out_root):
+    '''
+    Render one configuration from its cached embedding.
+    Returns the manifest entry. Failures are recorded in
+    the entry rather than raised, so that one bad config
+    does not sink the whole batch.
+    '''
+    entry = {'config'         : config,
+             'embedding_file' : cache_file,
+             'outputs'        : [],
+             'num_courses'    : 0,
+             'error'          : None
+             }
+    start_time = time.time()
+    try:
+        with np.load(cache_file) as cached:
+            course_names   = cached['course_names'].tolist()
+            fitted_vectors = cached['fitted_vectors']
+        (entry['num_courses'], entry['outputs']) = \
+            HeadlessCourseMap().render(course_names, fitted_vectors, config, out_root)
+    except Exception as e:
+        logErr('Could not render %s (%s)' % (out_root, repr(e)))
+        entry['error'] = repr(e)
+    entry['render_secs'] = round(time.time() - start_time, 2)
+    return entry
+
+# ------------------------------------ Main ------------------
+
+if __name__ == '__main__':
+
+    logging.basicConfig(format='%(asctime)s : %(levelname)s : %(message)s', level=logging.INFO)
+
+    parser = argparse.ArgumentParser(prog=os.path.basename(sys.argv[0]),
+                                     formatter_class=argparse.RawTextHelpFormatter,
+                                     description="Render course maps for many configurations without a display."
+                                     )
+    parser.add_argument('-c', '--configs',
+                        help='JSON file with a list of configuration dicts. If given,\n' +
+                             '-m, -p, -g, and --draft are ignored.',
+                        default=None)
+    parser.add_argument('-m', '--model',
+                        action='append',
+                        help='model file; repeat as needed.',
+                        default=None)
+    parser.add_argument('-p', '--perplexity',
+                        type=int,
+                        action='append',
+                        help='t-SNE perplexity; repeat as needed. Default: %s' % TSNECourseVisualizer.DEFAULT_PERPLEXITY,
+                        default=None)
+    parser.add_argument('-g', '--acadGrps',
+                        action='append',
+                        help='comma separated academic groups for one map; repeat as needed.\n' +
+                             'Default: one map with all groups.',
+                        default=None)
+    parser.add_argument('--draft',
+                        action='store_true',
+                        help='fit only a subset of courses.',
+                        default=False)
+    parser.add_argument('-w', '--workers',
+                        type=int,
+                        help='number of worker processes. Default: number of cores.',
+                        default=None)
+    parser.add_argument('outdir',
+                        help='directory for images and manifest.json')
+
+    args = parser.parse_args();
+
+    if args.configs is not None:
+        with open(args.configs, 'r') as fd:
+            configs = json.load(fd)
+    else:
+        if args.model is None:
+            raise ValueError("Must provide either a configs file, or at least one model file.")
+        perplexities  = [TSNECourseVisualizer.DEFAULT_PERPLEXITY] if args.perplexity is None else args.perplexity
+        acad_grp_sets = None if args.acadGrps is None else [grps.split(',') for grps in args.acadGrps]
+        configs = CourseMapBatchRenderer.product_configs(args.model,
+                                                         perplexities,
+                                                         acad_grp_sets,
+                                                         draft_mode=args.draft)
+
+    renderer = CourseMapBatchRenderer(args.outdir, num_workers=args.workers)
+    print('Manifest: %s' % renderer.run(configs))
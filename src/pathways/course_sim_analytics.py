@@ -7,6 +7,10 @@ Created on Aug 29, 2018
 import os
 
 from gensim.models.keyedvectors import Word2VecKeyedVectors
+import numpy as np
+
+from course2vec.ann_index import IvfIndex
+from course2vec.neighbor_table import NeighborTable
 
 class CourseSimAnalytics(Word2VecKeyedVectors):
     '''
@@ -54,7 +58,7 @@ class CourseSimAnalytics(Word2VecKeyedVectors):
     # __init__
     #----------------
     
-    def __init__(self, keyed_vectors_filename):
+    def __init__(self, keyed_vectors_filename, use_ann_index=False, nprobe=None):
         '''
         Constructor. The expected word vectors are the model.kv 
         word-vectors-only of gensim's course2vec. They are called
@@ -62,8 +66,23 @@ class CourseSimAnalytics(Word2VecKeyedVectors):
         model. The KeyedVectors class has many similarity computation
         methods.
         
+        If use_ann_index is True, most_similar() and similar_by_word()
+        are answered from an approximate nearest neighbor index that
+        is kept next to the vectors file (see course2vec/ann_index.py).
+        The index is loaded, or built, on the first query that uses
+        it. nprobe trades recall for speed; it can also be changed 
+        later via self.ann_index.nprobe.
+        
+        Single course queries are answered from the precomputed
+        neighbor table of the vectors, if neighbor_table.py has
+        been run for them.
+        
         @param word_vectors: all vectors 
         @type word_vectors: [gensim]models.keyedvectors
+        @param use_ann_index: whether to use the approximate index for similarity queries
+        @type use_ann_index: bool
+        @param nprobe: number of index cells searched per query; default: 10% of cells
+        @type nprobe: int
         '''
         self.vectors_obj = super().load(keyed_vectors_filename)
 
@@ -74,11 +93,60 @@ class CourseSimAnalytics(Word2VecKeyedVectors):
         self.vocab       = self.vectors_obj.vocab
         self.index2word  = self.vectors_obj.index2word
         
+        self.keyed_vectors_filename = keyed_vectors_filename
+        self.use_ann_index = use_ann_index
+        self.nprobe = nprobe
+        self._ann_index = None
+        self.neighbor_table = NeighborTable.for_vectors(self.vectors_obj)
+        
         # The filename for cross listings:
         curr_dir = os.path.dirname(__file__)
         self.cross_lists_filename = os.path.join(curr_dir, '../data/Word2vec/cross_registered_courses.csv')
         
     
+    #--------------------------
+    # ann_index
+    #----------------
+    
+    @property
+    def ann_index(self):
+        '''
+        The approximate index, loaded or built on first access.
+        None unless use_ann_index was requested.
+        '''
+        if self.use_ann_index and self._ann_index is None:
+            self._ann_index = IvfIndex.for_vectors_file(self.keyed_vectors_filename, 
+                                                        vectors=self.vectors_obj, 
+                                                        nprobe=self.nprobe)
+        return self._ann_index
+    
+    #--------------------------
+    # most_similar
+    #----------------
+    
+    def most_similar(self, positive=None, negative=None, topn=10, restrict_vocab=None, indexer=None):
+        '''
+        KeyedVectors.most_similar(), answered from the neighbor table
+        for a single positive course, else from the approximate
+        index, if one was requested. Exact scans are still used if 
+        restrict_vocab or a different indexer are given, and for
+        topn=None, which asks for the similarities to all courses.
+        '''
+        if isinstance(positive, str):
+            positive = [positive]
+        if topn is None or indexer is not None or restrict_vocab is not None:
+            return super().most_similar(positive=positive, 
+                                        negative=negative, 
+                                        topn=topn, 
+                                        restrict_vocab=restrict_vocab, 
+                                        indexer=indexer)
+        if self.neighbor_table is not None and \
+           positive is not None and len(positive) == 1 and not negative and topn <= self.neighbor_table.k:
+            return self.neighbor_table.similar_by_word(positive[0], topn=topn)
+        if self.use_ann_index:
+            return self.ann_index.most_similar_words(positive=positive, negative=negative, topn=topn)
+        return super().most_similar(positive=positive, negative=negative, topn=topn)
+
     #--------------------------
     # related
     #----------------
@@ -88,6 +156,80 @@ class CourseSimAnalytics(Word2VecKeyedVectors):
         # x = from - to + as
         return self.most_similar(positive=[from_word, as_word], negative=[to_word])
     
+    #--------------------------
+    # related_batch
+    #----------------
+    
+    def related_batch(self, triples, topn=10, batch_rows=1024):
+        '''
+        Many related() queries at once. For each (from_word, to_word, as_word)
+        triple the query vector is from - to + as over the unit length
+        vectors, as in most_similar(). The queries of a batch are
+        scored against the whole vocabulary with a single matrix 
+        product. As in most_similar(), a triple's own words are
+        excluded from its result. Results are exact, i.e. the 
+        approximate index is not used.
+        
+        @param triples: (from_word, to_word, as_word) tuples
+        @type triples: [(str, str, str)]
+        @param topn: number of results per triple
+        @type topn: int
+        @param batch_rows: number of queries per matrix product
+        @type batch_rows: int
+        @return: one list of (course name, similarity) tuples per triple,
+            most similar first. None for triples with a word that is
+            not in the vocabulary.
+        @rtype: [{[(str, float)] | None}]
+        '''
+        unit_vectors = self.unit_vectors()
+        results = [None] * len(triples)
+        # Rows of the triples whose words are all known:
+        known_rows = []
+        word_idxs  = []
+        for row, triple in enumerate(triples):
+            try:
+                word_idxs.append([self.vocab[word].index for word in triple])
+            except KeyError:
+                continue
+            known_rows.append(row)
+        word_idxs = np.array(word_idxs, dtype=int).reshape(-1, 3)
+        
+        topn = min(topn, unit_vectors.shape[0] - 3)
+        for start in range(0, len(known_rows), batch_rows):
+            batch_idxs = word_idxs[start:start + batch_rows]
+            queries = unit_vectors[batch_idxs[:, 0]] - unit_vectors[batch_idxs[:, 1]] + unit_vectors[batch_idxs[:, 2]]
+            queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+            similarities = queries @ unit_vectors.T
+            batch_range = np.arange(len(batch_idxs))[:, np.newaxis]
+            similarities[batch_range, batch_idxs] = -np.inf
+            
+            best = np.argpartition(-similarities, topn - 1, axis=1)[:, :topn]
+            best_sims = np.take_along_axis(similarities, best, axis=1)
+            order = np.argsort(-best_sims, axis=1)
+            best = np.take_along_axis(best, order, axis=1)
+            best_sims = np.take_along_axis(best_sims, order, axis=1)
+            for i, row in enumerate(known_rows[start:start + batch_rows]):
+                results[row] = [(self.index2word[idx], float(similarity)) 
+                                for idx, similarity in zip(best[i], best_sims[i])]
+        return results
+    
+    #--------------------------
+    # unit_vectors
+    #----------------
+    
+    def unit_vectors(self):
+        '''
+        Unit length copies of the vectors, computed on first use.
+        '''
+        try:
+            return self._unit_vectors
+        except AttributeError:
+            vectors = np.asarray(self.vectors, dtype=np.float32)
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self._unit_vectors = vectors / norms
+            return self._unit_vectors
+    
          
 if __name__ == '__main__':
     # keyed_vec_filename = os.path.join(os.path.dirname(__file__), '../data/course2vecModelWin10.vectors')
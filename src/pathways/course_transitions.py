@@ -0,0 +1,316 @@
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+
+Answers 'what do students typically take after course X?'
+from the strm ordering of the enrollments.
+
+For each student, the terms in which they enrolled are put in
+strm order. Every course of one term is then counted as followed
+by every course of the student's next enrolled term (first order),
+and optionally of the term after that (second order). Counts
+are kept in sparse course x course CSR matrices.
+
+Each row's entries are stored sorted by count, so a top-k
+query is a slice of the row, and takes microseconds.
+
+Rebuilds are incremental per term: the model remembers the
+latest strm it has seen. An update only reads the students
+with enrollments after that strm, and only adds transitions
+into those newer terms.
+
+The model is a directory with:
+
+    order<n>.npz      CSR counts of order n, from row course to column course
+    courses.json      course names in row order, orders, and the latest strm seen
+
+Usage:
+    transitions = CourseTransitionModel()
+    transitions.update()
+    transitions.save()
+    transitions.next_courses('CS106A', topn=10)
+'''
+import argparse
+import json
+import os
+import sys
+
+from scipy import sparse
+
+import numpy as np
+
+from pathways.student_query_engine import StudentQueryEngine
+
+
+class CourseTransitionModel(object):
+    '''
+    Sparse next-term course transition counts.
+    '''
+
+    DEFAULT_MODEL_DIR = os.path.join(os.path.dirname(__file__), '../data/course_transitions')
+
+    COURSES_FILE = 'courses.json'
+
+    # Number of (from, to) pairs collected before they
+    # are summed into the sparse matrices:
+    PAIR_BUFFER_SIZE = 5000000
+
+    #--------------------------
+    # __init__
+    #----------------
+
+    def __init__(self, model_dir=None, orders=(1,)):
+        '''
+        Load the model from model_dir if it has been saved there,
+        else start an empty one.
+
+        @param model_dir: directory of the saved model
+        @type model_dir: str
+        @param orders: transition orders to keep for a new model; 1: next enrolled
+            term, 2: the enrolled term after that. Ignored when loading.
+        @type orders: (int)
+        '''
+        self.model_dir = CourseTransitionModel.DEFAULT_MODEL_DIR if model_dir is None else model_dir
+        courses_file = os.path.join(self.model_dir, CourseTransitionModel.COURSES_FILE)
+        if not os.path.exists(courses_file):
+            self.index2course = []
+            self.course_idx   = {}
+            self.orders       = tuple(orders)
+            self.latest_strm  = None
+            self.transitions  = {order : sparse.csr_matrix((0, 0), dtype=np.float32) for order in self.orders}
+            return
+        try:
+            with open(courses_file, 'r') as courses_fd:
+                model_info = json.load(courses_fd)
+            self.index2course = model_info['courses']
+            self.orders       = tuple(model_info['orders'])
+            self.latest_strm  = model_info['latest_strm']
+            self.transitions  = {order : sparse.load_npz(self.matrix_file(order)) for order in self.orders}
+        except Exception as e:
+            raise ValueError("Could not load course transition model from '%s' (%s)" % (self.model_dir, repr(e)))
+        self.course_idx = {course : i for i, course in enumerate(self.index2course)}
+        self.compute_row_totals()
+
+    #--------------------------
+    # update
+    #----------------
+
+    def update(self, enrollment_rows=None):
+        '''
+        Add the transitions into all terms after the latest strm
+        the model has seen. The first update counts all terms.
+
+        @param enrollment_rows: (emplid, course_name, strm) rows, ordered
+            by emplid. Default: StudentQueryEngine.all_stud_crses_strms()
+            for the students with enrollments in new terms.
+        @type enrollment_rows: iterable
+        @return: number of transitions added, per order
+        @rtype: {int : int}
+        '''
+        min_new_strm = None if self.latest_strm is None else self.latest_strm + 1
+        if enrollment_rows is None:
+            enrollment_rows = StudentQueryEngine().all_stud_crses_strms(changed_since_strm=min_new_strm)
+
+        pairs = {order : ([], []) for order in self.orders}
+        num_added = {order : 0 for order in self.orders}
+        num_buffered = 0
+        latest_strm = self.latest_strm
+        for student_terms in students_terms(enrollment_rows):
+            strms = sorted(student_terms.keys())
+            latest_strm = strms[-1] if latest_strm is None else max(latest_strm, strms[-1])
+            term_idxs = [np.array([self.add_course(course) for course in student_terms[strm]], dtype=np.int32)
+                         for strm in strms]
+            for order in self.orders:
+                (from_idxs, to_idxs) = pairs[order]
+                for i in range(len(strms) - order):
+                    if min_new_strm is not None and strms[i + order] < min_new_strm:
+                        # Counted in an earlier update:
+                        continue
+                    from_idxs.append(np.repeat(term_idxs[i], len(term_idxs[i + order])))
+                    to_idxs.append(np.tile(term_idxs[i + order], len(term_idxs[i])))
+                    num_buffered += len(from_idxs[-1])
+                    num_added[order] += len(from_idxs[-1])
+            if num_buffered >= CourseTransitionModel.PAIR_BUFFER_SIZE:
+                self.add_pairs(pairs)
+                pairs = {order : ([], []) for order in self.orders}
+                num_buffered = 0
+        self.add_pairs(pairs)
+        self.latest_strm = latest_strm
+        self.compute_row_totals()
+        return num_added
+
+    #--------------------------
+    # add_course
+    #----------------
+
+    def add_course(self, course):
+        try:
+            return self.course_idx[course]
+        except KeyError:
+            self.course_idx[course] = len(self.index2course)
+            self.index2course.append(course)
+            return self.course_idx[course]
+
+    #--------------------------
+    # add_pairs
+    #----------------
+
+    def add_pairs(self, pairs):
+        '''
+        Sum buffered (from, to) course index pairs into the
+        matrices, and re-sort each row by descending count.
+        '''
+        num_courses = len(self.index2course)
+        for order, (from_idxs, to_idxs) in pairs.items():
+            matrix = self.transitions[order]
+            matrix.resize((num_courses, num_courses))
+            if len(from_idxs) > 0:
+                from_idxs = np.concatenate(from_idxs)
+                to_idxs   = np.concatenate(to_idxs)
+                # Duplicate entries are summed by the conversion:
+                matrix = matrix + sparse.coo_matrix((np.ones(len(from_idxs), dtype=np.float32),
+                                                     (from_idxs, to_idxs)),
+                                                    shape=(num_courses, num_courses)).tocsr()
+            self.transitions[order] = sort_rows_by_count(matrix)
+
+    #--------------------------
+    # compute_row_totals
+    #----------------
+
+    def compute_row_totals(self):
+        self.row_totals = {order : np.asarray(matrix.sum(axis=1)).ravel()
+                           for order, matrix in self.transitions.items()}
+
+    #--------------------------
+    # next_courses
+    #----------------
+
+    def next_courses(self, course, topn=10, order=1):
+        '''
+        Courses most often taken in the enrolled term after
+        (order 1), or two enrolled terms after (order 2) the
+        term in which students took the given course.
+
+        @param course: course name
+        @type course: str
+        @param topn: number of courses to return
+        @type topn: int
+        @param order: 1 or 2; must be one of the orders of the model
+        @type order: int
+        @return: (course name, fraction of the course's transitions, count) tuples,
+            most frequent first. Empty if nobody took a course after this one.
+        @rtype: [(str, float, int)]
+        @raise KeyError: if the course is not in the model
+        @raise ValueError: if the order is not in the model
+        '''
+        try:
+            matrix = self.transitions[order]
+        except KeyError:
+            raise ValueError("Model has orders %s, not %s." % (self.orders, order))
+        row = self.course_idx[course]
+        start = matrix.indptr[row]
+        end   = min(matrix.indptr[row + 1], start + topn)
+        total = self.row_totals[order][row]
+        return [(self.index2course[col], float(count / total), int(count))
+                for col, count in zip(matrix.indices[start:end], matrix.data[start:end])]
+
+    #--------------------------
+    # save
+    #----------------
+
+    def save(self):
+        os.makedirs(self.model_dir, exist_ok=True)
+        for order, matrix in self.transitions.items():
+            sparse.save_npz(self.matrix_file(order), matrix)
+        with open(os.path.join(self.model_dir, CourseTransitionModel.COURSES_FILE), 'w') as courses_fd:
+            json.dump({'courses' : self.index2course,
+                       'orders' : list(self.orders),
+                       'latest_strm' : self.latest_strm
+                       },
+                      courses_fd)
+
+    def matrix_file(self, order):
+        return os.path.join(self.model_dir, 'order%s.npz' % order)
+
+#--------------------------
+# students_terms
+#----------------
+
+def students_terms(enrollment_rows):
+    '''
+    Generator of {strm : set of course names} per student
+    from (emplid, course_name, strm) rows ordered by emplid.
+    '''
+    curr_emplid = None
+    terms = {}
+    for emplid, course, strm in enrollment_rows:
+        if emplid != curr_emplid:
+            if len(terms) > 0:
+                yield terms
+            curr_emplid = emplid
+            terms = {}
+        terms.setdefault(int(strm), set()).add(course)
+    if len(terms) > 0:
+        yield terms
+
+#--------------------------
+# sort_rows_by_count
+#----------------
+
+def sort_rows_by_count(matrix):
+    '''
+    Return a CSR matrix whose entries are ordered by
+    descending value within each row.
+    '''
+    matrix = matrix.tocsr()
+    matrix.sum_duplicates()
+    row_ids = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+    order = np.lexsort((-matrix.data, row_ids))
+    # Constructing from (data, indices, indptr) keeps the entry order:
+    return sparse.csr_matrix((matrix.data[order], matrix.indices[order], matrix.indptr.copy()),
+                             shape=matrix.shape)
+
+# -------------------------------------------- Main -------------------------
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog=os.path.basename(sys.argv[0]),
+                                     formatter_class=argparse.RawTextHelpFormatter,
+                                     description="Build or query the next-course transition model."
+                                     )
+    parser.add_argument('-u', '--update',
+                        action='store_true',
+                        help='add the terms since the last update from the enrollment db, and save',
+                        default=False
+                        )
+    parser.add_argument('--second_order',
+                        action='store_true',
+                        help='when creating a new model: also count courses two enrolled terms later',
+                        default=False
+                        )
+    parser.add_argument('-d', '--modeldir',
+                        help='model directory; default: data/course_transitions',
+                        default=None
+                        )
+    parser.add_argument('-k', '--topn',
+                        type=int,
+                        help='number of next courses to list; default: 10',
+                        default=10
+                        )
+    parser.add_argument('courses',
+                        nargs='*',
+                        help='courses whose typical next courses to list'
+                        )
+    args = parser.parse_args();
+
+    transitions = CourseTransitionModel(args.modeldir, orders=(1, 2) if args.second_order else (1,))
+    if args.update:
+        num_added = transitions.update()
+        transitions.save()
+        print('Added transitions: %s; latest strm: %s' % (num_added, transitions.latest_strm))
+    for course in args.courses:
+        for order in transitions.orders:
+            print('%s (order %s): %s' % (course, order,
+                                         ', '.join('%s %.2f' % (next_course, fraction)
+                                                   for next_course, fraction, _count
+                                                   in transitions.next_courses(course, topn=args.topn, order=order))))
@@ -31,7 +31,7 @@ import pickle
 from queue import Empty  # The regular queue's empty exception
 import re
 import sys
-from threading import Timer
+from threading import Timer, Lock
 import time
 
 from matplotlib import artist
@@ -47,12 +47,17 @@ from color_constants import colors
 from common_classes import Message
 from course_sim_analytics import CourseSimAnalytics
 from course_vector_creation import CourseVectorsCreator
+from course2vec.model_registry import ModelRegistry
 from difficulty_plotter import DifficultyPlotter
 from enrollment_plotter import EnrollmentPlotter
+from result_cache import LruResultCache
 
 
 # Backend spec must be before pyplot import!
-matplotlib.use('Qt5Agg')
+# Headless callers, such as course_map_batch_renderer.py,
+# set MPLBACKEND in the environment instead:
+if os.getenv('MPLBACKEND') is None:
+    matplotlib.use('Qt5Agg')
 
 logging.basicConfig(format='%(asctime)s : %(levelname)s : %(message)s', level=logging.INFO)
 
@@ -138,6 +143,10 @@ class TSNECourseVisualizer(object):
     # on a clump of stacked marks:
     MAX_NUM_COURSES_TO_LIST = 15
     
+    # Number of top10 results and course description 
+    # renderings kept for repeated clicks:
+    RESULT_CACHE_SIZE = 500
+    
     # Width and color of polygon selection lines:
     POLY_SELECT_WIDTH = 3
     POLY_SELECT_COLOR = 'gray'
@@ -387,10 +396,11 @@ class TSNECourseVisualizer(object):
                  active_acad_grps=None,
                  show_save=ShowOrSave.SHOW,
                  save_filename=None,
-                 called_from_main=True
+                 called_from_main=True,
+                 standby=False
                  ):
         '''
-        
+
         @param course_vectors_model:
         @type course_vectors_model:
         @param standalone: if true, create and maintain a text box for course
@@ -423,54 +433,28 @@ class TSNECourseVisualizer(object):
             once the requested figures has been created, and shown or saved.
             If False, returns to caller.
         @type called_from_main: bool
+        @param standby: if True, load all data, then block on in_queue
+            until an 'activate' message arrives. The message's state is
+            a dict of init parms as produced by create_viz_init_dict().
+            Those override the corresponding arguments of this call.
+            Lets the main process keep a warm instance around for fast
+            recompute/restore.
+        @type standby: bool
         '''
-    
+
         self.debug = True
-        
+
         self.course_vectors_model = course_vectors_model
         self.in_queue   = in_queue
         self.out_queue  = out_queue
         self.standalone = standalone
-        if draft_mode is None:
-            TSNECourseVisualizer.draft_mode = TSNECourseVisualizer.DEFAULT_DRAFT_MODE
-        else:
-            TSNECourseVisualizer.draft_mode = draft_mode
-        
+
         # Init the academic groups that should be included in calculations:
         self.school_set = frozenset(TSNECourseVisualizer.course_color_dict.keys())
-        if active_acad_grps is None:
-            # Include them all:
-            TSNECourseVisualizer.active_acad_grps = list(self.school_set)
-        else:
-            TSNECourseVisualizer.active_acad_grps = active_acad_grps
-        
-        if perplexity is None:
-            perplexity = TSNECourseVisualizer.DEFAULT_PERPLEXITY
-        TSNECourseVisualizer.perplexity = perplexity 
-                
-        # Read the mapping from course name to academic organization 
-        # roughly (a.k.a. school):
-        
-        with open(TSNECourseVisualizer.course2school_map_file, 'r') as fd:
-            reader = csv.reader(fd)
-            for (course_name, school_name) in reader:
-                TSNECourseVisualizer.course_school_dict[course_name] = school_name
-                
-        # If available, read the course descriptions:
-        
-        try:
-            with open(TSNECourseVisualizer.course_descr_file, 'r', encoding = "ISO-8859-1") as fd:
-                reader = csv.reader(fd)
-                try:
-                    for (course_name, descr, description) in reader:
-                        bold_descr = '<b>' + descr + '</b>'
-                        TSNECourseVisualizer.course_descr_dict[course_name] = {'descr' : bold_descr, 'description' : description}
-                except ValueError as e:
-                    logErr(repr(e))
-                    sys.exit()
-        except IOError:
-            logWarn("No course description file found. Descriptions won't be available.")
-        
+
+        # Read the mapping from course name to academic organization
+        # roughly (a.k.a. school), and the course descriptions:
+        TSNECourseVisualizer.load_course_info()
                 
         # Regex to separate SUBJECT from CATALOG_NBR in a course name:
         self.crse_subject_re = re.compile(r'([^0-9]*).*$')
@@ -485,17 +469,130 @@ class TSNECourseVisualizer(object):
         
         # Get an analytics object from course_sim_analytics.py. Used for top10:
         self.analyst = CourseSimAnalytics(TSNECourseVisualizer.course_vectors_file)
-              
+        
+        # Cache for top10 lists and course description markup.
+        # Keys include the vectors' fingerprint, so results of
+        # different models cannot mix:
+        self.result_cache = LruResultCache(TSNECourseVisualizer.RESULT_CACHE_SIZE)
+        self.vectors_fingerprint = ModelRegistry.fingerprint(self.analyst.vectors_obj)
+
+        if standby:
+            # All expensive preparation is done. Wait to
+            # be swapped in by the main process:
+            init_parms = self.await_activation()
+            draft_mode          = init_parms.get('draft_mode', draft_mode)
+            active_acad_grps    = init_parms.get('active_acad_grps', active_acad_grps)
+            perplexity          = init_parms.get('perplexity', perplexity)
+            fittedModelFileName = init_parms.get('fittedModelFileName', fittedModelFileName)
+
+        self.configure(draft_mode, active_acad_grps, perplexity)
+
         self.timer = None
+        
+        # Course board entries not yet sent to the control
+        # surface. Filled from matplotlib callbacks, flushed
+        # from the queue check timer thread; hence the lock:
+        self.board_diff_lock = Lock()
+        self.pending_board_diff = []
         self.init_new_plot(fittedModelFileName=fittedModelFileName,
                            show_save=show_save,
                            save_filename=save_filename)
         if called_from_main:
             if self.debug:
                 print("Exiting __init__ back to __main__")
-            sys.exit(0)      
+            sys.exit(0)
+
+    #--------------------------
+    # load_course_info
+    #----------------
+
+    @classmethod
+    def load_course_info(cls):
+        '''
+        Fill the class level course_school_dict and, if the
+        description file is available, course_descr_dict.
+        '''
+        # Read the mapping from course name to academic organization
+        # roughly (a.k.a. school):
+        
+        with open(cls.course2school_map_file, 'r') as fd:
+            reader = csv.reader(fd)
+            for (course_name, school_name) in reader:
+                cls.course_school_dict[course_name] = school_name
+                
+        # If available, read the course descriptions:
         
-    def init_new_plot(self, fittedModelFileName=None, 
+        try:
+            with open(cls.course_descr_file, 'r', encoding = "ISO-8859-1") as fd:
+                reader = csv.reader(fd)
+                try:
+                    for (course_name, descr, description) in reader:
+                        # Kept as plain text; html markup is added
+                        # where the text is displayed:
+                        cls.course_descr_dict[course_name] = {'descr' : descr, 'description' : description}
+                except ValueError as e:
+                    logErr(repr(e))
+                    sys.exit()
+        except IOError:
+            logWarn("No course description file found. Descriptions won't be available.")
+
+    #--------------------------
+    # configure
+    #----------------
+
+    def configure(self, draft_mode=None, active_acad_grps=None, perplexity=None):
+        '''
+        Set the class level quality, academic group, and perplexity
+        settings that govern the next plot. None values select the
+        defaults.
+
+        @param draft_mode: whether to plot only a subset of courses
+        @type draft_mode: bool
+        @param active_acad_grps: academic groups to include
+        @type active_acad_grps: [str]
+        @param perplexity: perplexity for the TSNE fit
+        @type perplexity: int
+        '''
+        if draft_mode is None:
+            TSNECourseVisualizer.draft_mode = TSNECourseVisualizer.DEFAULT_DRAFT_MODE
+        else:
+            TSNECourseVisualizer.draft_mode = draft_mode
+
+        if active_acad_grps is None:
+            # Include them all:
+            TSNECourseVisualizer.active_acad_grps = list(self.school_set)
+        else:
+            TSNECourseVisualizer.active_acad_grps = active_acad_grps
+
+        if perplexity is None:
+            perplexity = TSNECourseVisualizer.DEFAULT_PERPLEXITY
+        TSNECourseVisualizer.perplexity = perplexity
+
+    #--------------------------
+    # await_activation
+    #----------------
+
+    def await_activation(self):
+        '''
+        Used by standby instances: tell main that we are warm,
+        then block until main swaps us in. Returns the init parm
+        dict that accompanies the 'activate' message. Exits the
+        process if told to stop instead.
+
+        @return: init parms for the plot to create
+        @rtype: dict
+        '''
+        self.send_to_main(Message('standby_ready'))
+        while True:
+            msg = self.in_queue.get(block=True)
+            if msg.msg_code == 'activate':
+                return {} if msg.state is None else msg.state
+            elif msg.msg_code in ('stop', 'kill_yourself'):
+                sys.exit(0)
+            elif self.debug:
+                print('Standby viz ignoring msg: %s' % msg.msg_code)
+
+    def init_new_plot(self, fittedModelFileName=None,
                       show_save=ShowOrSave.SHOW, 
                       save_filename=None):
         
@@ -512,6 +609,9 @@ class TSNECourseVisualizer(object):
         self.lassoed_course_points = []
         # No remembered dots yet:
         self.dot_manager = None
+        # Academic group of each fitted course; computed 
+        # on the first re-filtering of academic groups:
+        self.fitted_acad_grps = None
         
         # No selection polygon vertices yet:
         self.selection_polygon = None
@@ -590,6 +690,10 @@ class TSNECourseVisualizer(object):
         
         if self.in_queue is None:
             return
+        # Send course board additions that accumulated
+        # since the previous check as a single message:
+        self.flush_board_diff()
+        
         # Note: can't use the empty() method here, b/c it's 
         # unreliable for multiprocess operation:
         try:
@@ -617,6 +721,8 @@ class TSNECourseVisualizer(object):
         if self.debug:        
             print('From main to tsne: %s, %s' % (msg.msg_code, str(msg.state)))
         
+        msg.stamp('viz_recv')
+        
         # In most cases we want the restart the in-queue check
         # timer again after this incoming msg is processed. But
         # if when we are shutting down this process for a recompute,
@@ -635,8 +741,13 @@ class TSNECourseVisualizer(object):
         elif msg_code == 'set_draft_mode':
             TSNECourseVisualizer.draft_mode = msg.state
         elif msg_code == 'set_acad_grps':
-            TSNECourseVisualizer.active_acad_grps = msg.state
-            self.update_figure_title()
+            # Show/hide schools on the current map; only
+            # a 'recompute' re-fits the embedding:
+            if self.dot_manager is not None:
+                self.refilter_acad_grps(msg.state)
+            else:
+                TSNECourseVisualizer.active_acad_grps = msg.state
+                self.update_figure_title()
         elif msg_code == 'save_viz':
             self.save()
         elif msg_code == 'restore_viz':
@@ -670,23 +781,24 @@ class TSNECourseVisualizer(object):
             # closest other courses back to control via main:
             course_name = msg.state
             if len(course_name) > 0:
-                # Get list of two-tuples: [(crsName, probability), (crseName, prob...)...]:
                 try:
-                    siblings = self.analyst.similar_by_word(course_name, topn=10)
+                    text = self.result_cache.get((self.vectors_fingerprint, 'top10', course_name),
+                                                 lambda: self.top10_text(course_name))
                 except KeyError:
                     self.control_board_error('Course %s is not in the model; maybe used draft mode when building it?' % course_name)
                 else:
-                    if type(siblings) == list and len(siblings) > 0:
-                        # Turn [('crs1', 0.9456324), (crs2, 00145453), ...)] into the display
-                        # string  "('crs1', 0.9456324)<br>(crs2, 00145453), ...)". We go in 
-                        # two steps:
-                        text_array = ['' + str(crse_prob_tuple) for crse_prob_tuple in siblings]
-                        text = '<br>'.join(text_array)
+                    if text is not None:
                         self.update_course_list_display(text)
 
         elif msg_code == 'enrollment_history':
             course_name = msg.state
             self.show_enrollment_history(course_name)
+        
+        # Close the loop for traced requests, so that the 
+        # control surface can compute the round trip latencies:
+        if msg.hops is not None:
+            msg.stamp('viz_done')
+            self.send_to_main(msg.reply('handled', msg_code))
             
         return restart_timer
     
@@ -701,8 +813,108 @@ class TSNECourseVisualizer(object):
                 self.course_names_text_artist = None
                 self.ax_course_list.get_figure().canvas.draw_idle()
         else:
+            # Pending additions would otherwise arrive
+            # after the clear:
+            with self.board_diff_lock:
+                self.pending_board_diff = []
             self.out_queue.put(Message('clear_crse_board'))
     
+    #--------------------------
+    # queue_board_additions 
+    #----------------
+    
+    def queue_board_additions(self, course_names):
+        '''
+        Add courses to the control surface's course board. The
+        entries are only queued here. They go out as one 
+        'crse_board_diff' message on the next queue check, so
+        that bursts of clicks or large lassos are coalesced. 
+        Courses already on the board are skipped by the control
+        surface's CourseBoard, which also knows about clears
+        made from the control surface.
+        
+        @param course_names: courses to add
+        @type course_names: [str]
+        '''
+        with self.board_diff_lock:
+            for course_name in course_names:
+                self.pending_board_diff.append(self.course_board_entry(course_name))
+    
+    #--------------------------
+    # flush_board_diff 
+    #----------------
+    
+    def flush_board_diff(self):
+        with self.board_diff_lock:
+            if len(self.pending_board_diff) == 0:
+                return
+            diff = self.pending_board_diff
+            self.pending_board_diff = []
+        self.send_to_main(Message('crse_board_diff', diff))
+    
+    #--------------------------
+    # top10_text 
+    #----------------
+    
+    def top10_text(self, course_name):
+        '''
+        Return the course board markup listing the ten courses
+        most similar to the given course, or None if there
+        are none.
+        
+        @param course_name: course whose neighbors to list
+        @type course_name: str
+        @return: markup, or None
+        @rtype: {str | None}
+        @raise KeyError: if course is not in the model
+        '''
+        # Get list of two-tuples: [(crsName, probability), (crseName, prob...)...]:
+        siblings = self.analyst.similar_by_word(course_name, topn=10)
+        if type(siblings) != list or len(siblings) == 0:
+            return None
+        # Turn [('crs1', 0.9456324), (crs2, 00145453), ...)] into the display
+        # string  "('crs1', 0.9456324)<br>(crs2, 00145453), ...)". We go in 
+        # two steps:
+        text_array = ['' + str(crse_prob_tuple) for crse_prob_tuple in siblings]
+        return '<br>'.join(text_array)
+    
+    #--------------------------
+    # course_board_entry 
+    #----------------
+    
+    def course_board_entry(self, course_name):
+        '''
+        Return the (course_name, descr, description) tuple 
+        that represents a course on the course board. The
+        descr is None if no descriptions are loaded at all.
+        Entries are cached.
+        
+        @param course_name: course for which to create the entry
+        @type course_name: str
+        @return: course board entry
+        @rtype: (str, {str | None}, str)
+        '''
+        return self.result_cache.get((self.vectors_fingerprint, 'board_entry', course_name),
+                                     lambda: self.make_course_board_entry(course_name))
+        
+    #--------------------------
+    # make_course_board_entry 
+    #----------------
+    
+    def make_course_board_entry(self, course_name):
+        if len(TSNECourseVisualizer.course_descr_dict) == 0:
+            return (course_name, None, '')
+        try:
+            descr_description_dict = TSNECourseVisualizer.course_descr_dict[course_name]
+            descr = descr_description_dict['descr']
+            description = descr_description_dict['description']
+        except KeyError:
+            descr = 'unavailable'
+            description = ''
+        if description == '\\N':
+            description = ''
+        return (course_name, descr, description)
+    
     # ------------------------------------------------- Create Plot From Scratch ---------
         
     #--------------------------
@@ -725,6 +937,8 @@ class TSNECourseVisualizer(object):
         for course_name in self.course_vectors_model.wv.vocab:
             tokens_vectors.append(self.course_vectors_model.wv.__getitem__(course_name))
             labels_course_names.append(course_name)
+        # Row i of self.fitted_vectors is course labels_course_names[i]: 
+        self.labels_course_names = labels_course_names
         
         logInfo('Mapping %s word vector dimensions to 2D...' % self.course_vectors_model.vector_size)
         tsne_model = TSNE.MulticoreTSNE(perplexity=TSNECourseVisualizer.perplexity, 
@@ -919,6 +1133,86 @@ class TSNECourseVisualizer(object):
         logInfo("Done adding course scatter points.")
         return dot_artist
 
+    #--------------------------
+    # refilter_acad_grps 
+    #----------------
+    
+    def refilter_acad_grps(self, active_acad_grps):
+        '''
+        Show only the courses of the given academic groups, 
+        reusing the already fitted self.fitted_vectors. A boolean
+        mask over the fitted rows selects the visible courses.
+        Their dots, the DotManager, and the coordinate lookups
+        are rebuilt from just those rows. No t-SNE happens here;
+        that is reserved for an explicit 'recompute'.
+        
+        @param active_acad_grps: academic groups to show
+        @type active_acad_grps: [str]
+        '''
+        TSNECourseVisualizer.active_acad_grps = active_acad_grps
+        mask = self.acad_grp_mask(active_acad_grps)
+        
+        # Keep the current view; else matplotlib rescales
+        # to the remaining dots:
+        xlim = self.ax_tsne.get_xlim()
+        ylim = self.ax_tsne.get_ylim()
+
+        for dot_artist in self.dot_manager.all_rendered_artists:
+            dot_artist.remove()
+        self.course_points = CoursePoints()
+        self.course_xy = {}
+        self.all_used_course_names = []
+        self.lassoed_course_points = []
+        
+        # Highlights of courses that just became invisible go away:
+        course_highlights = CourseHighlight.get_instance()
+        for course_name in list(course_highlights.course_names()):
+            if not mask[self.labels_course_names.index(course_name)]:
+                course_highlights.remove_course_highlight(course_name)
+        
+        if mask.any():
+            visible_xys    = self.fitted_vectors[mask]
+            visible_labels = [course_name for course_name, visible 
+                              in zip(self.labels_course_names, mask) if visible]
+            self.add_course_scatter_points(visible_xys[:,0], visible_xys[:,1], visible_labels)
+            self.adjust_dot_sizes()
+        else:
+            self.dot_manager = DotManager((xlim[0], ylim[0]),
+                                          (xlim[1], ylim[1]),
+                                          TSNECourseVisualizer.PICK_RADIUS)
+
+        self.used_acad_grps = frozenset(self.fitted_acad_grps[mask])
+        self.ax_tsne.set_xlim(xlim)
+        self.ax_tsne.set_ylim(ylim)
+        self.update_figure_title()
+        self.background = self.figure.canvas.copy_from_bbox(self.figure.bbox)
+        
+    #--------------------------
+    # acad_grp_mask 
+    #----------------
+    
+    def acad_grp_mask(self, acad_grps):
+        '''
+        Return a boolean array with one entry per row of 
+        self.fitted_vectors: True if the row's course has a 
+        color assignment, and belongs to one of acad_grps.
+        
+        @param acad_grps: academic groups to select
+        @type acad_grps: [str]
+        @return: mask over the fitted courses
+        @rtype: np.array(bool)
+        '''
+        if self.fitted_acad_grps is None:
+            # Once per fitted map: the group of each course,
+            # None for courses that are never plotted:
+            self.fitted_acad_grps = np.array(
+                [self.group_name_from_course_name(course_name) 
+                 if self.color_map.get(course_name, None) is not None else None
+                 for course_name in self.labels_course_names[:len(self.fitted_vectors)]],
+                dtype=object)
+        acad_grp_set = set(acad_grps)
+        return np.array([acad_grp in acad_grp_set for acad_grp in self.fitted_acad_grps], dtype=bool)
+
     #--------------------------------
     # adjust_dot_sizes
     #------------------
@@ -1125,20 +1419,8 @@ class TSNECourseVisualizer(object):
 
         try:
             for course_name in course_name_or_names:            
-                new_text = curr_text + course_name
-                # If we have course descriptions loaded, add short and long descriptions:
-                if len(TSNECourseVisualizer.course_descr_dict) > 0:
-                    try:
-                        descr_description_dict = TSNECourseVisualizer.course_descr_dict[course_name] 
-                        descr = descr_description_dict['descr']
-                        description = descr_description_dict['description']
-                    except KeyError:
-                        # descr/description unavalable for this course:
-                        descr = 'unavailable'
-                        description = ''
-                    new_text += ' ' + descr
-                    if description != '\\N':
-                        new_text += '; ' + description
+                new_text = curr_text + self.result_cache.get((self.vectors_fingerprint, 'descr_html', course_name),
+                                                             lambda: self.course_descr_html(course_name))
                 curr_text = new_text + '<br>'
         finally:
             if len(new_text) > 0 and self.standalone:
@@ -1146,6 +1428,36 @@ class TSNECourseVisualizer(object):
                 self.update_course_list_display(new_text)
             return new_text
 
+    #--------------------------
+    # course_descr_html 
+    #----------------
+    
+    def course_descr_html(self, course_name):
+        '''
+        Course name, followed by its short and long descriptions,
+        if descriptions are loaded.
+        
+        @param course_name: course to render
+        @type course_name: str
+        @return: markup for the standalone course list
+        @rtype: str
+        '''
+        text = course_name
+        # If we have course descriptions loaded, add short and long descriptions:
+        if len(TSNECourseVisualizer.course_descr_dict) > 0:
+            try:
+                descr_description_dict = TSNECourseVisualizer.course_descr_dict[course_name] 
+                descr = descr_description_dict['descr']
+                description = descr_description_dict['description']
+            except KeyError:
+                # descr/description unavalable for this course:
+                descr = 'unavailable'
+                description = ''
+            text += ' <b>' + descr + '</b>'
+            if description != '\\N':
+                text += '; ' + description
+        return text
+
     #--------------------------
     # get_text_standalone_board 
     #----------------
@@ -1170,33 +1482,6 @@ class TSNECourseVisualizer(object):
         curr_text += '\n'
         return curr_text
      
-    #--------------------------------
-    # sort_crs_desc_html 
-    #------------------
-     
-    def sort_crs_desc_html(self, html_txt):
-        '''
-        Given an html list of course names with descriptions,
-        return a new html string in which the entries are
-        sorted by course name: Example input:
-        
-           '<b>MATH54</b> Linear algebra<br>...<br>'
-        
-        @param html_txt:
-        @type html_txt:
-        '''
-        # Get each line as a string item in an array:
-        html_txt_arr = html_txt.split('<br>')
-        
-        # Sort the array. The search keys are the course
-        # names, which are before a space in each line:
-        html_txt_arr_sorted = sorted(html_txt_arr,
-                                     key=lambda course_desc: course_desc[:course_desc.find(' ')]
-                           )
-        # Reconstruct string, putting <br>s back in:
-        html_txt = '<br>'.join(html_txt_arr_sorted)
-        return html_txt
-        
     #--------------------------
     # restart 
     #----------------
@@ -1220,8 +1505,14 @@ class TSNECourseVisualizer(object):
         follow-on action ('stop', 'newplot') before calling this
         method.
         
+        Logs the result cache statistics, for sizing 
+        RESULT_CACHE_SIZE.
         '''
-        pass
+        try:
+            logInfo(str(self.result_cache))
+        except AttributeError:
+            # Closed before the cache was created:
+            pass
 
     # ---------------------------------------- UI Dynamics --------------
     
@@ -1268,12 +1559,12 @@ class TSNECourseVisualizer(object):
             return
         course_names = [artist.get_label() for artist in artists_in_cluster] 
         
-        # Get existing list in course name list and
-        # add the new course to it:
-          
-        crse_name_plus_descr = self.append_to_course_list_display(course_names)
-        if not self.standalone:
-            self.send_to_main(Message('update_crse_board', self.sort_crs_desc_html(crse_name_plus_descr)))
+        if self.standalone:
+            # Get existing list in course name list and
+            # add the new course to it:
+            self.append_to_course_list_display(course_names)
+        else:
+            self.queue_board_additions(course_names)
 
     #--------------------------
     # onclick
@@ -1409,23 +1700,18 @@ class TSNECourseVisualizer(object):
         # Course names are labels of the point objects:
         course_names = [course_point.get_label() for course_point in self.lassoed_course_points]
         
-        new_text = ''    
-        for course_name in course_names:
-            new_text += '<br>' + self.append_to_course_list_display(course_name)
-
         # Add course names to the course display:
 
         if self.standalone:            
+            self.append_to_course_list_display(course_names)
             self.ax_course_list.get_figure().canvas.draw_idle()
             #print('Selected courses: %s.' % course_names)
         else:
             # Notify the main thread, and from there the control surface
-            # to update the control surface's course list panel:
-            if len(new_text) > 0:
-                # Sort the courses by alpha:
-                new_text = self.sort_crs_desc_html(new_text)
-                
-                self.out_queue.put(Message('update_crse_board', new_text))
+            # to update the control surface's course list panel. The
+            # control surface does the sorting:
+            if len(course_names) > 0:
+                self.queue_board_additions(course_names)
                 # Raise the enrollment history char:
                 EnrollmentPlotter(self, course_names, block=False)
                 # Raise the difficulty overview charts:
@@ -14,6 +14,9 @@ import os
 import warnings
 from gensim.models.deprecated.keyedvectors import KeyedVectors
 
+from course2vec.sentence_corpus import CourseSentenceCorpus, CorpusContent
+from course2vec.vector_bundle import VectorBundle, bundle_exists, bundle_is_current, export_vector_bundle
+
 with warnings.catch_warnings():
     import gensim
 logging.basicConfig(format='%(asctime)s : %(levelname)s : %(message)s', level=logging.INFO)
@@ -36,7 +39,26 @@ class CourseVectorsCreator(gensim.models.Word2Vec):
     # load_word2vec_model 
     #-------------------
     
-    def load_word2vec_model(self, model_file_name):
+    def load_word2vec_model(self, model_file_name, prefer_bundle=True):
+        '''
+        Load a model for read-only use. If the model has a vector
+        bundle (see course2vec/vector_bundle.py), and prefer_bundle 
+        is True, the bundle is memory-mapped instead of unpickling 
+        the full model. Bundles older than the model are skipped. The bundle provides wv, and the vector lookup
+        and similarity methods of KeyedVectors, but no training state.
+        
+        @param model_file_name: .model file
+        @type model_file_name: str
+        @param prefer_bundle: whether to load the model's bundle if there is one
+        @type prefer_bundle: bool
+        '''
+        if prefer_bundle and bundle_is_current(model_file_name):
+            logInfo('Mapping course vector bundle of %s...' % model_file_name)
+            self.word2vec_model = VectorBundle.load(model_file_name)
+            logInfo('Bundle mapped.')
+            return self.word2vec_model
+        if prefer_bundle and bundle_exists(model_file_name):
+            logInfo('Vector bundle of %s is older than the model; ignoring it.' % model_file_name)
         logInfo('Loading course vector model from %s...' % model_file_name)
         self.word2vec_model = gensim.models.Word2Vec.load(model_file_name)
         logInfo('Model loaded.') 
@@ -49,6 +71,7 @@ class CourseVectorsCreator(gensim.models.Word2Vec):
     def save_word_vectors_only(self, filename):
         word_vectors = self.word2vec_model.wv
         word_vectors.save(filename)
+        export_vector_bundle(word_vectors, filename)
         
     #--------------------------
     # load_word_vectors_only
@@ -62,24 +85,59 @@ class CourseVectorsCreator(gensim.models.Word2Vec):
     # train_word2vec_model 
     #-------------------
         
-    def train_word2vec_model(self, sentencesInputFile, contextWindowSize=10, model_output_file=None):
+    def train_word2vec_model(self, 
+                             sentencesInputFile, 
+                             contextWindowSize=10, 
+                             model_output_file=None, 
+                             is_line_sentence_file=False,
+                             workers=10):
         '''
         Train course vectors for a given sequence of course sets. Each
         set would typically be the courses taken by one student.
         NOTE: you can ignore the RuntimeWarning messages about binary incompatibilities.
         
+        If is_line_sentence_file is True, sentencesInputFile must be
+        in LineSentence format (course names separated by spaces, as
+        written by create_sentences.py). Training then uses gensim's
+        corpus_file mode, which scales with the number of workers.
+        
         @param sentencesInputFile:
         @type sentencesInputFile:
         @param contextWindowSize:
         @type contextWindowSize:
         @param model_output_file:
         @type model_output_file:
+        @param is_line_sentence_file: whether to train from the file in corpus_file mode
+        @type is_line_sentence_file: bool
+        @param workers: number of training threads
+        @type workers: int
         '''
         
-        self.read_input(sentencesInputFile)
+        if is_line_sentence_file:
+            logInfo('Building course vector model from %s in corpus_file mode...' % sentencesInputFile)
+            # Passing corpus_file to the constructor would already
+            # train; build the vocabulary only, and train once:
+            self.word2vec_model = gensim.models.Word2Vec(
+                size=150,
+                window=contextWindowSize,
+                min_count=2,
+                workers=workers
+                )
+            self.word2vec_model.build_vocab(corpus_file=sentencesInputFile)
+            self.word2vec_model.train(corpus_file=sentencesInputFile,
+                                      total_examples=self.word2vec_model.corpus_count,
+                                      total_words=self.word2vec_model.corpus_total_words,
+                                      epochs=10)
+            logInfo('Done training course vector model.')
+            if model_output_file is not None:
+                self.word2vec_model.save(model_output_file)
+                export_vector_bundle(self.word2vec_model, model_output_file)
+            return
         
-        # Get the 'sentences':
-        documents = [course_list for course_list in self.read_input(sentencesInputFile)]
+
+        # Get the 'sentences'. They are streamed from the 
+        # file (.gz or plain) on each pass, not held in memory:
+        documents = CourseSentenceCorpus(sentencesInputFile, content=CorpusContent.SENTENCES)
         
         # Build vocabulary and train course_vector_model
         logInfo('Building course vector model from student course sets...')
@@ -88,16 +146,17 @@ class CourseVectorsCreator(gensim.models.Word2Vec):
             size=150,     # Number of elements in each word vector
             window=contextWindowSize,
             min_count=2,  # Only courses that occur at least this # of times
-            workers=10    # Threads
+            workers=workers # Threads
             )
         logInfo('Done building course model from student course sets.')
         
         logInfo('Train course vecor  model...')
-        self.word2vec_model.train(documents, total_examples=len(documents), epochs=10)
+        self.word2vec_model.train(documents, total_examples=self.word2vec_model.corpus_count, epochs=10)
         logInfo('Done training course vecor  model.')        
         
         if model_output_file is not None:
             self.word2vec_model.save(model_output_file)
+            export_vector_bundle(self.word2vec_model, model_output_file)
             
     #-----------------------------
     # wv wordvectors property  
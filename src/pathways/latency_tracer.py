@@ -0,0 +1,150 @@
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+
+Evaluation of the hop timestamps that traced Message
+instances collect on their round trip:
+
+   ControlSurface --> TsneCourseExplorer --> TSNECourseVisualizer
+         ^                                           |
+         +------------ TsneCourseExplorer <----------+
+
+Hop names as stamped by the three processes:
+
+    control_sent, main_to_viz, viz_recv, viz_done, main_to_control, control_recv
+
+The time between two consecutive stamps is one hop. For each
+request type ('top10', 'where_is', ...) and hop, a histogram
+of latencies is kept, plus one for the whole round trip.
+'''
+
+import json
+import time
+
+
+class LatencyHistogram(object):
+    '''
+    Counts of latencies in fixed, roughly logarithmic
+    millisecond buckets, plus count, sum and max.
+    '''
+
+    # Upper bucket bounds in milliseconds; a final bucket
+    # catches everything above the last bound:
+    BUCKET_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+    def __init__(self):
+        self.counts = [0] * (len(LatencyHistogram.BUCKET_BOUNDS_MS) + 1)
+        self.num    = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, latency_ms):
+        bucket = len(LatencyHistogram.BUCKET_BOUNDS_MS)
+        for i, bound in enumerate(LatencyHistogram.BUCKET_BOUNDS_MS):
+            if latency_ms <= bound:
+                bucket = i
+                break
+        self.counts[bucket] += 1
+        self.num    += 1
+        self.sum_ms += latency_ms
+        self.max_ms  = max(self.max_ms, latency_ms)
+
+    def mean_ms(self):
+        return 0.0 if self.num == 0 else self.sum_ms / self.num
+
+    def percentile_ms(self, percentile):
+        '''
+        Upper bound of the bucket that contains the given
+        percentile. The overflow bucket reports max_ms.
+
+        @param percentile: value between 0 and 100
+        @type percentile: float
+        '''
+        if self.num == 0:
+            return 0.0
+        target = self.num * percentile / 100.0
+        running = 0
+        for i, count in enumerate(self.counts):
+            running += count
+            if running >= target:
+                if i < len(LatencyHistogram.BUCKET_BOUNDS_MS):
+                    return float(LatencyHistogram.BUCKET_BOUNDS_MS[i])
+                return self.max_ms
+        return self.max_ms
+
+    def __str__(self):
+        bounds  = LatencyHistogram.BUCKET_BOUNDS_MS
+        buckets = []
+        for i, count in enumerate(self.counts):
+            if count == 0:
+                continue
+            lower = 0 if i == 0 else bounds[i-1]
+            if i < len(bounds):
+                buckets.append('%s-%sms:%s' % (lower, bounds[i], count))
+            else:
+                buckets.append('>%sms:%s' % (lower, count))
+        return 'n=%s mean=%.1fms p50<=%.0fms p95<=%.0fms max=%.1fms [%s]' %\
+            (self.num, self.mean_ms(), self.percentile_ms(50), self.percentile_ms(95),
+             self.max_ms, ', '.join(buckets))
+
+class LatencyTracer(object):
+    '''
+    Collects completed traces, i.e. traced messages whose
+    round trip is over. Optionally appends each trace as
+    one JSON line to a log file.
+    '''
+
+    def __init__(self, log_file=None):
+        '''
+        @param log_file: if provided, each recorded trace is
+            appended to this file as a JSON line.
+        @type log_file: str
+        '''
+        self.log_file = log_file
+        # {request_msg_code : {hop_name : LatencyHistogram}}
+        self.histograms = {}
+
+    def record(self, request_msg_code, hops):
+        '''
+        Add one round trip to the histograms.
+
+        @param request_msg_code: msg code of the original request
+        @type request_msg_code: str
+        @param hops: (hop_name, timestamp) tuples in order
+        @type hops: [(str, float)]
+        '''
+        if hops is None or len(hops) < 2:
+            return
+        hop_hists = self.histograms.setdefault(request_msg_code, {})
+        for (prev_name, prev_time), (name, hop_time) in zip(hops[:-1], hops[1:]):
+            hop_name = prev_name + '->' + name
+            hop_hists.setdefault(hop_name, LatencyHistogram()).add(1000 * (hop_time - prev_time))
+        hop_hists.setdefault('total', LatencyHistogram()).add(1000 * (hops[-1][1] - hops[0][1]))
+
+        if self.log_file is not None:
+            with open(self.log_file, 'a') as fd:
+                fd.write(json.dumps({'request' : request_msg_code, 'hops' : hops}) + '\n')
+
+    def summary(self):
+        '''
+        Return a human readable table of all histograms.
+        '''
+        lines = ['Latencies as of %s:' % time.strftime("%Y-%m-%d_%H_%M_%S")]
+        for request_msg_code in sorted(self.histograms.keys()):
+            lines.append('  %s:' % request_msg_code)
+            for hop_name, histogram in self.histograms[request_msg_code].items():
+                lines.append('    %-32s %s' % (hop_name, histogram))
+        return '\n'.join(lines)
+
+    def dump(self):
+        '''
+        Print the summary. If there is a log file, also append
+        the summary to <log_file>.summary. Returns the summary.
+        '''
+        summary = self.summary()
+        print(summary)
+        if self.log_file is not None:
+            with open(self.log_file + '.summary', 'a') as fd:
+                fd.write(summary + '\n')
+        return summary
@@ -0,0 +1,87 @@
+'''
+Created on Oct 19, 2026
+
+@author: paepcke
+
+Bounded least-recently-used cache for results that the
+visualizer computes again and again for the same few
+courses: top-10 similarity lists, and course description
+markup. Keys are tuples, such as
+
+    (model_fingerprint, 'top10', course_name)
+
+so that results of different models never mix. Hit, miss
+and eviction counts are kept for sizing the cache.
+'''
+
+from collections import OrderedDict
+
+
+class LruResultCache(object):
+    '''
+    Usage:
+        cache = LruResultCache(500)
+        text  = cache.get(key, lambda: expensive(course_name))
+    '''
+
+    def __init__(self, max_entries=500):
+        '''
+        @param max_entries: number of results kept
+        @type max_entries: int
+        '''
+        if max_entries < 1:
+            raise ValueError("Cache must hold at least one entry; got %s." % max_entries)
+        self.max_entries = max_entries
+        self.entries     = OrderedDict()
+        self.hits        = 0
+        self.misses      = 0
+        self.evictions   = 0
+
+    #--------------------------
+    # get
+    #----------------
+
+    def get(self, key, compute_fn):
+        '''
+        Return the cached result for key. On a miss, call
+        compute_fn(), and cache its result. Exceptions raised
+        by compute_fn are passed on; nothing is cached then.
+
+        @param key: hashable key
+        @type key: tuple
+        @param compute_fn: function without arguments that computes the result
+        @type compute_fn: callable
+        @return: the result
+        @rtype: any
+        '''
+        try:
+            value = self.entries[key]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return value
+
+        self.misses += 1
+        value = compute_fn()
+        self.entries[key] = value
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return value
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return 0.0 if lookups == 0 else self.hits / lookups
+
+    def clear(self):
+        self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __str__(self):
+        return 'LRU cache: %s/%s entries, %s hits, %s misses (hit rate %.1f%%), %s evictions' %\
+            (len(self.entries), self.max_entries, self.hits, self.misses,
+             100 * self.hit_rate(), self.evictions)
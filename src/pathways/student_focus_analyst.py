@@ -5,11 +5,13 @@ Created on Sep 25, 2018
 '''
 import os
 
+from gensim.models import KeyedVectors
 import numpy as np
 import pandas as pd
 from pandas.core.frame import DataFrame
 
-from course2vec.word2vec_model_creation import Word2VecModelCreator, Action
+from course2vec.model_registry import ModelRegistry
+from course2vec.vector_bundle import VectorBundle, bundle_is_current
 from pathways.student_query_engine import StudentQueryEngine
 
 
@@ -23,24 +25,65 @@ class StudentFocusAnalyst(object):
     
     The class does go to the database, extracting
     a given studentid's courses.
+    
+    Course vectors are memory-mapped, and shared by all
+    instances in a process. Processes that map the same 
+    vectors file share its pages.
     '''
     
+    # Vectors file name to the mapped vectors:
+    shared_vectors = {}
+    
     #--------------------------------
     # Constructor 
     #------------------
     
-    def __init__(self):
+    def __init__(self, best_by_metric=None):
         '''
         Constructor
+        
+        @param best_by_metric: if provided, use the vectors of the model 
+            registry's best model by this metric, such as 'mean_rank'.
+            Default: winning_model.vectors
+        @type best_by_metric: str
         '''
-        vector_model_filepath = os.path.join(os.path.dirname(__file__),
-                                             '../data/Word2vec/winning_model.vectors')
+        if best_by_metric is None:
+            vector_model_filepath = os.path.join(os.path.dirname(__file__),
+                                                 '../data/Word2vec/winning_model.vectors')
+        else:
+            vector_model_filepath = ModelRegistry().best_model(best_by_metric)['vectors_file']
                                              
-        self.vectors = Word2VecModelCreator(action=Action.LOAD_VECTORS, 
-                                            actionFileName=vector_model_filepath)
+        self.vectors = StudentFocusAnalyst.load_shared_vectors(vector_model_filepath)
         
         self.student_db = StudentQueryEngine()
 
+    #--------------------------------
+    # load_shared_vectors 
+    #------------------
+
+    @classmethod
+    def load_shared_vectors(cls, vectors_file):
+        '''
+        Map the vectors read-only, once per process. The file's
+        vector bundle is used if there is one (see course2vec/vector_bundle.py). 
+        Otherwise the KeyedVectors are loaded with mmap='r'. 
+        
+        @param vectors_file: KeyedVectors file
+        @type vectors_file: str
+        @return: vectors that support [course_name]
+        @rtype: {VectorBundle | KeyedVectors}
+        '''
+        try:
+            return cls.shared_vectors[vectors_file]
+        except KeyError:
+            pass
+        if bundle_is_current(vectors_file):
+            vectors = VectorBundle.load(vectors_file)
+        else:
+            vectors = KeyedVectors.load(vectors_file, mmap='r')
+        cls.shared_vectors[vectors_file] = vectors
+        return vectors
+
     #--------------------------------
     # student_group_breadth_l2 
     #------------------
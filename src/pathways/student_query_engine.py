@@ -31,7 +31,7 @@ class StudentQueryEngine(object):
     # all_stud_crses_strms 
     #------------------
     
-    def all_stud_crses_strms(self):
+    def all_stud_crses_strms(self, changed_since_strm=None):
         '''
         Return an iterator for query results:
             emplid, course_name, strm
@@ -39,14 +39,26 @@ class StudentQueryEngine(object):
         Caller should close the iterator if no more
         data is to be extracted from it.
         
+        If changed_since_strm is provided, only students with
+        at least one enrollment in that strm or later are included,
+        with all their enrollments.
+        
+        @param changed_since_strm: earliest strm of interest
+        @type changed_since_strm: int
         @return: iterator over db rows
         @rtype: [str,str,int]
         '''
+        if changed_since_strm is None:
+            where_clause = ''
+        else:
+            where_clause = '''WHERE emplid IN (SELECT emplid FROM EnrollmentTallyAllCols
+                                                WHERE strm >= %s)''' % changed_since_strm
         query = '''
                 SELECT emplid,coursename,strm
                   FROM EnrollmentTallyAllCols
+                  %s
                  ORDER BY emplid, coursename, strm;
-                 '''
+                 ''' % where_clause
         return self.run_query(query)
     
     #--------------------------------